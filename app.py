@@ -1,378 +1,171 @@
+import contextlib
+import json
+
 import streamlit as st
-import requests
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-import re
-
-# ==========================================
-# 1. CONFIGURACIÓN Y CONSTANTES
-# ==========================================
-
-URL_BASE = "https://escolares.arq.unam.mx:8086/horario/arquitectura/plan17"
-CICLO_ACTUAL = "20262"  # Ajustar según la fecha
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-    "X-Requested-With": "XMLHttpRequest",
-    "Referer": f"{URL_BASE}/index.php"
-}
-
-# ==========================================
-# 2. CATÁLOGOS DE DATOS (Diccionarios)
-# ==========================================
-
-CATALOGOS = {
-    "TALLERES": {
-        "- TODOS -": 0,  # <--- AGREGADO NUEVO
-        "ANTONIO GARCÍA GAYOU": 3, "CARLOS LAZO BARREIRO": 8, "CARLOS LEDUC MONTAÑO": 11,
-        "HANNES MEYER": 13, "JORGE GONZÁLEZ REYNA": 5, "JOSÉ VILLAGRÁN GARCÍA": 4,
-        "JUAN O GORMAN": 16, "LUIS BARRAGÁN": 7, "MAX CETTO": 15, "TALLER UNO": 10,
-        "DOMINGO GARCÍA RAMOS": 2, "EHECATL 21": 14, "FEDERICO MARISCAL Y PIÑA": 6,
-        "JOSÉ REVUELTAS": 17, "RAMÓN MARCOS NORIEGA": 9, "TALLER TRES": 12
-    },
-    "AREAS_OPTATIVAS": {
-        "- TODAS LAS ÁREAS -": 0, # <--- AGREGADO NUEVO
-        "Extensión Universitaria": 40, "Proyecto": 41, "Tecnología": 42,
-        "Teoría Historia": 43, "Urbano Ambiental": 44
-    },
-    "LIPS": {
-        "- TODAS LAS LÍNEAS -": 0, # <--- AGREGADO NUEVO
-        "CRITICA Y REFLEXION": 4110, "CULTURA Y CONSER.DEL PAT": 4111,
-        "DISEÑO DEL HABIT.Y MED.AM": 4112, "ESTRUCT.Y TECNOL.CONSTRU": 4113,
-        "EXPRESIVIDAD ARQUITECTONI": 4114, "GERENCIA DE PROYECTOS": 4115,
-        "GEST.EN LA PROD.DEL HABIT": 4116, "PROCESO PROYECTUAL": 4117
-    },
-    # Nota: Para Asignaturas y Profesores, lo ideal es scrapear la lista completa al inicio.
-    # Aquí pongo algunos ejemplos basados en tu input para que funcione el demo.
-    "ASIGNATURAS_COMUNES": {
-        "1135 - ARQUEOLOGIA DEL HABITAT I": 1135,
-        "1137 - GEOMETRIA I": 1137,
-        "1140 - TALLER INTEGRAL I": 1140,
-        "1555 - TALLER INTEGRAL III": 1555,
-        "1238 - SISTEMAS AMBIENTALES II": 1238
-    },
-    # Nota: El value del profesor debe ser exactamente el string largo (RFC|NOMBRE)
-    "PROFESORES_EJEMPLO": {
-        "ABUD RAMIREZ RAMON": "AURR6106285A0|ABUD RAMIREZ RAMON, MTRO.",
-        "AGUADO VILLARCE ARTURO": "AUVA530411PQ0|AGUADO VILLARCE ARTURO, ARQ.",
-        "CALDERON KLUCZYNSKI JOSE": "CAKJ6204196I5|CALDERON KLUCZYNSKI JOSE, MTRO.",
-        "MIRANDA CRUZ JOSE": "MICJ510803UV6|MIRANDA CRUZ JOSE, ARQ."
-    }
-}
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from horarios import busqueda, cache, catalogos, conexion, enlace, incremental, metricas, precarga, sesion
+# Esta página es solo la interfaz. Configuración y catálogos (secciones 1 y 2)
+# viven en horarios/config.py; parsers, búsqueda y grid del horario (sección 4)
+# en el paquete horarios/, que también se usa sin Streamlit (python -m horarios).
+from horarios.config import CATALOGOS, CICLO_ACTUAL, PRECARGA_ACTIVA, URL_BASE
+from horarios.conflictos import choques_con_horario, describir
+from horarios.generador import CRITERIOS, generar_horarios
+from horarios.grid import vista_semanal
+from horarios.horario import DIAS
+from horarios.indice import huella, indice_del_ciclo
+from horarios.oferta import unir
 
 # ==========================================
 # 3. FUNCIONES DE CONEXIÓN
 # ==========================================
 
-def consultar_api(endpoint, payload_extra):
-    """Función genérica para consultar cualquier PHP del sitio."""
-    url = f"{URL_BASE}/hor/{endpoint}"
-    
-    payload = {
-        "estu": 0,
-        "qsemac": CICLO_ACTUAL
-    }
-    payload.update(payload_extra)
+# Columnas de la tabla de resultados
+COLUMNAS_VISIBLES = ["Materia", "Grupo", "Horario", "Profesor", "Turno"]
 
+def buscar_ofertas(endpoint, payload_extra, tipo_parseo="ESTANDAR"):
+    """
+    Snapshot local -> caché compartida -> sitio (ver horarios/busqueda.py).
+    Aquí solo se decide cómo mostrar errores y avisos.
+    El DataFrame es compartido: no modificarlo en sitio.
+    """
     try:
-        response = requests.post(url, headers=HEADERS, data=payload, timeout=15)
-        response.raise_for_status()
-        return response.text
+        df = busqueda.buscar_ofertas(endpoint, payload_extra, tipo_parseo)
     except Exception as e:
         st.error(f"Error de conexión: {e}")
         return None
-# ==========================================
-# AGREGAR ESTO EN LA SECCIÓN 3
-# ==========================================
+    if not conexion.origen_disponible(URL_BASE):
+        st.warning("⚠️ El servidor de escolares no responde; se muestran los últimos datos guardados.")
+    return df
 
-@st.cache_data(show_spinner=False) # Guardamos en caché para no cargarla cada vez
-def obtener_catalogo_profesores():
-    """
-    Descarga la lista completa de profesores directamente desde el sitio web.
-    Busca el elemento <select id="idprof"> mostrado en tu imagen.
-    """
-    url = f"{URL_BASE}/index.php" # Generalmente la lista está en el inicio
-    
-    try:
-        # Hacemos una petición GET normal para ver el formulario
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, "lxml")
-        
-        # Buscamos el dropdown por su ID (visto en tu imagen)
-        select_profes = soup.find("select", {"id": "idprof"})
-        
-        if not select_profes:
-            return {} # Si no lo encuentra, regresa vacío
-
-        profesores = {}
-        # Iteramos sobre cada <option> dentro del select
-        for option in select_profes.find_all("option"):
-            valor = option.get("value")
-            texto = option.get_text(strip=True)
-            
-            # Filtramos la opción por defecto "--PROFESOR--" y valores vacíos
-            if valor and "PROFESOR" not in valor and len(valor) > 2:
-                profesores[texto] = valor
-                
-        return profesores
+def consulta(endpoint, payload_extra, tipo_parseo="ESTANDAR"):
+    """Lo único que la sesión guarda de una búsqueda."""
+    return {"endpoint": endpoint, "payload_extra": payload_extra, "tipo_parseo": tipo_parseo}
 
+def buscar_combinado(consultas):
+    """Como buscar_ofertas, para la lista de consultas que recuerda la sesión."""
+    try:
+        df = busqueda.buscar_combinado(consultas)
+    except busqueda.BusquedaIncompleta as e:
+        st.warning(f"⚠️ {e}")
+        df = e.df
     except Exception as e:
-        st.error(f"No se pudo cargar la lista de profesores: {e}")
-        return {}
-# ==========================================
-# 4. PARSER INTELIGENTE Y VISUALIZADOR
-# ==========================================
+        st.error(f"Error de conexión: {e}")
+        return None
+    if not conexion.origen_disponible(URL_BASE):
+        st.warning("⚠️ El servidor de escolares no responde; se muestran los últimos datos guardados.")
+    return df
+
+def perfil_si_pedido():
+    """cProfile de la búsqueda si se pidió en el panel de rendimiento; si no, nada."""
+    return metricas.perfil(30) if st.session_state.get("perfilar") else contextlib.nullcontext()
 
-def limpiar_texto(texto):
-    if not texto: return ""
-    return texto.strip().replace("+ ", "").replace("\n", " ").replace("\r", "")
+def guardar_perfil(perfil):
+    if perfil is not None:
+        st.session_state.ultimo_perfil = perfil.texto
 
-def extraer_horario(celda_html):
-    etiquetas_b = celda_html.find_all("b")
-    if not etiquetas_b:
-        return celda_html.get_text(strip=True)
-    return " / ".join([b.get_text(strip=True) for b in etiquetas_b])
+def precargar_siguientes(consultas):
+    """En segundo plano: lo que esta sesión probablemente busque después (horarios/precarga.py)."""
+    ctx = get_script_run_ctx()
+    precarga.precargar(ctx.session_id if ctx else "local", consultas)
 
-def interpretar_horario(texto_horario):
+def buscar_y_recordar(endpoint, payload_extra, tipo_parseo="ESTANDAR"):
     """
-    Parser robusto para horarios complejos.
-    Corrige el error de 'comerse' las comas y juntar días.
+    Busca y, si hubo datos, guarda en la sesión solo la consulta: en cada
+    rerun la tabla se vuelve a pedir a la caché compartida (mismo objeto
+    para todas las sesiones), en lugar de una copia por sesión.
     """
-    if not texto_horario: return []
-    
-    # 1. Normalización: Minúsculas
-    texto = texto_horario.lower()
-    
-    # 2. LIMPIEZA CRÍTICA: Reemplazar separadores por ESPACIOS
-    # El error anterior era reemplazarlos por "" (nada), lo que pegaba "14:00,MI" -> "14:00mi"
-    for char in [",", ";", ".", " y ", " e ", " - "]: 
-        texto = texto.replace(char, " ")
-        
-    # 3. Quitar los dos puntos SOLO de las horas (10:00 -> 1000)
-    texto = texto.replace(":", "")
-    
-    # Mapa de días
-    mapa_dias = {
-        "lu": "Lunes", "ma": "Martes", "mi": "Miércoles", 
-        "ju": "Jueves", "vi": "Viernes", "sa": "Sábado"
-    }
-    
-    bloques = []
-    tokens = texto.split() # Dividir por espacios
-    
-    dias_activos = [] # Memoria de qué días estamos leyendo
-    
-    for token in tokens:
-        token = token.strip()
-        if not token: continue
-
-        # A) ¿Es un día? (ej: "lu", "ma")
-        # Tomamos las primeras 2 letras por si viene "lunes" completo
-        token_clean = token[:2] 
-        if token_clean in mapa_dias:
-            # Encontramos un nuevo día, actualizamos el "puntero"
-            dias_activos = [mapa_dias[token_clean]]
-            
-        # B) ¿Es un horario? (ej: "0900-1400" o "9-14")
-        elif "-" in token:
-            horas = re.findall(r'(\d{1,4})-(\d{1,4})', token)
-            if horas and dias_activos:
-                inicio_raw, fin_raw = horas[0]
-                
-                # Función auxiliar para convertir hora texto a numero decimal
-                def normalizar_hora(h_str):
-                    val = int(h_str)
-                    # Caso formato militar 1330 -> 13.5
-                    if val > 24: 
-                        horas = val // 100
-                        minutos = val % 100
-                        return horas + (0.5 if minutos >= 30 else 0)
-                    # Caso formato simple 13 -> 13.0
-                    return float(val) 
-                
-                inicio = normalizar_hora(inicio_raw)
-                fin = normalizar_hora(fin_raw)
-                
-                # Agregar este horario a TODOS los días activos (ej: MI 7-12 y 13-15)
-                for dia in dias_activos:
-                    bloques.append({
-                        "dia": dia,
-                        "inicio": int(inicio), # Redondeamos a entero para el grid
-                        "fin": int(fin) + (1 if fin % 1 > 0 else 0) # Asegurar que cubra la hora final
-                    })
-    
-    return bloques
+    with perfil_si_pedido() as perfil:
+        df = buscar_ofertas(endpoint, payload_extra, tipo_parseo)
+    guardar_perfil(perfil)
+    if df is not None:
+        st.session_state.consulta_actual = [consulta(endpoint, payload_extra, tipo_parseo)]
+        st.session_state.pagina_resultados = 1
+        precargar_siguientes(st.session_state.consulta_actual)
+    return df
+
+def buscar_varias_y_recordar(consultas):
+    """
+    Lanza todas las consultas a la vez y va mostrando la tabla combinada
+    (sin repetidos por Clave + Grupo) conforme llega cada respuesta.
+    La sesión recuerda solo las consultas que sí respondieron.
+    """
+    if not consultas:
+        st.warning("⚠️ Elige al menos una opción.")
+        return None
+    if len(consultas) == 1:
+        return buscar_y_recordar(**consultas[0])
+
+    avance = st.progress(0.0, text=f"0/{len(consultas)} consultas")
+    zona = st.empty()
+    tablas = [None] * len(consultas)
+    parcial = pd.DataFrame()
+    # Las consultas corren en otros hilos: el perfil solo ve la unión y el render de esta sesión
+    with perfil_si_pedido() as perfil:
+        for hechas, (i, df, error) in enumerate(busqueda.en_paralelo(consultas), 1):
+            if error is None:
+                tablas[i] = df
+                parcial = unir([t for t in tablas if t is not None])
+            else:
+                st.error(f"Error de conexión ({consultas[i]['payload_extra']}): {error}")
+            avance.progress(hechas / len(consultas), text=f"{hechas}/{len(consultas)} consultas · {len(parcial)} grupos")
+            if not parcial.empty:
+                zona.dataframe(parcial[[c for c in COLUMNAS_VISIBLES if c in parcial.columns]], hide_index=True, width="stretch")
+    guardar_perfil(perfil)
+    avance.empty()
+    zona.empty()
+
+    respondieron = [c for c, t in zip(consultas, tablas) if t is not None]
+    if not respondieron:
+        return None
+    st.session_state.consulta_actual = respondieron
+    st.session_state.pagina_resultados = 1
+    precargar_siguientes(respondieron)
+    if len(respondieron) > 1:
+        # La unión ya está hecha: que el rerun (y otras sesiones) la tomen de la caché
+        cache.cache_compartida().guardar(busqueda.clave_combinada(respondieron), parcial)
+    return parcial
 
-def generar_paleta_colores(n):
-    """Genera una lista de colores pastel bonitos"""
-    colores_base = [
-        "#FFB3BA", "#FFDFBA", "#FFFFBA", "#BAFFC9", "#BAE1FF", # Pastel Red, Orange, Yellow, Green, Blue
-        "#E6B3FF", "#F0E68C", "#98FB98", "#DDA0DD", "#87CEFA"  # Purple, Khaki, PaleGreen, Plum, LightSkyBlue
-    ]
-    return colores_base * (n // len(colores_base) + 1)
+# ==========================================
+# AGREGAR ESTO EN LA SECCIÓN 3
+# ==========================================
 
-def crear_grid_horario(lista_materias):
+def obtener_catalogo_profesores():
     """
-    Genera dos DataFrames: Texto (visual) y Colores (fondo)
+    Lista completa de profesores del <select id="idprof"> de index.php.
+    Sale de horarios/catalogos.py: disco del ciclo + GET condicional al vencer.
     """
-    dias = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
-    horas = range(7, 22) # 7am a 10pm
-    
-    df_texto = pd.DataFrame("", index=horas, columns=dias)
-    df_colores = pd.DataFrame("", index=horas, columns=dias)
-    
-    conflictos = []
-    
-    # Generamos colores pastel
-    paleta = generar_paleta_colores(len(lista_materias))
-    mapa_colores = {m['id']: paleta[i] for i, m in enumerate(lista_materias)}
+    return catalogos.catalogos()["PROFESORES"]
 
-    for materia in lista_materias:
-        bloques = interpretar_horario(materia["Horario"])
-        
-        # Formato corto para que no ocupe tanto espacio
-        nombre_display = f"{materia['Materia']}\n(G:{materia['Grupo']})"
-        color = mapa_colores[materia['id']]
-        
-        for bloque in bloques:
-            dia = bloque["dia"]
-            h_inicio = bloque["inicio"]
-            h_fin = bloque["fin"]
-            
-            # Iteramos sobre las horas del bloque
-            for h in range(h_inicio, h_fin):
-                if h in df_texto.index:
-                    # VERIFICAR CONFLICTOS
-                    # Si la celda ya tiene color, hay choque (a menos que sea la misma materia)
-                    color_actual = df_colores.at[h, dia]
-                    if color_actual and color_actual != color:
-                        conflictos.append(f"Choque en {dia} a las {h}:00")
-                        df_colores.at[h, dia] = "#ff4b4b" # Rojo intenso
-                        df_texto.at[h, dia] = "⚠️ CHOQUE"
-                    else:
-                        # PINTAR
-                        df_colores.at[h, dia] = color
-                        
-                        # LOGICA VISUAL: Solo poner texto en la primera hora
-                        if h == h_inicio:
-                            df_texto.at[h, dia] = nombre_display
-                        # Las demás horas se quedan con texto vacío "" pero con fondo de color
-                        
-    return df_texto, df_colores, conflictos
+@st.cache_data(show_spinner=False, ttl=600)
+def obtener_catalogo_asignaturas():
+    """Asignaturas comunes + todas las del snapshot local (si hay)."""
+    return busqueda.catalogo_asignaturas()
 
-# ==========================================
-# AGREGAR ESTO AL FINAL DE LA SECCIÓN 4
-# ==========================================
 
-def parsear_html_generico(html, tipo_parseo="ESTANDAR"):
+def buscador(nombre, catalogo, etiqueta, placeholder, key, por_defecto=None):
     """
-    Parsea el HTML devuelto por el servidor y lo convierte en DataFrame.
+    Typeahead sobre `catalogo` ({etiqueta: valor}): sin acentos ni mayúsculas,
+    por prefijo de palabra y tolerante a errores de dedo. El índice se arma
+    una vez por ciclo y lo comparten todas las sesiones.
+    Regresa (etiqueta, valor) elegidos o (None, None).
     """
-    soup = BeautifulSoup(html, "lxml")
-    
-    tablas = soup.find_all("table")
-    if not tablas: return pd.DataFrame()
-    
-    # Tomamos la tabla más grande
-    tabla = max(tablas, key=lambda t: len(t.find_all("tr")))
-    filas = tabla.find_all("tr")
-    
-    datos = []
-    
-    # --- MEMORIA DE CONTEXTO ---
-    contexto_actual = "General"
-    turno_actual = "Indistinto"
-
-    # Mapa de colores para detectar turno
-    COLORES_TURNO = {
-        "64C2FD": "Matutino",   # Azul
-        "FFA97C": "Vespertino"  # Naranja
-    }
-
-    for fila in filas:
-        celdas = fila.find_all("td")
-        if not celdas: continue
-
-        # ---------------------------------------------------------
-        # 1. DETECCIÓN DE SEPARADORES (Encabezados)
-        # ---------------------------------------------------------
-        if not fila.get("class") or "sombreado" not in fila.get("class"):
-            celda_header = celdas[0]
-            if celda_header.get("colspan"):
-                estilo_celda = celda_header.get("style", "").upper()
-                texto_separador = celda_header.get_text(strip=True)
-
-                # A) DETECTAR TURNO POR COLOR
-                for hex_code, nombre_turno in COLORES_TURNO.items():
-                    if hex_code in estilo_celda:
-                        turno_actual = nombre_turno
-                        break
-                
-                # B) ACTUALIZAR CONTEXTO (Nombre del Taller/LIP)
-                if texto_separador:
-                    if "Taller:" in texto_separador:
-                        contexto_actual = texto_separador.replace("Taller:", "").strip()
-                    elif "Cursos Optativos" in texto_separador:
-                        contexto_actual = texto_separador.replace("Cursos Optativos Área", "").strip()
-                        turno_actual = "Indistinto"
-                    elif "LIP:" in texto_separador:
-                         if "LIP:" in texto_separador:
-                             contexto_actual = texto_separador.split("LIP:")[1].strip()
-            continue
-
-        # ---------------------------------------------------------
-        # 2. EXTRACCIÓN DE DATOS (Filas 'sombreado')
-        # ---------------------------------------------------------
-        if "sombreado" in fila.get("class", []):
-            if len(celdas) < 5: continue
-            
-            item = {}
-            
-            if tipo_parseo in ["ESTANDAR", "ASIGNATURA_CONTEXTO"]:
-                item["Clave"] = limpiar_texto(celdas[0].text)
-                
-                raw_materia = celdas[1].text
-                if "LIP:" in raw_materia:
-                    item["Materia"] = limpiar_texto(raw_materia.split("LIP:")[0])
-                else:
-                    item["Materia"] = limpiar_texto(raw_materia)
-
-                item["Grupo"] = limpiar_texto(celdas[2].text)
-                item["Profesor"] = limpiar_texto(celdas[4].text)
-                
-                idx_horario = 5
-                if len(celdas) > idx_horario:
-                    item["Horario"] = extraer_horario(celdas[idx_horario])
-                
-                item["Agrupación"] = contexto_actual 
-                item["Turno"] = turno_actual 
-
-            elif tipo_parseo == "PROFESOR":
-                item["Clave"] = limpiar_texto(celdas[0].text)
-                item["Materia"] = limpiar_texto(celdas[1].text)
-                item["Grupo"] = limpiar_texto(celdas[2].text)
-                item["Agrupación"] = limpiar_texto(celdas[4].text) 
-                item["Profesor"] = "BUSQUEDA PROFESOR"
-                item["Horario"] = extraer_horario(celdas[5])
-                item["Turno"] = "ND" 
-
-            elif tipo_parseo == "GENERO":
-                item["Clave"] = limpiar_texto(celdas[0].text)
-                item["Materia"] = limpiar_texto(celdas[1].text)
-                item["Grupo"] = limpiar_texto(celdas[2].text)
-                item["Profesor"] = limpiar_texto(celdas[4].text)
-                item["Horario"] = limpiar_texto(celdas[5].text)
-                item["Agrupación"] = "Requisito Género"
-                item["Turno"] = "Indistinto"
-
-            if item:
-                datos.append(item)
-
-    return pd.DataFrame(datos)
-    
+    texto = st.text_input(etiqueta, placeholder=placeholder, key=f"{key}_texto")
+    if texto.strip():
+        indice = indice_del_ciclo(nombre, CICLO_ACTUAL, catalogo.items, version=huella(catalogo))
+        opciones = [e for e, _ in indice.buscar(texto, limite=25)]
+        if not opciones:
+            st.caption("Sin coincidencias.")
+            return None, None
+    else:
+        opciones = list(por_defecto if por_defecto is not None else catalogo)
+        if not opciones:
+            return None, None
+    elegido = st.selectbox(f"{len(opciones)} coincidencias", opciones, key=f"{key}_{texto}")
+    return elegido, catalogo.get(elegido)
+
 # ==========================================
 # 5. INTERFAZ DE USUARIO (STREAMLIT)
 # ==========================================
@@ -382,6 +175,28 @@ st.set_page_config(page_title="UNAM Arq Scheduler", layout="wide", page_icon="
 if 'mi_horario' not in st.session_state:
     st.session_state.mi_horario = [] # Aquí guardaremos las materias
 
+# --- HORARIO EN LA URL (?h=...) ---
+# Al abrir la sesión (recarga, otra pestaña, enlace compartido) se reconstruye
+# con datos locales, sin repetir búsquedas ni ir al sitio (horarios/enlace.py)
+if 'codigo_horario' not in st.session_state:
+    st.session_state.codigo_horario = None
+    codigo = st.query_params.get("h")
+    if codigo and not st.session_state.mi_horario:
+        try:
+            restauradas, faltantes = enlace.restaurar(codigo)
+        except enlace.EnlaceDeOtroCiclo as e:
+            st.warning(f"⚠️ El enlace es de un horario del ciclo {e.ciclo} y esta página es del ciclo "
+                       f"{CICLO_ACTUAL}: los grupos cambian de un ciclo a otro, arma tu horario de nuevo.")
+        except enlace.EnlaceInvalido as e:
+            st.warning(f"⚠️ El enlace del horario no es válido ({e}).")
+        else:
+            st.session_state.mi_horario = restauradas
+            # La URL se queda como vino (con los que faltan) hasta que cambie el horario
+            st.session_state.codigo_horario = enlace.codificar(restauradas)
+            if faltantes:
+                st.warning("⚠️ Sin datos guardados de: " + ", ".join(f"{c}-{g}" for c, g in faltantes)
+                           + ". Búscalos para agregarlos de nuevo.")
+
 # --- CSS para mejorar apariencia ---
 st.markdown("""
 <style>
@@ -400,17 +215,42 @@ with st.sidebar:
     # ... (Dentro del sidebar)
     modo_busqueda = st.radio(
         "Selecciona modo:",
-        ["Taller / Semestre", "Optativas", "Complementarios", "Asignatura", "Requisito de Género", "Profesor"]
+        ["Taller / Semestre", "Optativas", "Complementarios", "Asignatura", "Requisito de Género", "Profesor", "Generar Horario"]
     )
     st.info(f"Ciclo escolar: {CICLO_ACTUAL}")
 
+    # Latencia por endpoint y aciertos de caché (todas las sesiones del proceso)
+    with st.expander("📶 Servidor y caché"):
+        latencias = conexion.resumen_latencias()
+        if latencias:
+            st.dataframe(pd.DataFrame.from_dict(latencias, orient="index"), width="stretch")
+        st.json(cache.cache_compartida().estadisticas())
+        st.caption(f"Circuito: {conexion.estado_circuitos()}")
+        if PRECARGA_ACTIVA:
+            st.caption(f"Precarga: {precarga.precargador().estadisticas()}")
+
 # --- ÁREA PRINCIPAL ---
 st.header(f"🏛️ Búsqueda por: {modo_busqueda}")
 
 # 1. INICIALIZAR LA MEMORIA DE BÚSQUEDA
-# Si no existe un lugar para guardar los resultados, lo creamos vacío
-if 'resultados_busqueda' not in st.session_state:
-    st.session_state.resultados_busqueda = pd.DataFrame()
+# Talleres, áreas, LIPs, profesores... tal como vienen en index.php (compartidos por el proceso).
+# Es una lectura en memoria: al vencer se refrescan en un hilo (horarios/catalogos.py)
+catalogo_sitio = catalogos.catalogos()
+
+# La sesión solo recuerda QUÉ se buscó; la tabla vive en la caché compartida
+if 'consulta_actual' not in st.session_state:
+    st.session_state.consulta_actual = None
+
+# Cambios publicados por el refresco incremental (python -m horarios.incremental):
+# un hilo del proceso revisa el feed y quita de la caché solo las consultas
+# afectadas; aquí solo se lee la versión en memoria y se corrige Mi Horario
+version_cambios = incremental.vigilar()
+if st.session_state.setdefault("version_cambios", version_cambios) < version_cambios:
+    for aviso in sesion.aplicar_cambios(
+        st.session_state.mi_horario, incremental.cambios_desde(st.session_state.version_cambios)
+    ):
+        st.toast(f"🔄 {aviso}")
+    st.session_state.version_cambios = version_cambios
 
 # ==========================================
 # LÓGICA POR MODO DE BÚSQUEDA
@@ -419,65 +259,64 @@ if 'resultados_busqueda' not in st.session_state:
 if modo_busqueda == "Taller / Semestre":
     col1, col2 = st.columns(2)
     with col1:
-        taller_nom = st.selectbox("Selecciona Taller", list(CATALOGOS["TALLERES"].keys()))
+        talleres_nom = st.multiselect("Selecciona Taller(es)", list(catalogo_sitio["TALLERES"].keys()),
+                                      default=list(catalogo_sitio["TALLERES"].keys())[:1])
     with col2:
-        semestre = st.selectbox("Semestre", [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], index=1)
-        if semestre == 0: st.caption("Mostrando todos los semestres")
+        semestres = st.multiselect("Semestre(s)", [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], default=[1])
+        if 0 in semestres: st.caption("0 = todos los semestres")
     
     if st.button("Buscar"):
-        html = consultar_api("taller.php", {"tal": CATALOGOS["TALLERES"][taller_nom], "talsem": semestre})
-        if html:
-            # GUARDAR EN SESSION_STATE
-            st.session_state.resultados_busqueda = parsear_html_generico(html, "ESTANDAR")
-        else:
+        # Una consulta por taller x semestre, todas a la vez; la sesión solo guarda las consultas
+        df = buscar_varias_y_recordar([
+            consulta("taller.php", {"tal": catalogo_sitio["TALLERES"][t], "talsem": s})
+            for t in talleres_nom for s in semestres
+        ])
+        if df is None:
             st.warning("No se encontraron datos.")
 
 elif modo_busqueda == "Optativas":
     tipo_opt = st.radio("Filtrar por:", ["Área de Conocimiento", "Línea de Interés (LIP)"], horizontal=True)
     tal_fijo = 19
-    val_select = 0
+    valores = []
     endpoint = ""
 
     if tipo_opt == "Área de Conocimiento":
-        area = st.selectbox("Selecciona Área", list(CATALOGOS["AREAS_OPTATIVAS"].keys()))
-        val_select = CATALOGOS["AREAS_OPTATIVAS"][area]
+        areas = st.multiselect("Selecciona Área(s)", list(catalogo_sitio["AREAS_OPTATIVAS"].keys()),
+                               default=list(catalogo_sitio["AREAS_OPTATIVAS"].keys())[:1])
+        valores = [catalogo_sitio["AREAS_OPTATIVAS"][a] for a in areas]
         endpoint = "taller.php"
     else:
-        lip = st.selectbox("Selecciona LIP", list(CATALOGOS["LIPS"].keys()))
-        val_select = CATALOGOS["LIPS"][lip]
+        lips = st.multiselect("Selecciona LIP(s)", list(catalogo_sitio["LIPS"].keys()),
+                              default=list(catalogo_sitio["LIPS"].keys())[:1])
+        valores = [catalogo_sitio["LIPS"][l] for l in lips]
         endpoint = "LipHorarios.php"
 
     if st.button("Buscar Optativas"):
-        html = consultar_api(endpoint, {"tal": tal_fijo, "talsem": val_select})
-        if html:
-            # GUARDAR EN SESSION_STATE
-            st.session_state.resultados_busqueda = parsear_html_generico(html, "ESTANDAR")
+        # Todas las áreas / LIPs elegidas a la vez; la sesión solo guarda las consultas
+        buscar_varias_y_recordar([consulta(endpoint, {"tal": tal_fijo, "talsem": v}) for v in valores])
 
 elif modo_busqueda == "Complementarios":
     semestre_comp = st.slider("Semestre", 1, 10, 1)
     if st.button("Buscar Complementarios"):
-        html = consultar_api("taller.php", {"tal": 18, "talsem": semestre_comp})
-        if html:
-            # GUARDAR EN SESSION_STATE
-            st.session_state.resultados_busqueda = parsear_html_generico(html, "ESTANDAR")
+        # GUARDAR EN SESSION_STATE (solo la consulta; los datos viven en la caché compartida)
+        buscar_y_recordar("taller.php", {"tal": 18, "talsem": semestre_comp})
 
 elif modo_busqueda == "Asignatura":
-    asig_nom = st.selectbox("Selecciona Asignatura (Ejemplo)", list(CATALOGOS["ASIGNATURAS_COMUNES"].keys()))
-    asig_id = CATALOGOS["ASIGNATURAS_COMUNES"][asig_nom]
-    
-    if st.button("Buscar por Materia"):
-        html = consultar_api("asignatura.php", {"asig": asig_id})
-        if html:
-            # GUARDAR EN SESSION_STATE
-            st.session_state.resultados_busqueda = parsear_html_generico(html, "ASIGNATURA_CONTEXTO")
+    asig_nom, asig_id = buscador(
+        "asignaturas", obtener_catalogo_asignaturas(), "Busca Asignatura",
+        "Clave o nombre, p. ej. 1555 o taller integral", "asignatura",
+        por_defecto=CATALOGOS["ASIGNATURAS_COMUNES"],
+    )
+
+    if asig_nom and st.button("Buscar por Materia"):
+        # GUARDAR EN SESSION_STATE (solo la consulta; los datos viven en la caché compartida)
+        buscar_y_recordar("asignatura.php", {"asig": asig_id}, "ASIGNATURA_CONTEXTO")
 
 elif modo_busqueda == "Requisito de Género":
     st.markdown("Busca los grupos disponibles para el requisito de género.")
     if st.button("Consultar Grupos"):
-        html = consultar_api("genero.php", {"tal": 18, "talsem": 20})
-        if html:
-            # GUARDAR EN SESSION_STATE
-            st.session_state.resultados_busqueda = parsear_html_generico(html, "GENERO")
+        # GUARDAR EN SESSION_STATE (solo la consulta; los datos viven en la caché compartida)
+        buscar_y_recordar("genero.php", {"tal": 18, "talsem": 20}, "GENERO")
 
 elif modo_busqueda == "Profesor":
     # 1. Cargamos la lista completa (solo tarda un poco la primera vez)
@@ -485,26 +324,88 @@ elif modo_busqueda == "Profesor":
         catalogo_profes = obtener_catalogo_profesores()
     
     if catalogo_profes:
-        # 2. Creamos el selector con la lista descargada
-        # Usamos orden alfabético para facilitar la búsqueda
-        nombres_ordenados = sorted(list(catalogo_profes.keys()))
-        
-        prof_nom = st.selectbox(
-            "Selecciona Profesor", 
-            nombres_ordenados,
-            index=None, # Deja el campo vacío al principio
-            placeholder="Escribe el nombre del profesor..."
+        # 2. Buscador instantáneo sobre la lista descargada
+        # (no hace falta escribir acentos: "garcia" encuentra "GARCÍA")
+        prof_nom, prof_id = buscador(
+            "profesores", catalogo_profes, "Busca Profesor",
+            "Escribe el nombre del profesor...", "profesor",
+            por_defecto=[],
         )
-        
+
         if prof_nom: # Solo si el usuario seleccionó algo
-            prof_id = catalogo_profes[prof_nom]
-            
             if st.button("Ver Horario del Profesor"):
-                html = consultar_api("profe.php", {"idprof": prof_id})
-                if html:
-                    st.session_state.resultados_busqueda = parsear_html_generico(html, "PROFESOR")
+                buscar_y_recordar("profe.php", {"idprof": prof_id}, "PROFESOR")
     else:
         st.warning("No se pudo descargar la lista de profesores. Intenta recargar la página.")
+
+elif modo_busqueda == "Generar Horario":
+    st.markdown("Elige las materias que quieres cursar y se arman combinaciones de grupos **sin choques**.")
+    catalogo_asigs = obtener_catalogo_asignaturas()
+    asigs = st.multiselect("Asignaturas", list(catalogo_asigs.keys()))
+    claves_extra = st.text_input("Otras claves (separadas por coma)", placeholder="1555, 1620")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        criterio = st.selectbox("Priorizar", list(CRITERIOS), format_func=CRITERIOS.get)
+        turno_gen = st.selectbox("Turno", ["Cualquiera", "Matutino", "Vespertino"])
+    with col2:
+        hora_min, hora_max = st.slider("Horario permitido", 7, 22, (7, 22))
+        dias_libres = st.multiselect("Días libres", DIAS)
+    with col3:
+        taller_gen = st.selectbox("Solo del taller", ["Cualquiera"] + list(catalogo_sitio["TALLERES"].keys()))
+        evitar = st.text_input("Evitar profesores (separados por coma)")
+        respetar_actual = st.checkbox("Respetar Mi Horario actual", value=True)
+
+    claves = [str(catalogo_asigs[a]) for a in asigs]
+    claves += [c.strip() for c in claves_extra.split(",") if c.strip()]
+
+    if st.button("Generar combinaciones") and claves:
+        with st.spinner("Consultando grupos de cada asignatura..."):
+            ofertas, errores = busqueda.ofertas_de_asignaturas(claves)
+        for clave, error in errores.items():
+            st.error(f"No se pudieron consultar los grupos de {clave}: {error}")
+        st.session_state.generados = generar_horarios(
+            ofertas, claves, k=5, criterio=criterio,
+            turno=None if turno_gen == "Cualquiera" else turno_gen,
+            taller=None if taller_gen == "Cualquiera" else taller_gen,
+            evitar_profesores=[p.strip() for p in evitar.split(",") if p.strip()],
+            dias_libres=[DIAS.index(d) for d in dias_libres],
+            hora_min=hora_min if hora_min > 7 else None,
+            hora_max=hora_max if hora_max < 22 else None,
+            fijos=st.session_state.mi_horario if respetar_actual else (),
+        )
+
+    generados = st.session_state.get("generados")
+    if generados is not None:
+        if generados.sin_opciones:
+            st.warning(f"Sin grupos posibles para: {', '.join(generados.sin_opciones)}")
+        elif not generados.soluciones:
+            st.warning("No hay combinaciones sin choques con esas restricciones.")
+        else:
+            st.caption(
+                f"{generados.nodos} combinaciones revisadas en {generados.segundos:.2f}s"
+                + ("" if generados.completo else " (se agotó el tiempo: las mejores encontradas)")
+            )
+        for i, solucion in enumerate(generados.soluciones):
+            m = solucion.metricas
+            titulo = (f"Opción {i + 1}: {m['dias_con_clase']} días, "
+                      f"{m['horas_muertas']:g} h muertas, sales a las {m['salida_max']:g}")
+            with st.expander(titulo, expanded=i == 0):
+                st.dataframe(
+                    pd.DataFrame(solucion.grupos)[[c for c in ["Clave", "Materia", "Grupo", "Horario", "Profesor"]
+                                                   if c in solucion.grupos[0]]],
+                    hide_index=True, width="stretch",
+                )
+                otros = {c: [g["Grupo"] for g in alt] for c, alt in solucion.alternativas.items() if alt}
+                if otros:
+                    st.caption("Mismo horario en: " + "; ".join(f"{c}: {', '.join(map(str, gs))}" for c, gs in otros.items()))
+                if st.button("➕ Usar esta opción", key=f"usar_gen_{i}"):
+                    ids = {m["id"] for m in st.session_state.mi_horario}
+                    for grupo in solucion.grupos:
+                        materia = sesion.materia_para_horario(grupo)
+                        if materia["id"] not in ids:
+                            st.session_state.mi_horario.append(materia)
+                    st.rerun()
         
 # ==========================================
 # 6. RESULTADOS Y SELECCIÓN (MODO VERTICAL)
@@ -512,12 +413,15 @@ elif modo_busqueda == "Profesor":
 
 st.markdown("---")
 
-# 1. RECUPERAR DE LA MEMORIA
-# Importante para que no se borre la tabla al dar click
-if 'resultados_busqueda' not in st.session_state:
-    st.session_state.resultados_busqueda = pd.DataFrame()
-
-df_resultado = st.session_state.resultados_busqueda
+# 1. RECUPERAR LA CONSULTA DE LA MEMORIA
+# La tabla se vuelve a pedir a la caché compartida: es el mismo objeto (de
+# solo lectura) para todas las sesiones, no una copia por sesión.
+consultas = st.session_state.get("consulta_actual")
+if isinstance(consultas, dict):
+    consultas = [consultas]  # sesiones de antes de las búsquedas múltiples
+df_resultado = buscar_combinado(consultas) if consultas else None
+if df_resultado is None:
+    df_resultado = pd.DataFrame()
 
 # ---------------------------------------------------------
 # PARTE SUPERIOR: RESULTADOS DE BÚSQUEDA
@@ -525,43 +429,64 @@ df_resultado = st.session_state.resultados_busqueda
 st.subheader("📋 Resultados de la Búsqueda")
 
 if not df_resultado.empty:
-    # Añadimos columna de selección
-    # Usamos .copy() para evitar advertencias de pandas
-    df_resultado = df_resultado.copy()
-    if "Seleccionar" not in df_resultado.columns:
-        df_resultado.insert(0, "Seleccionar", False)
-    
-    # Configuramos columnas visibles
-    columnas_visibles = ["Seleccionar", "Materia", "Grupo", "Horario", "Profesor", "Turno"]
-    cols_final = [c for c in columnas_visibles if c in df_resultado.columns]
+    # Filas a mostrar como posiciones dentro de la tabla compartida (sin copiarla)
+    posiciones = np.arange(len(df_resultado))
+
+    # Choques contra Mi Horario en una sola pasada sobre las máscaras
+    choca_con = None
+    if st.session_state.mi_horario and "Horario" in df_resultado.columns:
+        with metricas.fase("choques"):
+            choca_con = choques_con_horario(df_resultado, st.session_state.mi_horario)
+        ids_actuales = {m["id"] for m in st.session_state.mi_horario}
+        ya_agregada = (df_resultado["Materia"].astype(str) + "-" + df_resultado["Grupo"].astype(str)).isin(ids_actuales).to_numpy()
+
+        n_choques = int(((choca_con != "") & ~ya_agregada).sum())
+        if n_choques and st.checkbox(f"Ocultar {n_choques} grupos que chocan con Mi Horario", value=False):
+            posiciones = np.flatnonzero((choca_con == "") | ya_agregada)
+
+    # Paginación: solo la página visible se copia y se manda al navegador
+    n_paginas = sesion.paginas(len(posiciones))
+    pagina = 1
+    if n_paginas > 1:
+        if st.session_state.get("pagina_resultados", 1) > n_paginas:
+            st.session_state.pagina_resultados = n_paginas
+        pagina = st.number_input(f"Página (de {n_paginas}; {len(posiciones)} grupos)", 1, n_paginas, key="pagina_resultados")
+    inicio, fin = sesion.rango_pagina(pagina, len(posiciones))
+    en_pagina = posiciones[inicio:fin]
+
+    tabla = df_resultado.iloc[en_pagina][[c for c in COLUMNAS_VISIBLES if c in df_resultado.columns]]
+    # Añadimos columna de selección (y de choques) solo a la página
+    tabla.insert(0, "Seleccionar", False)
+    if choca_con is not None:
+        tabla.insert(1, "Choque", [
+            "✅ En tu horario" if ya_agregada[i] else ("⛔ " + choca_con[i] if choca_con[i] else "")
+            for i in en_pagina
+        ])
 
     # Tabla editable (ocupa todo el ancho disponible)
-    df_editado = st.data_editor(
-        df_resultado[cols_final],
-        hide_index=True,
-        width="stretch",  # <--- PONER ESTA NUEVA LÍNEA
-        key="editor_resultados"
-    )
+    with metricas.fase("render_resultados"):
+        df_editado = st.data_editor(
+            tabla,
+            hide_index=True,
+            width="stretch",  # <--- PONER ESTA NUEVA LÍNEA
+            key=f"editor_resultados_{pagina}"
+        )
+    metricas.contar("filas_mostradas", len(tabla))
     # Botón de agregar
     if st.button("➕ Agregar seleccionadas a Mi Horario", type="primary"):
         materias_a_agregar = df_editado[df_editado["Seleccionar"] == True]
         
         if not materias_a_agregar.empty:
             count_nuevas = 0
-            for index, row in materias_a_agregar.iterrows():
-                id_unico = f"{row['Materia']}-{row['Grupo']}"
+            for index in materias_a_agregar.index:
+                # La fila completa (con máscaras) está en df_resultado; el editor solo trae lo visible
+                materia = sesion.materia_para_horario(df_resultado.loc[index])
                 
                 # Verificar duplicados
-                existe = any(m['id'] == id_unico for m in st.session_state.mi_horario)
+                existe = any(m['id'] == materia['id'] for m in st.session_state.mi_horario)
                 
                 if not existe:
-                    st.session_state.mi_horario.append({
-                        "id": id_unico,
-                        "Materia": row["Materia"],
-                        "Grupo": row["Grupo"],
-                        "Horario": row.get("Horario", ""),
-                        "Profesor": row.get("Profesor", "")
-                    })
+                    st.session_state.mi_horario.append(materia)
                     count_nuevas += 1
             
             if count_nuevas > 0:
@@ -594,48 +519,77 @@ if len(st.session_state.mi_horario) > 0:
                 st.session_state.mi_horario.pop(i)
                 st.rerun()
 
-    # 2. Generar Grid Visual y Colores
-    grid_texto, grid_colores, conflictos = crear_grid_horario(st.session_state.mi_horario)
+    # 2. Generar Grid Visual y Colores (memoizado: si mi_horario no cambió no se recalcula)
+    vista = vista_semanal(st.session_state.mi_horario)
     
-    if conflictos:
-        for conf in set(conflictos): 
-            st.error(f"⛔ {conf}")
+    if vista.conflictos:
+        for conf in vista.conflictos:
+            st.error(f"⛔ {describir(conf)}")
     
-    # --- FUNCIÓN DE ESTILO MEJORADA ---
-    def aplicar_estilos(df_val):
-        """
-        Aplica estilos CSS a todo el dataframe basado en grid_colores
-        """
-        # df_val es el dataframe de textos. No lo usamos, usamos grid_colores por índice
-        df_styles = pd.DataFrame('', index=df_val.index, columns=df_val.columns)
-        
-        for col in df_val.columns:
-            for idx in df_val.index:
-                color_bg = grid_colores.at[idx, col]
-                
-                if color_bg:
-                    # Estilo Base: Fondo de color + Texto Negro
-                    estilo = f'background-color: {color_bg}; color: #000000;'
-                    
-                    # Truco visual: Bordes
-                    # Si hay texto en esta celda, es el inicio del bloque -> Borde superior blanco
-                    if df_val.at[idx, col] != "":
-                        estilo += 'border-top: 2px solid white; vertical-align: top; font-weight: bold; font-size: 12px;'
-                    else:
-                        # Si no hay texto, es continuación -> Sin bordes internos para que parezca unido
-                        estilo += 'border-top: none; color: transparent;' 
-                    
-                    df_styles.at[idx, col] = estilo
-                    
-        return df_styles
-
     # Mostrar la tabla
     st.markdown("### Vista Semanal")
-    st.dataframe(
-        grid_texto.style.apply(aplicar_estilos, axis=None),
-        width="stretch",
-        height=700 
-    )
+    # Aquí Streamlit convierte el Styler (CSS por celda): es la fase "render_horario"
+    with metricas.fase("render_horario"):
+        st.dataframe(
+            vista.texto.style.apply(lambda _: vista.estilos, axis=None),
+            width="stretch",
+            height=700 
+        )
     
 else:
-    st.caption("Tu horario está vacío. Busca materias arriba y agrégalas con el botón ➕.")
\ No newline at end of file
+    st.caption("Tu horario está vacío. Busca materias arriba y agrégalas con el botón ➕.")
+
+# El horario viaja en la URL: recargar o compartir el enlace lo restaura
+codigo_horario = enlace.codificar(st.session_state.mi_horario) if st.session_state.mi_horario else None
+if codigo_horario != st.session_state.codigo_horario:
+    st.session_state.codigo_horario = codigo_horario
+    if codigo_horario:
+        st.query_params["h"] = codigo_horario
+    else:
+        st.query_params.pop("h", None)
+if codigo_horario:
+    st.caption("🔗 Tu horario va en la URL de esta página: guárdala o compártela para abrirlo tal cual.")
+
+# ---------------------------------------------------------
+# MEMORIA DE LA SESIÓN (para planear capacidad)
+# ---------------------------------------------------------
+with st.sidebar:
+    with st.expander("🧠 Memoria de la sesión"):
+        medidas = sesion.memoria_sesion(st.session_state.to_dict(), cache.cache_compartida().identificadores())
+        total_sesion = sum(medidas.values())
+        ctx = get_script_run_ctx()
+        sesion.reportar(ctx.session_id if ctx else "local", total_sesion)
+        st.caption(f"Esta sesión: {total_sesion / 1024:.1f} KB (sin contar datos compartidos)")
+        st.json({nombre: f"{b / 1024:.1f} KB" for nombre, b in list(medidas.items())[:8]})
+        st.caption("Todas las sesiones del proceso:")
+        st.json(sesion.resumen_sesiones())
+
+# ---------------------------------------------------------
+# RENDIMIENTO (opcional: HORARIOS_METRICAS=1 o ?debug=1 en la URL)
+# ---------------------------------------------------------
+if metricas.activas() or st.query_params.get("debug") == "1":
+    # Ver es libre; prender/apagar y reiniciar afectan a todo el proceso
+    controlar = metricas.puede_controlar(st.query_params.get("token"))
+    with st.sidebar:
+        with st.expander("⏱️ Rendimiento"):
+            if controlar:
+                medir = st.toggle("Medir fases (todo el proceso)", value=metricas.activas())
+                if medir != metricas.activas():
+                    metricas.activar(medir)
+                    st.rerun()
+            else:
+                st.caption("Midiendo fases" if metricas.activas() else "Métricas apagadas")
+            st.checkbox("Perfilar mis búsquedas (cProfile)", key="perfilar")
+            datos = metricas.como_json()
+            if datos["histogramas"]:
+                st.dataframe(pd.DataFrame.from_dict(datos["histogramas"], orient="index"), width="stretch")
+            st.json({"contadores": datos["contadores"], **datos["colectores"]}, expanded=False)
+            col1, col2, col3 = st.columns(3)
+            col1.download_button("JSON", json.dumps(datos, ensure_ascii=False, indent=1), "metricas.json", "application/json")
+            col2.download_button("Prometheus", metricas.como_prometheus(), "metricas.prom", "text/plain")
+            if controlar and col3.button("Reiniciar"):
+                metricas.reiniciar()
+                st.rerun()
+            if st.session_state.get("ultimo_perfil"):
+                st.caption("Perfil de la última búsqueda:")
+                st.code(st.session_state.ultimo_perfil, language=None)
@@ -0,0 +1,9 @@
+"""
+Benchmarks del parser y del grid del horario.
+
+    python -m bench.grabar                 # graba páginas reales en bench/fixtures/
+    python -m bench                        # corre todo y compara con bench/baseline.json
+    python -m bench --guardar-baseline     # actualiza la línea base
+    python -m bench.servidor               # servidor de escolares simulado (HORARIOS_URL_BASE)
+    python -m bench.carga --sesiones 20    # prueba de carga contra el servidor simulado
+"""
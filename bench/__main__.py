@@ -0,0 +1,353 @@
+"""
+Corre los benchmarks sin red: fixtures grabadas (si existen) + entradas
+sintéticas que escalan (10k filas, horarios de 50+ materias).
+
+Por etapa reporta p50/p99, throughput y memoria pico, y compara contra
+bench/baseline.json para que las regresiones se vean en la revisión.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bench import sinteticos
+from bench.grabar import DIRECTORIO as DIRECTORIO_FIXTURES
+from horarios.catalogos import extraer_catalogos
+from horarios.enlace import codificar, decodificar
+from horarios.conflictos import choques_con_horario, detectar_conflictos
+from horarios.generador import generar_horarios
+from horarios.oferta import compactar, comparar as comparar_compacta, unir
+from horarios.ingesta import parsear_en_paralelo, procesos_disponibles
+from horarios.grid import _vista_por_huella, aplicar_estilos, crear_grid_horario, vista_semanal
+from horarios.horario import interpretar_slots
+from horarios.indice import IndiceBusqueda
+from horarios.ocupacion import Ocupacion
+from horarios.parser import extraer_profesores, parsear_html_bs4, parsear_html_generico
+
+RUTA_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+# ==========================================
+# MEDICIÓN
+# ==========================================
+
+def _percentil(ordenados, p):
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def medir(funcion, repeticiones, unidades=1):
+    """
+    Corre `funcion` una vez para calentar, `repeticiones` veces cronometrada
+    y una vez más con tracemalloc para la memoria pico.
+    `unidades` = elementos procesados por llamada (filas, textos...).
+    """
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+    tiempos.sort()
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50 = _percentil(tiempos, 50)
+    return {
+        "repeticiones": repeticiones,
+        "unidades": unidades,
+        "p50_ms": round(p50 * 1000, 3),
+        "p99_ms": round(_percentil(tiempos, 99) * 1000, 3),
+        "por_segundo": round(unidades / p50, 1) if p50 else 0.0,
+        "pico_kb": round(pico / 1024, 1),
+    }
+
+
+# ==========================================
+# ETAPAS
+# ==========================================
+
+def _fixtures():
+    """[(nombre, html, tipo_parseo)] de bench/fixtures según su manifest."""
+    ruta = os.path.join(DIRECTORIO_FIXTURES, "manifest.json")
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        manifest = json.load(f)
+    fixtures = []
+    for nombre, tipo in sorted(manifest.items()):
+        with open(os.path.join(DIRECTORIO_FIXTURES, nombre), encoding="utf-8") as f:
+            fixtures.append((nombre, f.read(), tipo))
+    return fixtures
+
+
+# Módulos cuyo arranque en frío importa para workers y CLI ("python" = intérprete solo)
+MODULOS_ARRANQUE = ["python", "horarios.horario", "horarios.generador", "horarios.busqueda", "horarios.parser"]
+
+
+def _arranque(modulo):
+    """Proceso nuevo que solo importa `modulo`; regresa la lista de módulos pesados cargados."""
+    codigo = "import sys" if modulo == "python" else f"import sys, {modulo}"
+    codigo += "; print(','.join(m for m in ('pandas', 'numpy', 'lxml', 'bs4', 'requests', 'streamlit') if m in sys.modules))"
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return salida.stdout.strip()
+
+
+# Entradas compartidas entre etapas. Se arman la primera vez que una etapa
+# elegida las pide: con --solo no se paga la preparación de las demás.
+
+@functools.lru_cache(maxsize=None)
+def _pagina(n, seed):
+    return sinteticos.pagina_taller(n, seed=seed)
+
+
+@functools.lru_cache(maxsize=None)
+def _plana_10k():
+    return parsear_html_generico(_pagina(10_000, 7))
+
+
+@functools.lru_cache(maxsize=None)
+def _compacta_10k():
+    return compactar(_plana_10k())
+
+
+@functools.lru_cache(maxsize=None)
+def _textos_10k():
+    return list(_plana_10k()["Horario"])
+
+
+@functools.lru_cache(maxsize=None)
+def _mi_horario():
+    return sinteticos.materias(10, seed=10)
+
+
+@functools.lru_cache(maxsize=None)
+def _ocupacion_10k():
+    return Ocupacion(_compacta_10k())
+
+
+@functools.lru_cache(maxsize=None)
+def _paginas_ingesta():
+    """(páginas grabadas o 32 sintéticas, filas totales)."""
+    paginas = [(html, tipo) for _, html, tipo in _fixtures() if tipo != "INDEX"] or \
+        [(_pagina(1_000, s), "ESTANDAR") for s in range(32)]
+    return paginas, sum(len(l.filas) for l in parsear_en_paralelo(paginas, procesos=1))
+
+
+def etapas(repeticiones):
+    """
+    Genera (nombre_etapa, preparar). preparar() arma las entradas de la etapa
+    y regresa (funcion, unidades, repeticiones, extra); solo se llama para
+    las etapas que se van a correr.
+    """
+    pocas = max(3, repeticiones // 4)
+
+    for modulo in MODULOS_ARRANQUE:
+        yield f"arranque:{modulo}", lambda m=modulo: (lambda: _arranque(m), 1, pocas, {"pesados": _arranque(m)})
+
+    fixtures = _fixtures()
+    for nombre, html, tipo in fixtures:
+        if tipo == "INDEX":
+            yield f"catalogo:{nombre}", lambda h=html: (lambda: extraer_profesores(h), 1, repeticiones, {})
+            yield f"catalogos:{nombre}", lambda h=html: (
+                lambda: extraer_catalogos(h), 1, repeticiones,
+                {"catalogos": {k: len(v) for k, v in extraer_catalogos(h).items()}})
+            continue
+        def parse(h=html, t=tipo):
+            filas = len(parsear_html_generico(h, t))
+            iguales = parsear_html_generico(h, t).equals(parsear_html_bs4(h, t))
+            return lambda: parsear_html_generico(h, t), max(filas, 1), repeticiones, {"paridad_bs4": iguales}
+        yield f"parse:{nombre}", parse
+
+    for n in (1_000, 10_000):
+        yield f"parse:sintetico_{n}", lambda n=n: (
+            lambda h=_pagina(n, n): parsear_html_generico(h), n, repeticiones, {})
+    yield "parse_bs4:sintetico_1000", lambda: (
+        lambda h=_pagina(1_000, 1_000): parsear_html_bs4(h), 1_000, pocas, {})
+
+    # Ingesta masiva: las páginas grabadas (o 32 sintéticas) con 1, 2, 4... procesos
+    n_paginas = sum(1 for _, _, tipo in fixtures if tipo != "INDEX") or 32
+    def ingesta(procesos):
+        paginas, filas_totales = _paginas_ingesta()
+        return lambda: parsear_en_paralelo(paginas, procesos=procesos), filas_totales, pocas, {}
+    for procesos in sorted({1, 2, 4, procesos_disponibles()}):
+        yield f"ingesta:{n_paginas}_paginas:p{procesos}", lambda p=procesos: ingesta(p)
+
+    def interpretar(funcion):
+        textos = _textos_10k()
+        def interpretar_todos():
+            for texto in textos:
+                funcion(texto)
+        return interpretar_todos, len(textos), repeticiones, {}
+    yield "interpretar_slots:10000", lambda: interpretar(interpretar_slots.__wrapped__)
+    yield "interpretar_slots_memo:10000", lambda: interpretar(interpretar_slots)
+
+    for n in (10, 50, 100):
+        yield f"crear_grid_horario:{n}", lambda n=n: (
+            lambda l=sinteticos.materias(n, seed=n): crear_grid_horario(l), n, repeticiones, {})
+        yield f"detectar_conflictos:{n}", lambda n=n: (
+            lambda l=sinteticos.materias(n, seed=n): detectar_conflictos(l), n, repeticiones, {})
+
+    yield "choques_resultados:10000", lambda: (
+        lambda t=_textos_10k(), m=_mi_horario(): choques_con_horario(t, m), 10_000, repeticiones, {})
+
+    # Tabla compacta: costo de compactar y choques leyendo las máscaras ya calculadas
+    yield "compactar:10000", lambda: (
+        lambda p=_plana_10k(): compactar(p), 10_000, repeticiones, comparar_compacta(_plana_10k(), 3))
+    yield "choques_compacta:10000", lambda: (
+        lambda c=_compacta_10k(), m=_mi_horario(): choques_con_horario(c, m), 10_000, repeticiones, {})
+
+    # Ocupación del ciclo: tensor (oferta x día x slot) y preguntas sobre todos los grupos
+    def libres():
+        ocupacion = _ocupacion_10k()
+        agrupacion = ocupacion.seleccion(agrupacion=str(_compacta_10k()["Agrupación"].iloc[0]))
+        return lambda: ocupacion.ventanas_libres(agrupacion), 10_000, repeticiones, {}
+    def choques_profesor():
+        ocupacion = _ocupacion_10k()
+        profesor = ocupacion.carga_profesores()["Profesor"].iloc[0]
+        return lambda: ocupacion.choques_profesor(profesor), 1, repeticiones, {}
+    yield "ocupacion_tensor:10000", lambda: (
+        lambda c=_compacta_10k(): Ocupacion(c), 10_000, pocas,
+        {"mb": round(_ocupacion_10k().tensor.nbytes / 2**20, 1)})
+    yield "ocupacion_libres:10000", libres
+    yield "ocupacion_profesores:10000", lambda: (_ocupacion_10k().carga_profesores, 10_000, repeticiones, {})
+    yield "ocupacion_choques_profesor:10000", choques_profesor
+    yield "ocupacion_turnos:10000", lambda: (_ocupacion_10k().turnos_por_agrupacion, 10_000, repeticiones, {})
+    yield "ocupacion_caben:10000", lambda: (
+        lambda o=_ocupacion_10k(), c=_compacta_10k()["Clave"].iloc[0], m=_mi_horario(): o.caben(c, m),
+        10_000, repeticiones, {})
+
+    # Búsqueda múltiple: 6 respuestas de 1000 filas unidas sin repetidos por (Clave, Grupo)
+    def unir_partes():
+        partes = [compactar(parsear_html_generico(_pagina(1_000, s % 4))) for s in range(6)]
+        return lambda: unir(partes), sum(len(p) for p in partes), repeticiones, {"filas": len(unir(partes))}
+    yield "unir:6x1000", unir_partes
+
+    def generar(claves, grupos):
+        ofertas = sinteticos.ofertas(claves, grupos, seed=claves)
+        lista_claves = sorted({o["Clave"] for o in ofertas})
+        resultado = generar_horarios(ofertas, lista_claves, presupuesto_s=0.5)
+        return lambda: generar_horarios(ofertas, lista_claves, presupuesto_s=0.5), 1, pocas, \
+            {"nodos": resultado.nodos, "completo": resultado.completo}
+    for claves, grupos in ((4, 20), (8, 40)):
+        yield f"generar_horarios:{claves}x{grupos}", lambda c=claves, g=grupos: generar(c, g)
+
+    def estilos(n):
+        grid_texto, grid_colores, _ = crear_grid_horario(sinteticos.materias(n, seed=n))
+        return lambda: grid_texto.style.apply(aplicar_estilos, grid_colores=grid_colores, axis=None).to_html(), \
+            grid_texto.size, repeticiones, {}
+    for n in (10, 50):
+        yield f"estilos:{n}", lambda n=n: estilos(n)
+
+    # Typeahead: construir el índice una vez y consultas típicas (prefijos, sin acentos, con errores)
+    consultas = ["garcia", "gonzalez ma", "munoz jose", "hernadez ana", "perez lopez sofia", "alvarez", "nunez ines"]
+    def typeahead():
+        indice = IndiceBusqueda(sinteticos.profesores(5_000, seed=5).items())
+        def buscar_todas():
+            for consulta in consultas:
+                indice.buscar(consulta, limite=25)
+        return buscar_todas, len(consultas), repeticiones, {"ejemplo": indice.buscar("hernadez ana", limite=1)[0][0]}
+    yield "typeahead_indice:5000", lambda: (
+        lambda c=sinteticos.profesores(5_000, seed=5): IndiceBusqueda(c.items()), 5_000, pocas, {})
+    yield "typeahead:5000", typeahead
+
+    # Horario en la URL: ciclo + (Clave, Grupo) de 8 materias
+    def horario_8():
+        return [{**m, "Clave": str(1100 + i)} for i, m in enumerate(sinteticos.materias(8, seed=8))]
+    yield "enlace_codificar:8", lambda: (
+        lambda h=horario_8(): codificar(h), 8, repeticiones, {"caracteres": len(codificar(horario_8()))})
+    yield "enlace_decodificar:8", lambda: (lambda c=codificar(horario_8()): decodificar(c), 8, repeticiones, {})
+
+    def vista(fria):
+        lista_50 = sinteticos.materias(50, seed=50)
+        def vista_fria():
+            _vista_por_huella.cache_clear()
+            return vista_semanal(lista_50)
+        return (vista_fria if fria else lambda: vista_semanal(lista_50)), 1, repeticiones, {}
+    yield "vista_semanal_fria:50", lambda: vista(True)
+    yield "vista_semanal_memo:50", lambda: vista(False)
+
+
+# ==========================================
+# LÍNEA BASE
+# ==========================================
+
+def comparar(resultados, baseline, tolerancia):
+    """Marca cada etapa cuyo p50 empeoró más de `tolerancia` (0.25 = 25%)."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        base = baseline.get("etapas", {}).get(nombre)
+        if not base or not base["p50_ms"]:
+            continue
+        actual["vs_baseline"] = round(actual["p50_ms"] / base["p50_ms"], 2)
+        if actual["vs_baseline"] > 1 + tolerancia:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks de parser y grid (sin red).")
+    ap.add_argument("--repeticiones", type=int, default=20)
+    ap.add_argument("--solo", default="", help="Correr solo etapas que contengan este texto")
+    ap.add_argument("--guardar-baseline", action="store_true")
+    ap.add_argument("--tolerancia", type=float, default=0.25)
+    ap.add_argument("--estricto", action="store_true", help="Salir con error si hay regresiones")
+    ap.add_argument("--json", help="Escribir resultados completos en este archivo")
+    args = ap.parse_args(argv)
+
+    resultados = {}
+    for nombre, preparar in etapas(args.repeticiones):
+        if args.solo not in nombre:
+            continue
+        funcion, unidades, repeticiones, extra = preparar()
+        resultados[nombre] = {**medir(funcion, repeticiones, unidades), **extra}
+
+    baseline = {}
+    if os.path.exists(RUTA_BASELINE):
+        with open(RUTA_BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regresiones = comparar(resultados, baseline, args.tolerancia)
+
+    print(f"{'etapa':40} {'p50 ms':>10} {'p99 ms':>10} {'por seg':>12} {'pico KB':>10} {'vs base':>8}")
+    for nombre, r in resultados.items():
+        marca = " <-- REGRESIÓN" if nombre in regresiones else ""
+        if r.get("paridad_bs4") is False:
+            marca += " <-- DIFIERE DE BS4"
+        print(f"{nombre:40} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['por_segundo']:>12.0f} "
+              f"{r['pico_kb']:>10.0f} {r.get('vs_baseline', ''):>8}{marca}")
+
+    documento = {
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "etapas": resultados,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=1, ensure_ascii=False)
+    if args.guardar_baseline:
+        if args.solo and baseline:
+            # Actualizar solo las etapas medidas
+            baseline.setdefault("etapas", {}).update(resultados)
+            documento["etapas"] = baseline["etapas"]
+        for r in documento["etapas"].values():
+            r.pop("vs_baseline", None)
+        with open(RUTA_BASELINE, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=1, ensure_ascii=False, sort_keys=True)
+        print(f"Línea base guardada en {RUTA_BASELINE}")
+
+    if regresiones:
+        print(f"{len(regresiones)} etapa(s) más lentas que la línea base (tolerancia {args.tolerancia:.0%})")
+    return 1 if regresiones and args.estricto else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
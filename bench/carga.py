@@ -0,0 +1,223 @@
+"""
+Prueba de carga: N sesiones simultáneas haciendo lo mismo que la app en
+cada rerun (buscar -> ver resultados con choques -> agregar -> ver el
+horario), contra el servidor simulado de bench/servidor.py.
+
+    python -m bench.carga --sesiones 20 --flujos 10 --latencia 150 --errores 0.02
+    python -m bench.carga --url http://127.0.0.1:8086/plan17   # servidor ya corriendo
+
+Streamlit no deja correr varios AppTest a la vez en un proceso, así que
+cada sesión llama a las mismas funciones de horarios/ que llama app.py y
+guarda en su "session_state" solo lo que guarda la app (mi_horario y
+consulta_actual).
+
+Reporta throughput, p50/p95/p99 por paso, peticiones que llegaron al
+servidor por endpoint, aciertos de la caché y memoria (proceso y sesiones).
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.request import urlopen
+
+PASOS = ["buscar", "resultados", "agregar", "horario"]
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Sesion:
+    """Una pestaña de la app: su mi_horario y la última consulta."""
+
+    def __init__(self, numero, seed):
+        self.id = f"carga-{numero}"
+        self.azar = random.Random(seed)
+        self.estado = {"mi_horario": [], "consulta_actual": None}
+
+    def _consultas(self):
+        """Lo que elegiría un alumno en alguno de los modos de búsqueda."""
+        from horarios.catalogos import catalogos
+        from horarios.config import CICLO_ACTUAL
+        from horarios.indice import huella, indice_del_ciclo
+
+        cats = catalogos()
+        modo = self.azar.choices(["taller", "optativas", "asignatura", "profesor"], weights=[5, 2, 2, 1])[0]
+        if modo == "taller":
+            talleres = self.azar.sample(list(cats["TALLERES"].values()), self.azar.randint(1, 3))
+            semestre = self.azar.randint(1, 10)
+            return [{"endpoint": "taller.php", "payload_extra": {"tal": t, "talsem": semestre}, "tipo_parseo": "ESTANDAR"}
+                    for t in talleres]
+        if modo == "optativas":
+            lips = self.azar.sample(list(cats["LIPS"].values()), 2)
+            return [{"endpoint": "LipHorarios.php", "payload_extra": {"tal": 19, "talsem": v}, "tipo_parseo": "ESTANDAR"}
+                    for v in lips]
+        if modo == "profesor" and cats["PROFESORES"]:
+            # Typeahead: las primeras letras de un nombre cualquiera
+            nombre = self.azar.choice(list(cats["PROFESORES"]))
+            indice = indice_del_ciclo("profesores", CICLO_ACTUAL, cats["PROFESORES"].items, version=huella(cats["PROFESORES"]))
+            _, valor = (indice.buscar(nombre[:6], limite=25) or [(nombre, cats["PROFESORES"][nombre])])[0]
+            return [{"endpoint": "profe.php", "payload_extra": {"idprof": valor}, "tipo_parseo": "PROFESOR"}]
+        clave = self.azar.choice(list(cats["ASIGNATURAS"].values()))
+        return [{"endpoint": "asignatura.php", "payload_extra": {"asig": clave}, "tipo_parseo": "ASIGNATURA_CONTEXTO"}]
+
+    def flujo(self, tiempos):
+        """Un ciclo buscar -> resultados -> agregar -> horario; anota segundos por paso."""
+        from horarios import busqueda, sesion
+        from horarios.conflictos import choques_con_horario
+        from horarios.grid import vista_semanal
+
+        t0 = time.perf_counter()
+        consultas = self._consultas()
+        df = busqueda.buscar_combinado(consultas)
+        self.estado["consulta_actual"] = consultas
+        t1 = time.perf_counter()
+
+        # Rerun con resultados: choques contra Mi Horario + la página visible
+        choca = choques_con_horario(df, self.estado["mi_horario"]) if self.estado["mi_horario"] and len(df) else None
+        inicio, fin = sesion.rango_pagina(1, len(df))
+        df.iloc[inicio:fin].to_dict("records")
+        t2 = time.perf_counter()
+
+        # Agregar un grupo que no choque (como marcar la casilla + botón)
+        libres = [i for i in range(len(df)) if choca is None or choca[i] == ""]
+        if libres:
+            materia = sesion.materia_para_horario(df.iloc[self.azar.choice(libres)])
+            if all(m["id"] != materia["id"] for m in self.estado["mi_horario"]):
+                self.estado["mi_horario"].append(materia)
+        t3 = time.perf_counter()
+
+        vista_semanal(self.estado["mi_horario"])
+        t4 = time.perf_counter()
+
+        for paso, segundos in zip(PASOS, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            tiempos[paso].append(segundos)
+        tiempos["flujo"].append(t4 - t0)
+
+
+def correr(sesiones, flujos, pausa_s, seed=0):
+    """Corre las sesiones en hilos; regresa (tiempos por paso, errores, segundos totales, sesiones)."""
+    from horarios import cache, sesion as sesion_mod
+
+    tiempos = defaultdict(list)
+    errores = []
+    lock = threading.Lock()
+    todas = [Sesion(i, seed + i) for i in range(sesiones)]
+
+    def trabajar(s):
+        propios = defaultdict(list)
+        for _ in range(flujos):
+            try:
+                s.flujo(propios)
+            except Exception as e:
+                with lock:
+                    errores.append(f"{s.id}: {e}")
+            if pausa_s:
+                time.sleep(s.azar.uniform(0, 2 * pausa_s))
+        compartidos = cache.cache_compartida().identificadores()
+        sesion_mod.reportar(s.id, sum(sesion_mod.memoria_sesion(s.estado, compartidos).values()))
+        with lock:
+            for paso, valores in propios.items():
+                tiempos[paso].extend(valores)
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajar, args=(s,), name=s.id) for s in todas]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return tiempos, errores, time.perf_counter() - inicio
+
+
+def reporte(tiempos, errores, segundos, peticiones):
+    from horarios import cache, conexion, sesion
+
+    pasos = {}
+    for paso in PASOS + ["flujo"]:
+        ordenados = sorted(tiempos.get(paso, []))
+        pasos[paso] = {f"p{p}_ms": round(_percentil(ordenados, p) * 1000, 2) for p in (50, 95, 99)}
+    n_flujos = len(tiempos.get("flujo", []))
+    return {
+        "flujos": n_flujos,
+        "errores": len(errores),
+        "segundos": round(segundos, 2),
+        "flujos_por_seg": round(n_flujos / segundos, 2) if segundos else 0.0,
+        "pasos": pasos,
+        "peticiones_al_servidor": peticiones,
+        "cache": cache.cache_compartida().estadisticas(),
+        "latencias_origen": conexion.resumen_latencias(),
+        "sesiones": sesion.resumen_sesiones(),
+        # ru_maxrss viene en KB en Linux
+        "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prueba de carga contra el servidor simulado.")
+    ap.add_argument("--sesiones", type=int, default=10)
+    ap.add_argument("--flujos", type=int, default=5, help="flujos buscar-agregar-ver por sesión")
+    ap.add_argument("--pausa", type=float, default=0.2, help="segundos promedio entre flujos (tiempo de lectura)")
+    ap.add_argument("--url", help="servidor ya corriendo; si no, se arranca uno aquí")
+    ap.add_argument("--latencia", type=float, default=100.0, help="ms (solo servidor interno)")
+    ap.add_argument("--variacion", type=float, default=30.0)
+    ap.add_argument("--errores", type=float, default=0.0)
+    ap.add_argument("--lentos", type=float, default=0.0)
+    ap.add_argument("--filas", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="escribir el reporte completo en este archivo")
+    args = ap.parse_args(argv)
+
+    servidor = None
+    if args.url:
+        url = args.url
+    else:
+        from bench.servidor import Escenario, Paginas, iniciar_en_hilo
+        escenario = Escenario(args.latencia, args.variacion, args.errores, args.lentos, seed=args.seed)
+        servidor, url = iniciar_en_hilo(escenario=escenario, paginas=Paginas(filas=args.filas))
+
+    # La configuración se lee al importar horarios/: va antes del primer import.
+    # Snapshots en un directorio vacío para que todo pase por caché -> servidor.
+    os.environ["HORARIOS_URL_BASE"] = url
+    os.environ["HORARIOS_SNAPSHOTS"] = tempfile.mkdtemp(prefix="carga_")
+    os.environ.pop("HORARIOS_CACHE_DIR", None)
+    if "horarios.config" in sys.modules:
+        raise SystemExit("horarios ya estaba importado; correr como python -m bench.carga")
+
+    tiempos, errores, segundos = correr(args.sesiones, args.flujos, args.pausa, args.seed)
+    if servidor is not None:
+        peticiones = dict(servidor.conteo)
+        servidor.shutdown()
+    else:
+        with urlopen(url.rsplit("/", 1)[0] + "/__stats") as r:
+            peticiones = json.load(r)
+
+    resultado = reporte(tiempos, errores, segundos, peticiones)
+    print(f"{resultado['flujos']} flujos de {args.sesiones} sesiones en {resultado['segundos']}s "
+          f"({resultado['flujos_por_seg']} flujos/s), {resultado['errores']} con error")
+    print(f"{'paso':12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for paso, p in resultado["pasos"].items():
+        print(f"{paso:12} {p['p50_ms']:>10} {p['p95_ms']:>10} {p['p99_ms']:>10}")
+    print(f"Peticiones al servidor: {peticiones}")
+    c = resultado["cache"]
+    print(f"Caché: {c['aciertos']} aciertos, {c['fallos']} fallos, {c['fusionadas']} fusionadas "
+          f"(tasa {c['tasa_aciertos']})")
+    s = resultado["sesiones"]
+    print(f"Memoria: {resultado['rss_max_mb']} MB proceso; sesiones {s['kb_promedio']} KB promedio, {s['kb_max']} KB máx.")
+    for error in errores[:5]:
+        print(f"  error: {error}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=1, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
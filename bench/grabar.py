@@ -0,0 +1,60 @@
+"""
+Graba páginas reales del sitio como fixtures para los benchmarks:
+cada taller en semestre 0, las páginas de LIP, genero.php, index.php y
+algunos profesores. Se guardan en bench/fixtures/ con un manifest.json
+que dice con qué modo se parsea cada una y un peticiones.json con la
+petición que produjo cada página (lo usa bench/servidor.py para repetirlas).
+
+    python -m bench.grabar --profesores 10
+"""
+import argparse
+import json
+import os
+
+from horarios.config import CATALOGOS
+from horarios.parser import extraer_profesores
+from horarios.sitio import descargar_html, descargar_index
+
+DIRECTORIO = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--profesores", type=int, default=10, help="Cuántos profesores grabar")
+    ap.add_argument("--salida", default=DIRECTORIO)
+    args = ap.parse_args(argv)
+    os.makedirs(args.salida, exist_ok=True)
+
+    manifest = {}
+    peticiones = {}
+
+    def grabar(nombre, tipo, endpoint, payload=None):
+        html = descargar_index() if endpoint == "index.php" else descargar_html(endpoint, payload)
+        with open(os.path.join(args.salida, nombre), "w", encoding="utf-8") as f:
+            f.write(html)
+        manifest[nombre] = tipo
+        peticiones[nombre] = {"endpoint": endpoint, "payload": payload or {}}
+        print(f"{nombre}: {len(html) // 1024} KB")
+        return html
+
+    index = grabar("index.html", "INDEX", "index.php")
+
+    for nombre, id_taller in CATALOGOS["TALLERES"].items():
+        grabar(f"taller_{id_taller}_sem0.html", "ESTANDAR", "taller.php", {"tal": id_taller, "talsem": 0})
+    for nombre, id_lip in CATALOGOS["LIPS"].items():
+        grabar(f"lip_{id_lip}.html", "ESTANDAR", "LipHorarios.php", {"tal": 19, "talsem": id_lip})
+    grabar("genero.html", "GENERO", "genero.php", {"tal": 18, "talsem": 20})
+    for clave in CATALOGOS["ASIGNATURAS_COMUNES"].values():
+        grabar(f"asignatura_{clave}.html", "ASIGNATURA_CONTEXTO", "asignatura.php", {"asig": clave})
+
+    profesores = list(extraer_profesores(index).values())[: args.profesores]
+    for i, idprof in enumerate(profesores):
+        grabar(f"profe_{i}.html", "PROFESOR", "profe.php", {"idprof": idprof})
+
+    for archivo, datos in (("manifest.json", manifest), ("peticiones.json", peticiones)):
+        with open(os.path.join(args.salida, archivo), "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
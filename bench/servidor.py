@@ -0,0 +1,202 @@
+"""
+Servidor local que se hace pasar por el de escolares, para pruebas de carga.
+
+Repite las páginas grabadas con `python -m bench.grabar` (bench/fixtures/
++ peticiones.json) y, para lo que no se grabó, genera páginas sintéticas
+deterministas (misma petición -> misma página). Se le puede poner latencia,
+fallas y ratos lentos:
+
+    python -m bench.servidor --puerto 8086 --latencia 150 --errores 0.02 --lentos 0.05
+    HORARIOS_URL_BASE=http://127.0.0.1:8086/plan17 streamlit run app.py
+
+Acepta cualquier prefijo de ruta: responde según el último componente
+(taller.php, LipHorarios.php, asignatura.php, genero.php, profe.php,
+index.php). index.php manda ETag y contesta 304 a If-None-Match.
+GET /__stats regresa cuántas peticiones recibió por endpoint (JSON).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from bench import sinteticos
+
+# Igual que bench/grabar.py (no se importa de ahí: cargaría horarios.config antes de tiempo)
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+ENDPOINTS = {"taller.php", "LipHorarios.php", "asignatura.php", "genero.php", "profe.php", "index.php"}
+# Parámetros que manda la app en todas las consultas y no distinguen una página de otra
+PARAMETROS_COMUNES = {"estu", "qsemac"}
+
+
+def _llave(endpoint, payload):
+    return json.dumps([endpoint, {str(k): str(v) for k, v in payload.items() if k not in PARAMETROS_COMUNES}],
+                      sort_keys=True)
+
+
+class Escenario:
+    """Latencia y fallas a simular (se puede cambiar con el servidor corriendo)."""
+
+    def __init__(self, latencia_ms=0.0, variacion_ms=0.0, errores=0.0, lentos=0.0, factor_lento=10.0, seed=0):
+        self.latencia_ms = latencia_ms
+        self.variacion_ms = variacion_ms
+        self.errores = errores          # fracción de respuestas 503
+        self.lentos = lentos            # fracción de respuestas `factor_lento` veces más lentas
+        self.factor_lento = factor_lento
+        self._azar = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sortear(self):
+        """(segundos de espera, responder con error)"""
+        with self._lock:
+            espera = max(0.0, self._azar.gauss(self.latencia_ms, self.variacion_ms)) / 1000
+            if self._azar.random() < self.lentos:
+                espera *= self.factor_lento
+            return espera, self._azar.random() < self.errores
+
+
+class Paginas:
+    """Página grabada para la petición o, si no hay, una sintética estable."""
+
+    def __init__(self, directorio=DIRECTORIO_FIXTURES, filas=300, profesores=500):
+        self.filas = filas
+        self.profesores = profesores
+        self.grabadas = {}
+        ruta = os.path.join(directorio, "peticiones.json")
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                for nombre, peticion in json.load(f).items():
+                    with open(os.path.join(directorio, nombre), encoding="utf-8") as g:
+                        self.grabadas[_llave(peticion["endpoint"], peticion["payload"])] = g.read().encode("utf-8")
+        self._sinteticas = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, endpoint, payload):
+        llave = _llave(endpoint, payload)
+        pagina = self.grabadas.get(llave) or self._sinteticas.get(llave)
+        if pagina is None:
+            pagina = self._sintetica(endpoint, payload, llave).encode("utf-8")
+            with self._lock:
+                self._sinteticas[llave] = pagina
+        return pagina
+
+    def _sintetica(self, endpoint, payload, llave):
+        seed = int(hashlib.sha1(llave.encode("utf-8")).hexdigest()[:8], 16)
+        if endpoint == "index.php":
+            return sinteticos.pagina_index(self.profesores)
+        if endpoint == "profe.php":
+            return sinteticos.pagina_taller(max(1, self.filas // 20), seed=seed, modo="PROFESOR")
+        if endpoint == "asignatura.php":
+            clave = payload.get("asig", "1100")
+            return sinteticos.pagina_taller(max(1, self.filas // 10), seed=seed, clave=clave)
+        return sinteticos.pagina_taller(self.filas, seed=seed)
+
+
+def crear_servidor(puerto=0, escenario=None, paginas=None):
+    """ThreadingHTTPServer listo para serve_forever(); puerto=0 elige uno libre."""
+    escenario = escenario or Escenario()
+    paginas = paginas or Paginas()
+    conteo = Counter()
+    lock = threading.Lock()
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, como el sitio real
+
+        def do_GET(self):
+            partes = urlsplit(self.path)
+            if partes.path == "/__stats":
+                with lock:
+                    self._responder(200, json.dumps(dict(conteo)).encode("utf-8"), "application/json")
+                return
+            self._atender(partes.path.rsplit("/", 1)[-1], dict(parse_qsl(partes.query)))
+
+        def do_POST(self):
+            largo = int(self.headers.get("Content-Length") or 0)
+            cuerpo = self.rfile.read(largo).decode("utf-8") if largo else ""
+            self._atender(urlsplit(self.path).path.rsplit("/", 1)[-1], dict(parse_qsl(cuerpo)))
+
+        def _atender(self, endpoint, payload):
+            if endpoint not in ENDPOINTS:
+                self._responder(404, b"no existe")
+                return
+            with lock:
+                conteo[endpoint] += 1
+            espera, falla = escenario.sortear()
+            time.sleep(espera)
+            if falla:
+                with lock:
+                    conteo["errores"] += 1
+                self._responder(503, b"servicio no disponible")
+                return
+            pagina = paginas.obtener(endpoint, payload)
+            if endpoint == "index.php":
+                etag = '"%s"' % hashlib.sha1(pagina).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    with lock:
+                        conteo["304"] += 1
+                    self._responder(304, b"", extra={"ETag": etag})
+                    return
+                self._responder(200, pagina, extra={"ETag": etag})
+                return
+            self._responder(200, pagina)
+
+        def _responder(self, estado, cuerpo, tipo="text/html; charset=utf-8", extra=None):
+            self.send_response(estado)
+            if estado != 304:
+                self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            for nombre, valor in (extra or {}).items():
+                self.send_header(nombre, valor)
+            self.end_headers()
+            if cuerpo:
+                self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.escenario = escenario
+    servidor.conteo = conteo
+    return servidor
+
+
+def iniciar_en_hilo(puerto=0, escenario=None, paginas=None):
+    """Arranca el servidor en un hilo y regresa (servidor, url_base)."""
+    servidor = crear_servidor(puerto, escenario, paginas)
+    threading.Thread(target=servidor.serve_forever, name="servidor-simulado", daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}/plan17"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Servidor local que simula al de escolares.")
+    ap.add_argument("--puerto", type=int, default=8086)
+    ap.add_argument("--latencia", type=float, default=100.0, help="ms promedio por respuesta")
+    ap.add_argument("--variacion", type=float, default=30.0, help="desviación estándar en ms")
+    ap.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas 503")
+    ap.add_argument("--lentos", type=float, default=0.0, help="fracción de respuestas lentas")
+    ap.add_argument("--factor-lento", type=float, default=10.0)
+    ap.add_argument("--filas", type=int, default=300, help="grupos por página sintética de taller")
+    ap.add_argument("--fixtures", default=DIRECTORIO_FIXTURES)
+    args = ap.parse_args(argv)
+
+    escenario = Escenario(args.latencia, args.variacion, args.errores, args.lentos, args.factor_lento)
+    paginas = Paginas(args.fixtures, filas=args.filas)
+    servidor = crear_servidor(args.puerto, escenario, paginas)
+    print(f"HORARIOS_URL_BASE=http://127.0.0.1:{servidor.server_port}/plan17  "
+          f"({len(paginas.grabadas)} páginas grabadas)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
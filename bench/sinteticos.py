@@ -0,0 +1,107 @@
+"""
+Entradas sintéticas con la misma estructura que las páginas del sitio,
+para medir con volúmenes que no existen (todavía) en las páginas reales.
+"""
+import random
+
+DIAS_CORTOS = ["LU", "MA", "MI", "JU", "VI", "SA"]
+
+
+def _horario(r):
+    """Texto de horario con las variantes que se ven en el sitio."""
+    dias = r.sample(DIAS_CORTOS, r.randint(1, 3))
+    inicio = r.randint(7, 18)
+    fin = inicio + r.choice([1, 2, 3, 4])
+    if r.random() < 0.5:
+        return f"<b>{','.join(dias)} {inicio}:00-{fin}:{r.choice(['00', '30'])}</b>"
+    partes = [f"<b>{d} {inicio:02d}:00-{fin:02d}:00</b>" for d in dias]
+    return "<br>".join(partes)
+
+
+def pagina_taller(n_filas, seed=0, modo="ESTANDAR", clave=None):
+    """
+    Página tipo taller.php con `n_filas` grupos repartidos en talleres,
+    con separadores de turno (colores 64C2FD / FFA97C) y materias con LIP.
+    Con `clave` todos los grupos son de esa asignatura (tipo asignatura.php).
+    """
+    r = random.Random(seed)
+    html = ['<html><body><table><tr><td>Facultad de Arquitectura</td></tr></table>',
+            '<table width="100%" border="0">',
+            '<tr><th>Clave</th><th>Asignatura</th><th>Grupo</th><th>Cupo</th><th>Profesor</th><th>Horario</th></tr>']
+    por_taller = max(1, n_filas // 16)
+    for i in range(n_filas):
+        if i % por_taller == 0:
+            html.append(f'<tr><td colspan="6" style="background-color:#64C2FD">Taller: TALLER {i // por_taller}</td></tr>')
+        elif i % por_taller == por_taller // 2:
+            html.append('<tr><td colspan="6" style="background-color:#FFA97C"></td></tr>')
+        clave_fila = clave if clave is not None else 1100 + r.randint(0, 400)
+        lip = f" LIP: LINEA {r.randint(1, 8)}" if r.random() < 0.1 else ""
+        quinta = f"TALLER {r.randint(0, 16)}" if modo == "PROFESOR" else f"APELLIDO{r.randint(0, 300)} NOMBRE, ARQ."
+        html.append(
+            f'<tr class="sombreado"><td>{clave_fila}</td><td>+ ASIGNATURA {clave_fila}{lip}\n</td>'
+            f'<td>{r.randint(1, 20):02d}{r.randint(1, 99):02d}</td><td>{r.randint(10, 40)}</td>'
+            f'<td>{quinta}</td><td>{_horario(r)}</td></tr>'
+        )
+    html.append("</table></body></html>")
+    return "\n".join(html)
+
+
+def materias(n, seed=0):
+    """Lista tipo st.session_state.mi_horario con `n` materias."""
+    r = random.Random(seed)
+    lista = []
+    for i in range(n):
+        horario = _horario(r).replace("<b>", "").replace("</b>", "").replace("<br>", " / ")
+        lista.append({
+            "id": f"MATERIA {i}-{i:04d}", "Materia": f"MATERIA {i}", "Grupo": f"{i:04d}",
+            "Horario": horario, "Profesor": "PROFESOR",
+        })
+    return lista
+
+
+def ofertas(n_claves, grupos_por_clave, seed=0):
+    """Oferta tipo asignatura.php: `grupos_por_clave` grupos de cada una de `n_claves` claves."""
+    r = random.Random(seed)
+    lista = []
+    for c in range(n_claves):
+        for g in range(grupos_por_clave):
+            horario = _horario(r).replace("<b>", "").replace("</b>", "").replace("<br>", " / ")
+            lista.append({
+                "Clave": str(1100 + c), "Materia": f"ASIGNATURA {1100 + c}", "Grupo": f"{g:04d}",
+                "Horario": horario, "Profesor": f"APELLIDO{r.randint(0, 300)} NOMBRE, ARQ.",
+                "Turno": r.choice(["Matutino", "Vespertino"]), "Agrupación": f"TALLER {r.randint(0, 16)}",
+            })
+    return lista
+
+
+APELLIDOS = ["GARCÍA", "GONZÁLEZ", "HERNÁNDEZ", "LÓPEZ", "MARTÍNEZ", "PÉREZ", "RODRÍGUEZ",
+             "SÁNCHEZ", "RAMÍREZ", "CRUZ", "FLORES", "GÓMEZ", "MUÑOZ", "ÁLVAREZ", "NÚÑEZ"]
+NOMBRES = ["JUAN", "MARÍA", "JOSÉ", "ANA", "LUIS", "CARLOS", "SOFÍA", "PATRICIA", "MIGUEL", "INÉS"]
+
+
+def profesores(n, seed=0):
+    """{nombre visible: "RFC|NOMBRE"} como el catálogo de index.php, con acentos."""
+    r = random.Random(seed)
+    catalogo = {}
+    while len(catalogo) < n:
+        nombre = f"{r.choice(APELLIDOS)} {r.choice(APELLIDOS)} {r.choice(NOMBRES)} {r.choice(NOMBRES)}"
+        nombre += f" {len(catalogo):05d}"
+        catalogo[nombre] = f"RFC{len(catalogo):06d}|{nombre}"
+    return catalogo
+
+
+def pagina_index(n_profesores, seed=0):
+    """index.php con los <select> de catálogos (profesores sintéticos + catálogos fijos)."""
+    from horarios.config import CATALOGOS
+
+    def select(id_select, opciones):
+        filas = "".join(f'<option value="{valor}">{texto}</option>' for texto, valor in opciones)
+        return f'<select id="{id_select}"><option value="">--</option>{filas}</select>'
+
+    return "<html><body><form>" + "".join([
+        select("idprof", [(n, v) for n, v in profesores(n_profesores, seed).items()]),
+        select("tal", CATALOGOS["TALLERES"].items()),
+        select("asig", [(e.split(" - ", 1)[1], c) for e, c in CATALOGOS["ASIGNATURAS_COMUNES"].items()]),
+        select("lip", CATALOGOS["LIPS"].items()),
+        select("area", CATALOGOS["AREAS_OPTATIVAS"].items()),
+    ]) + "</form></body></html>"
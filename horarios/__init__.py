@@ -0,0 +1,3 @@
+"""
+Lógica compartida del buscador de horarios (sin interfaz).
+"""
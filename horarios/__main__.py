@@ -0,0 +1,153 @@
+"""
+Línea de comandos del núcleo (sin Streamlit).
+
+    python -m horarios crawl 20262 --salida snapshots
+    python -m horarios query taller.php tal=6 talsem=1 --formato csv
+    python -m horarios solve 1555 1620 1731 --criterio dias --dias-libres Viernes
+    python -m horarios almacen snapshots/oferta_20262.json.gz
+    python -m horarios catalogos 20262 --forzar
+    python -m horarios refrescar 20262
+    python -m horarios ocupacion libres 6 3
+    python -m horarios query taller.php tal=6 talsem=1 --metricas prometheus
+
+Con --metricas (query, solve) se miden las fases (descarga, parseo...) y
+al final se escriben en stderr como JSON o texto de Prometheus.
+
+Cada subcomando importa solo lo que usa, para que arranque rápido.
+"""
+import argparse
+import json
+import sys
+
+from horarios.config import CICLO_ACTUAL
+from horarios.horario import DIAS
+
+
+def _payload(pares):
+    """['tal=6', 'talsem=1'] -> {'tal': 6, 'talsem': 1} (números cuando se puede)."""
+    payload = {}
+    for par in pares:
+        nombre, _, valor = par.partition("=")
+        payload[nombre] = int(valor) if valor.isdigit() else valor
+    return payload
+
+
+def query(args):
+    from horarios.busqueda import buscar_ofertas
+
+    df = buscar_ofertas(args.endpoint, _payload(args.payload), args.tipo, args.ciclo)
+    if args.formato == "csv":
+        df.to_csv(sys.stdout, index=False)
+    elif args.formato == "json":
+        print(df.to_json(orient="records", force_ascii=False))
+    else:
+        print(df.to_string(index=False))
+    return 0
+
+
+def solve(args):
+    from horarios.busqueda import ofertas_de_asignaturas
+    from horarios.generador import generar_horarios
+
+    ofertas, errores = ofertas_de_asignaturas(args.claves, args.ciclo)
+    for clave, error in errores.items():
+        print(f"Sin datos de {clave}: {error}", file=sys.stderr)
+
+    resultado = generar_horarios(
+        ofertas, args.claves, k=args.k, criterio=args.criterio, presupuesto_s=args.presupuesto,
+        turno=args.turno, taller=args.taller, evitar_profesores=args.evitar,
+        dias_libres=[DIAS.index(d) for d in args.dias_libres],
+        hora_min=args.hora_min, hora_max=args.hora_max,
+    )
+    if args.json:
+        print(json.dumps({
+            "completo": resultado.completo,
+            "nodos": resultado.nodos,
+            "sin_opciones": resultado.sin_opciones,
+            "soluciones": [s._asdict() for s in resultado.soluciones],
+        }, ensure_ascii=False, default=str, indent=1))
+        return 0 if resultado.soluciones else 1
+
+    if resultado.sin_opciones:
+        print(f"Sin grupos posibles para: {', '.join(resultado.sin_opciones)}")
+    for i, solucion in enumerate(resultado.soluciones, 1):
+        m = solucion.metricas
+        print(f"Opción {i}: {m['dias_con_clase']} días, {m['horas_muertas']:g} h muertas, "
+              f"salida máx. {m['salida_max']:g}")
+        for grupo in solucion.grupos:
+            print(f"  {grupo['Clave']:>6} {grupo['Grupo']:>6}  {grupo.get('Horario', ''):30} {grupo.get('Materia', '')}")
+    print(f"{resultado.nodos} nodos en {resultado.segundos:.2f}s"
+          + ("" if resultado.completo else " (presupuesto agotado)"))
+    return 0 if resultado.soluciones else 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # crawl y almacen tienen su propia CLI: se les pasa el resto tal cual
+    if argv and argv[0] == "crawl":
+        from horarios.crawler import main as main_crawler
+        return main_crawler(argv[1:])
+    if argv and argv[0] == "almacen":
+        from horarios.almacen import main as main_almacen
+        return main_almacen(argv[1:])
+    if argv and argv[0] == "catalogos":
+        from horarios.catalogos import main as main_catalogos
+        return main_catalogos(argv[1:])
+    if argv and argv[0] == "ocupacion":
+        from horarios.ocupacion import main as main_ocupacion
+        return main_ocupacion(argv[1:])
+    if argv and argv[0] == "refrescar":
+        from horarios.incremental import main as main_incremental
+        return main_incremental(argv[1:])
+
+    ap = argparse.ArgumentParser(prog="python -m horarios", description="Buscador de horarios sin interfaz.")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    sub.add_parser("crawl", help="Descargar la oferta completa de un ciclo (ver --help del subcomando)")
+    sub.add_parser("almacen", help="Construir el almacén SQLite de un snapshot")
+    sub.add_parser("catalogos", help="Refrescar los catálogos de index.php (GET condicional)")
+    sub.add_parser("refrescar", help="Refresco incremental del snapshot (solo páginas que cambiaron)")
+    sub.add_parser("ocupacion", help="Ocupación del ciclo: huecos, carga de profesores, turnos")
+
+    q = sub.add_parser("query", help="Una búsqueda (snapshot local, caché o sitio)")
+    q.add_argument("endpoint", help="taller.php, asignatura.php, profe.php...")
+    q.add_argument("payload", nargs="*", help="Parámetros nombre=valor (ej: tal=6 talsem=1)")
+    q.add_argument("--tipo", default="ESTANDAR", choices=["ESTANDAR", "ASIGNATURA_CONTEXTO", "PROFESOR", "GENERO"])
+    q.add_argument("--ciclo", default=CICLO_ACTUAL)
+    q.add_argument("--formato", default="tabla", choices=["tabla", "csv", "json"])
+    q.set_defaults(funcion=query)
+    q.add_argument("--metricas", choices=["json", "prometheus"], help="Medir fases y escribirlas en stderr")
+
+    s = sub.add_parser("solve", help="Generar horarios sin choques para unas claves")
+    s.add_argument("claves", nargs="+")
+    s.add_argument("--ciclo", default=CICLO_ACTUAL)
+    s.add_argument("--k", type=int, default=5)
+    s.add_argument("--criterio", default="huecos", choices=["huecos", "salida", "dias"])
+    s.add_argument("--presupuesto", type=float, default=1.0, help="Segundos de búsqueda")
+    s.add_argument("--turno", choices=["Matutino", "Vespertino"])
+    s.add_argument("--taller")
+    s.add_argument("--evitar", nargs="*", default=[], help="Profesores a evitar")
+    s.add_argument("--dias-libres", nargs="*", default=[], choices=DIAS, metavar="DIA", help="Lunes Martes ...")
+    s.add_argument("--hora-min", type=float)
+    s.add_argument("--hora-max", type=float)
+    s.add_argument("--json", action="store_true")
+    s.add_argument("--metricas", choices=["json", "prometheus"], help="Medir fases y escribirlas en stderr")
+    s.set_defaults(funcion=solve)
+
+    args = ap.parse_args(argv)
+    if not args.metricas:
+        return args.funcion(args)
+
+    from horarios import metricas
+
+    metricas.activar()
+    with metricas.fase("comando_" + args.comando):
+        codigo = args.funcion(args)
+    if args.metricas == "json":
+        print(json.dumps(metricas.como_json(), ensure_ascii=False, indent=1), file=sys.stderr)
+    else:
+        print(metricas.como_prometheus(), end="", file=sys.stderr)
+    return codigo
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
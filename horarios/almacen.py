@@ -0,0 +1,320 @@
+"""
+Almacén local (SQLite) de la oferta de un ciclo.
+
+Se construye a partir del snapshot del crawler y responde las búsquedas
+de la app con consultas indexadas, sin red ni parseo. También permite
+preguntas que el sitio no contesta, por ejemplo:
+
+    almacen.grupos(clave="1555", dia="Martes", desde=14)
+    -> todos los grupos de 1555 con clase el martes por la tarde
+
+Uso:
+    python -m horarios.almacen snapshots/oferta_20262.json.gz
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from horarios import cache
+from horarios.config import CICLO_ACTUAL, DIRECTORIO_SNAPSHOTS, VIGENCIA_SNAPSHOT_HORAS
+from horarios.horario import DIAS, SLOTS_POR_HORA, interpretar_slots
+from horarios.sitio import armar_payload
+
+# Columna del DataFrame -> columna en SQLite
+COLUMNAS = {
+    "Clave": "clave", "Materia": "materia", "Grupo": "grupo", "Profesor": "profesor",
+    "Horario": "horario", "Agrupación": "agrupacion", "Turno": "turno",
+}
+
+ESQUEMA = """
+CREATE TABLE meta (
+    nombre TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE ofertas (
+    id INTEGER PRIMARY KEY,
+    clave TEXT, materia TEXT, grupo TEXT, profesor TEXT,
+    horario TEXT, agrupacion TEXT, turno TEXT
+);
+CREATE TABLE consultas (
+    clave_consulta TEXT PRIMARY KEY,
+    endpoint TEXT, tipo_parseo TEXT,
+    tal INTEGER, talsem INTEGER, asig INTEGER, idprof TEXT
+);
+CREATE TABLE consulta_ofertas (
+    clave_consulta TEXT, posicion INTEGER, oferta_id INTEGER,
+    PRIMARY KEY (clave_consulta, posicion)
+) WITHOUT ROWID;
+-- inicio / fin en slots de media hora desde las 00:00 (fin exclusivo)
+CREATE TABLE bloques (
+    oferta_id INTEGER, dia INTEGER, inicio INTEGER, fin INTEGER
+);
+CREATE INDEX idx_ofertas_clave ON ofertas (clave, grupo);
+CREATE INDEX idx_ofertas_profesor ON ofertas (profesor);
+CREATE INDEX idx_ofertas_agrupacion ON ofertas (agrupacion, turno);
+CREATE INDEX idx_consultas_taller ON consultas (endpoint, tal, talsem);
+CREATE INDEX idx_bloques_dia ON bloques (dia, inicio, fin);
+CREATE INDEX idx_bloques_oferta ON bloques (oferta_id);
+"""
+
+
+def ruta_almacen(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    return os.path.join(directorio, f"oferta_{ciclo}.sqlite")
+
+
+# ==========================================
+# CONSTRUCCIÓN
+# ==========================================
+
+def construir(snapshot, ruta):
+    """
+    Crea el archivo SQLite a partir de un snapshot del crawler.
+    Se escribe en un temporal y se reemplaza de golpe, así los lectores
+    nunca ven un almacén a medias.
+    """
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    con = sqlite3.connect(temporal)
+    try:
+        con.executescript(ESQUEMA)
+        con.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("ciclo", snapshot["ciclo"]),
+            ("generado", snapshot["generado"]),
+        ])
+
+        # Los huecos (None) son ofertas que dio de baja el refresco incremental
+        _insertar_ofertas(con, {i: o for i, o in enumerate(snapshot["ofertas"]) if o is not None})
+        for consulta in snapshot["consultas"]:
+            _insertar_consulta(con, consulta)
+        con.commit()
+        con.execute("ANALYZE")
+    finally:
+        con.close()
+    os.replace(temporal, ruta)
+
+
+def _insertar_ofertas(con, ofertas):
+    """{oferta_id: oferta} -> filas de ofertas y sus bloques."""
+    filas_ofertas = []
+    filas_bloques = []
+    for oferta_id, oferta in ofertas.items():
+        filas_ofertas.append((oferta_id, *(oferta.get(c, "") for c in COLUMNAS)))
+        for bloque in interpretar_slots(oferta.get("Horario", "")):
+            filas_bloques.append((oferta_id, *bloque))
+    con.executemany("INSERT OR REPLACE INTO ofertas VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas_ofertas)
+    con.executemany("INSERT INTO bloques VALUES (?, ?, ?, ?)", filas_bloques)
+
+
+def _insertar_consulta(con, consulta):
+    payload = consulta["payload"]
+    con.execute("INSERT OR REPLACE INTO consultas VALUES (?, ?, ?, ?, ?, ?, ?)", (
+        consulta["clave"], consulta["endpoint"], consulta["tipo_parseo"],
+        payload.get("tal"), payload.get("talsem"), payload.get("asig"), payload.get("idprof"),
+    ))
+    con.executemany(
+        "INSERT OR REPLACE INTO consulta_ofertas VALUES (?, ?, ?)",
+        [(consulta["clave"], pos, oferta_id) for pos, oferta_id in enumerate(consulta["filas"])],
+    )
+
+
+def aplicar_cambios(ruta, altas, bajas, consultas, meta):
+    """
+    Cambios por fila sobre un almacén que ya existe, sin reconstruirlo:
+    `altas` {oferta_id: oferta}, `bajas` [oferta_id], `consultas` los
+    registros del snapshot cuya lista de filas cambió y `meta` {nombre: valor}.
+    Todo va en una transacción: los lectores ven el antes o el después.
+    """
+    con = sqlite3.connect(ruta, timeout=30)
+    try:
+        with con:
+            ids = [(i,) for i in list(bajas) + list(altas)]
+            con.executemany("DELETE FROM bloques WHERE oferta_id = ?", ids)
+            con.executemany("DELETE FROM ofertas WHERE id = ?", ids)
+            _insertar_ofertas(con, altas)
+            for consulta in consultas:
+                con.execute("DELETE FROM consulta_ofertas WHERE clave_consulta = ?", (consulta["clave"],))
+                _insertar_consulta(con, consulta)
+            con.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+    finally:
+        con.close()
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+
+class AlmacenOfertas:
+    """
+    Lector del almacén. Cada hilo (sesión de Streamlit) usa su propia
+    conexión de solo lectura; si el archivo se reconstruye se reabre solo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+
+    def _conexion(self):
+        mtime = os.stat(self.ruta).st_mtime
+        con = getattr(self._local, "con", None)
+        if con is None or self._local.mtime != mtime:
+            if con is not None:
+                con.close()
+            con = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+            self._local.con = con
+            self._local.mtime = mtime
+        return con
+
+    def meta(self):
+        return dict(self._conexion().execute("SELECT nombre, valor FROM meta"))
+
+    def vigente(self, max_horas=VIGENCIA_SNAPSHOT_HORAS):
+        """True si el snapshot tiene menos de `max_horas` de antigüedad."""
+        try:
+            generado = datetime.fromisoformat(self.meta()["generado"])
+        except (OSError, sqlite3.Error, KeyError, ValueError):
+            return False
+        return (datetime.now() - generado).total_seconds() < max_horas * 3600
+
+    def _df(self, sql, parametros=()):
+        import pandas as pd
+
+        cursor = self._conexion().execute(sql, parametros)
+        filas = cursor.fetchall()
+        columnas = {v: k for k, v in COLUMNAS.items()}
+        return pd.DataFrame(filas, columns=[columnas.get(d[0], d[0]) for d in cursor.description])
+
+    def buscar(self, endpoint, payload_extra, tipo_parseo="ESTANDAR", ciclo=CICLO_ACTUAL):
+        """
+        Misma respuesta que daría el sitio para esa búsqueda (mismas filas y
+        orden). Regresa None si la consulta no está en el snapshot.
+        """
+        clave = cache.clave_consulta(endpoint, armar_payload(payload_extra, ciclo), tipo_parseo)
+        con = self._conexion()
+        if con.execute("SELECT 1 FROM consultas WHERE clave_consulta = ?", (clave,)).fetchone() is None:
+            return None
+        return self._df(
+            "SELECT o.clave, o.materia, o.grupo, o.profesor, o.horario, o.agrupacion, o.turno "
+            "FROM consulta_ofertas co JOIN ofertas o ON o.id = co.oferta_id "
+            "WHERE co.clave_consulta = ? ORDER BY co.posicion",
+            (clave,),
+        )
+
+    def ids_consulta(self, endpoint, payload_extra, tipo_parseo="ESTANDAR", ciclo=CICLO_ACTUAL):
+        """ids de oferta de una búsqueda, en orden; None si no está en el snapshot."""
+        clave = cache.clave_consulta(endpoint, armar_payload(payload_extra, ciclo), tipo_parseo)
+        con = self._conexion()
+        if con.execute("SELECT 1 FROM consultas WHERE clave_consulta = ?", (clave,)).fetchone() is None:
+            return None
+        return [fila[0] for fila in con.execute(
+            "SELECT oferta_id FROM consulta_ofertas WHERE clave_consulta = ? ORDER BY posicion", (clave,)
+        )]
+
+    def grupo(self, clave, grupo):
+        """Fila de un grupo (dict con las columnas del DataFrame) o None; prefiere la que trae profesor."""
+        cursor = self._conexion().execute(
+            "SELECT clave, materia, grupo, profesor, horario, agrupacion, turno FROM ofertas "
+            "WHERE clave = ? AND grupo = ? ORDER BY profesor = 'BUSQUEDA PROFESOR' LIMIT 1",
+            (str(clave), str(grupo)),
+        )
+        fila = cursor.fetchone()
+        return None if fila is None else dict(zip(COLUMNAS, fila))
+
+    def ofertas(self):
+        """Toda la oferta del ciclo con su id (columna "id"), ordenada por id."""
+        return self._df(
+            "SELECT o.id, o.clave, o.materia, o.grupo, o.profesor, o.horario, o.agrupacion, o.turno "
+            "FROM ofertas o ORDER BY o.id"
+        )
+
+    def asignaturas(self):
+        """[(clave, materia)] distintas de todo el ciclo, ordenadas por clave."""
+        return self._conexion().execute(
+            "SELECT DISTINCT clave, materia FROM ofertas "
+            "WHERE clave != '' AND materia != '' ORDER BY clave, materia"
+        ).fetchall()
+
+    def grupos(self, clave=None, profesor=None, agrupacion=None, turno=None, dia=None, desde=None, hasta=None):
+        """
+        Búsqueda libre sobre la oferta. `dia` acepta nombre ("Martes") o
+        índice (0 = Lunes). `desde`/`hasta` (horas, admiten 13.5) piden que
+        el grupo tenga un bloque ese día que quede DENTRO de la ventana.
+        """
+        condiciones = []
+        parametros = []
+        if clave is not None:
+            condiciones.append("o.clave = ?")
+            parametros.append(str(clave))
+        if profesor:
+            condiciones.append("o.profesor LIKE ?")
+            parametros.append(f"%{profesor}%")
+        if agrupacion:
+            condiciones.append("o.agrupacion = ?")
+            parametros.append(agrupacion)
+        if turno:
+            condiciones.append("o.turno = ?")
+            parametros.append(turno)
+
+        if dia is not None or desde is not None or hasta is not None:
+            sub = []
+            if dia is not None:
+                sub.append("b.dia = ?")
+                parametros.append(DIAS.index(dia) if isinstance(dia, str) else int(dia))
+            if desde is not None:
+                sub.append("b.inicio >= ?")
+                parametros.append(int(desde * SLOTS_POR_HORA))
+            if hasta is not None:
+                sub.append("b.fin <= ?")
+                parametros.append(int(hasta * SLOTS_POR_HORA))
+            condiciones.append(
+                "o.id IN (SELECT b.oferta_id FROM bloques b WHERE " + " AND ".join(sub) + ")"
+            )
+
+        # Las filas del modo PROFESOR no traen el nombre del profesor y repiten
+        # grupos que ya vienen completos desde taller.php: se dejan fuera.
+        condiciones.append("o.profesor != 'BUSQUEDA PROFESOR'")
+        where = "WHERE " + " AND ".join(condiciones)
+        return self._df(
+            "SELECT o.clave, o.materia, o.grupo, o.profesor, o.horario, o.agrupacion, o.turno "
+            f"FROM ofertas o {where} ORDER BY o.clave, o.grupo",
+            parametros,
+        )
+
+
+_almacenes = {}
+_lock = threading.Lock()
+
+
+def almacen_local(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    """Almacén del ciclo si ya existe el archivo; None si no hay snapshot."""
+    ruta = ruta_almacen(ciclo, directorio)
+    if not os.path.exists(ruta):
+        return None
+    with _lock:
+        if ruta not in _almacenes:
+            _almacenes[ruta] = AlmacenOfertas(ruta)
+        return _almacenes[ruta]
+
+
+def main(argv=None):
+    from horarios.crawler import leer_snapshot
+
+    ap = argparse.ArgumentParser(description="Construye el almacén SQLite a partir de un snapshot.")
+    ap.add_argument("snapshot", help="Archivo oferta_<ciclo>.json.gz del crawler")
+    ap.add_argument("--salida", default=None, help="Ruta del .sqlite (por defecto junto al snapshot)")
+    args = ap.parse_args(argv)
+
+    inicio = time.monotonic()
+    snapshot = leer_snapshot(args.snapshot)
+    ruta = args.salida or ruta_almacen(snapshot["ciclo"], os.path.dirname(args.snapshot) or ".")
+    construir(snapshot, ruta)
+    print(f"{len(snapshot['ofertas'])} ofertas -> {ruta} ({time.monotonic() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Búsqueda de ofertas sin interfaz: snapshot local -> caché compartida -> sitio.
+
+Es la misma ruta que sigue la app, pero sin Streamlit: la usan la CLI
+(`python -m horarios query ...`) y los procesos batch. Lanza excepción si
+no hay datos y el sitio falla; quien llama decide cómo mostrarlo.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from horarios import almacen, cache, metricas
+from horarios.config import CATALOGOS, CICLO_ACTUAL
+from horarios.oferta import compactar, unir
+from horarios.parser import parsear_html_generico
+from horarios.sitio import armar_payload, descargar_html
+
+CONCURRENCIA_CONSULTAS = 6   # por búsqueda múltiple; el tope global al sitio está en conexion.py
+
+
+class BusquedaIncompleta(Exception):
+    """Algunas consultas de una búsqueda múltiple fallaron; `df` trae lo que sí llegó."""
+
+    def __init__(self, df, errores):
+        super().__init__(f"{len(errores)} consulta(s) fallaron: " + "; ".join(str(e) for e in errores.values()))
+        self.df = df
+        self.errores = errores
+
+
+def buscar_ofertas(endpoint, payload_extra, tipo_parseo="ESTANDAR", ciclo=CICLO_ACTUAL):
+    """
+    1) Si hay snapshot local vigente del ciclo, responde desde SQLite.
+    2) Si no, consulta + parseo pasando por la caché compartida entre sesiones.
+    Siempre regresa la tabla compacta (horarios/oferta.py), y en ambos casos
+    el mismo objeto para todas las sesiones mientras siga en la caché.
+    El DataFrame es compartido: no modificarlo en sitio.
+    """
+    clave = cache.clave_consulta(endpoint, armar_payload(payload_extra, ciclo), tipo_parseo)
+    compartida = cache.cache_compartida()
+
+    local = almacen.almacen_local(ciclo)
+    if local is not None and local.vigente():
+        # None = la consulta no está en el snapshot (también se recuerda)
+        df = compartida.obtener("almacen:" + clave, lambda: _desde_almacen(local, endpoint, payload_extra, tipo_parseo, ciclo))
+        if df is not None:
+            return df
+
+    return compartida.obtener(
+        clave, lambda: parsear_html_generico(descargar_html(endpoint, payload_extra, ciclo), tipo_parseo, compacta=True)
+    )
+
+
+def en_cache(endpoint, payload_extra, tipo_parseo="ESTANDAR", ciclo=CICLO_ACTUAL):
+    """True si buscar_ofertas respondería sin ir al sitio (caché compartida o snapshot vigente)."""
+    clave = cache.clave_consulta(endpoint, armar_payload(payload_extra, ciclo), tipo_parseo)
+    compartida = cache.cache_compartida()
+    if compartida.valor(clave) is not None or compartida.valor("almacen:" + clave) is not None:
+        return True
+    local = almacen.almacen_local(ciclo)
+    return local is not None and local.vigente() and local.ids_consulta(endpoint, payload_extra, tipo_parseo, ciclo) is not None
+
+
+def _desde_almacen(local, endpoint, payload_extra, tipo_parseo, ciclo):
+    with metricas.fase("almacen"):
+        df = local.buscar(endpoint, payload_extra, tipo_parseo, ciclo)
+        return None if df is None else compactar(df)
+
+
+def en_paralelo(consultas, ciclo=CICLO_ACTUAL, concurrencia=CONCURRENCIA_CONSULTAS):
+    """
+    Lanza todas las consultas ({endpoint, payload_extra, tipo_parseo}) a la
+    vez y va regresando (posición, df, error) conforme llegan, para mostrar
+    resultados sin esperar a la más lenta. La latencia total es la de la
+    consulta más lenta, no la suma.
+    """
+    if not consultas:
+        return
+    with ThreadPoolExecutor(max_workers=min(concurrencia, len(consultas)), thread_name_prefix="busqueda") as pool:
+        futuros = {pool.submit(buscar_ofertas, ciclo=ciclo, **c): i for i, c in enumerate(consultas)}
+        for futuro in as_completed(futuros):
+            try:
+                yield futuros[futuro], futuro.result(), None
+            except Exception as e:
+                yield futuros[futuro], None, e
+
+
+PREFIJO_UNION = "union:"   # claves de caché de las búsquedas combinadas
+
+# Unión -> claves de las consultas que la forman, para invalidarla si cambia una
+_uniones = OrderedDict()
+_lock_uniones = threading.Lock()
+
+
+def _claves(consultas, ciclo):
+    return sorted(
+        cache.clave_consulta(c["endpoint"], armar_payload(c["payload_extra"], ciclo), c.get("tipo_parseo", "ESTANDAR"))
+        for c in consultas
+    )
+
+
+def clave_combinada(consultas, ciclo=CICLO_ACTUAL):
+    """Misma clave para el mismo conjunto de consultas, sin importar el orden."""
+    claves = _claves(consultas, ciclo)
+    clave = PREFIJO_UNION + hashlib.sha1("|".join(claves).encode("ascii")).hexdigest()
+    with _lock_uniones:
+        _uniones[clave] = frozenset(claves)
+        _uniones.move_to_end(clave)
+        while len(_uniones) > 2 * cache.MAX_ENTRADAS:
+            _uniones.popitem(last=False)
+    return clave
+
+
+def invalidar_consultas(claves, uniones_previas=False):
+    """
+    Borra de la caché compartida esas consultas (del sitio y del almacén) y
+    las uniones que las incluyen; lo demás se queda. Lo usa el refresco
+    incremental (horarios/incremental.py). Con uniones_previas=True borra
+    además todas las uniones: las guardadas en disco antes de arrancar el
+    proceso no están en el registro y no se sabe qué incluyen.
+    """
+    claves = set(claves)
+    if not claves:
+        return
+    with _lock_uniones:
+        uniones = [u for u, partes in _uniones.items() if partes & claves]
+    compartida = cache.cache_compartida()
+    if uniones_previas:
+        compartida.invalidar_prefijo(PREFIJO_UNION)
+    for clave in claves:
+        compartida.invalidar(clave)
+        compartida.invalidar("almacen:" + clave)
+    for union in uniones:
+        compartida.invalidar(union)
+
+
+def buscar_combinado(consultas, ciclo=CICLO_ACTUAL):
+    """
+    Varias consultas -> una tabla compacta sin repetidos por (Clave, Grupo),
+    en el orden de `consultas`. Con una sola es buscar_ofertas tal cual.
+    La unión también queda en la caché compartida (un objeto para todas las
+    sesiones); si alguna consulta falla se lanza BusquedaIncompleta con lo
+    que sí llegó y no se guarda nada.
+    """
+    if len(consultas) == 1:
+        return buscar_ofertas(ciclo=ciclo, **consultas[0])
+    return cache.cache_compartida().obtener(clave_combinada(consultas, ciclo), lambda: _unir_consultas(consultas, ciclo))
+
+
+def _unir_consultas(consultas, ciclo):
+    tablas = [None] * len(consultas)
+    errores = {}
+    for i, df, error in en_paralelo(consultas, ciclo):
+        if error is None:
+            tablas[i] = df
+        else:
+            errores[i] = error
+    if errores and len(errores) == len(consultas):
+        raise next(iter(errores.values()))
+    df = unir([t for t in tablas if t is not None])
+    if errores:
+        raise BusquedaIncompleta(df, errores)
+    return df
+
+
+def ofertas_de_asignaturas(claves, ciclo=CICLO_ACTUAL):
+    """
+    Grupos de cada clave (asignatura.php) juntos en una lista de dicts,
+    como los pide el generador. Regresa (ofertas, {clave: error}).
+    """
+    ofertas = []
+    errores = {}
+    for clave in claves:
+        try:
+            df = buscar_ofertas("asignatura.php", {"asig": clave}, "ASIGNATURA_CONTEXTO", ciclo)
+        except Exception as e:
+            errores[clave] = e
+            continue
+        ofertas.extend(df.to_dict("records"))
+    return ofertas, errores
+
+
+def catalogo_asignaturas(ciclo=CICLO_ACTUAL):
+    """
+    {"1555 - TALLER INTEGRAL III": 1555, ...}: las asignaturas comunes, las
+    del catálogo de index.php y todas las del snapshot local del ciclo, si hay.
+    """
+    from horarios.catalogos import catalogos
+
+    catalogo = dict(CATALOGOS["ASIGNATURAS_COMUNES"])
+    conocidas = set(catalogo.values())
+    for etiqueta, clave in catalogos()["ASIGNATURAS"].items():
+        if clave not in conocidas:
+            catalogo[etiqueta] = clave
+    local = almacen.almacen_local(ciclo)
+    if local is not None:
+        conocidas = set(catalogo.values())
+        for clave, materia in local.asignaturas():
+            valor = int(clave) if str(clave).isdigit() else clave
+            if valor not in conocidas:
+                catalogo[f"{clave} - {materia}"] = valor
+    return catalogo
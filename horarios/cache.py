@@ -0,0 +1,310 @@
+"""
+Caché compartida (entre sesiones) de consultas al servidor de escolares.
+
+Guarda el resultado YA PARSEADO (DataFrame) para que un acierto se salte
+tanto la petición como el parseo. Características:
+  * TTL de frescura + ventana "stale-while-revalidate": un dato vencido se
+    sirve de inmediato y se refresca en segundo plano.
+  * Expulsión LRU acotada por número de entradas.
+  * Nivel opcional en disco (pickle) que sobrevive a reinicios.
+  * Consultas idénticas en vuelo se fusionan (single-flight): una sola
+    petición al origen responde a todas las sesiones que esperan.
+  * Si el origen falla se sirve el último dato bueno aunque ya esté vencido.
+  * Contadores de aciertos / fallos.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from horarios import metricas
+
+logger = logging.getLogger(__name__)
+
+TTL_SEGUNDOS = 10 * 60          # dato fresco
+VENTANA_STALE_SEGUNDOS = 60 * 60  # dato vencido pero aún servible mientras se refresca
+MAX_ENTRADAS = 512
+MAX_ARCHIVOS_DISCO = 5000
+
+
+def clave_consulta(endpoint, payload, tipo_parseo="ESTANDAR"):
+    """
+    Clave normalizada: mismo endpoint + mismo payload (sin importar el orden
+    ni si los valores vienen como int o str) -> misma clave.
+    """
+    normalizado = {str(k): str(v) for k, v in payload.items()}
+    texto = json.dumps([endpoint, tipo_parseo, normalizado], sort_keys=True)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class _Entrada:
+    __slots__ = ("valor", "creado")
+
+    def __init__(self, valor, creado):
+        self.valor = valor
+        self.creado = creado
+
+
+class _Vuelo:
+    """Consulta en curso a la que se pueden unir otras sesiones."""
+    __slots__ = ("evento", "valor", "error")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class CacheRespuestas:
+    """LRU + TTL + stale-while-revalidate, con nivel opcional en disco."""
+
+    def __init__(self, ttl=TTL_SEGUNDOS, ventana_stale=VENTANA_STALE_SEGUNDOS,
+                 max_entradas=MAX_ENTRADAS, directorio=None, max_archivos=MAX_ARCHIVOS_DISCO):
+        self.ttl = ttl
+        self.ventana_stale = ventana_stale
+        self.max_entradas = max_entradas
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        self._datos = OrderedDict()
+        self._lock = threading.RLock()
+        self._en_vuelo = {}
+        self.contadores = {
+            "aciertos": 0, "aciertos_stale": 0, "aciertos_disco": 0,
+            "fallos": 0, "fusionadas": 0, "servidas_por_falla": 0,
+            "revalidaciones": 0, "errores_revalidacion": 0, "expulsiones": 0,
+        }
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    # ---------- API pública ----------
+
+    def obtener(self, clave, cargador):
+        """
+        Regresa el valor de `clave`; si no existe (o ya caducó del todo)
+        llama a `cargador()` y guarda el resultado. Si otra sesión ya está
+        cargando la misma clave, espera ese resultado en lugar de repetir la
+        consulta. Si el cargador falla y hay un dato viejo, se sirve ese;
+        si no, la excepción se propaga y no se guarda nada.
+        """
+        ahora = time.time()
+        entrada = self._leer(clave)
+
+        if entrada is not None:
+            edad = ahora - entrada.creado
+            if edad < self.ttl:
+                self._contar("aciertos")
+                return entrada.valor
+            if edad < self.ttl + self.ventana_stale:
+                self._contar("aciertos_stale")
+                self._revalidar_en_fondo(clave, cargador, entrada.valor)
+                return entrada.valor
+
+        with self._lock:
+            # Otra sesión pudo haber terminado de cargarla mientras tanto
+            reciente = self._datos.get(clave)
+            if reciente is not None and reciente is not entrada and time.time() - reciente.creado < self.ttl:
+                self.contadores["aciertos"] += 1
+                return reciente.valor
+            vuelo = self._en_vuelo.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_vuelo[clave] = _Vuelo()
+                self.contadores["fallos"] += 1
+            else:
+                self.contadores["fusionadas"] += 1
+
+        if not lider:
+            vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+
+        try:
+            vuelo.valor = cargador()
+            self.guardar(clave, vuelo.valor)
+        except Exception as e:
+            if entrada is None:
+                vuelo.error = e
+                raise
+            # Origen caído: último dato bueno conocido
+            logger.warning("Sirviendo dato vencido de %s por falla: %s", clave, e)
+            self._contar("servidas_por_falla")
+            vuelo.valor = entrada.valor
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(clave, None)
+            vuelo.evento.set()
+        return vuelo.valor
+
+    def guardar(self, clave, valor, creado=None):
+        entrada = _Entrada(valor, creado or time.time())
+        with self._lock:
+            self._datos[clave] = entrada
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.contadores["expulsiones"] += 1
+        self._escribir_disco(clave, entrada)
+
+    def invalidar(self, clave=None):
+        """Borra una clave (o todo si clave=None) de memoria y disco."""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+        if self.directorio:
+            archivos = [self._ruta(clave)] if clave else [
+                os.path.join(self.directorio, f) for f in os.listdir(self.directorio) if f.endswith(".pkl")
+            ]
+            for ruta in archivos:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def invalidar_prefijo(self, prefijo):
+        """Borra de memoria y disco todas las claves que empiezan con `prefijo`."""
+        with self._lock:
+            for clave in [c for c in self._datos if c.startswith(prefijo)]:
+                del self._datos[clave]
+        if self.directorio:
+            for nombre in os.listdir(self.directorio):
+                if nombre.startswith(prefijo) and nombre.endswith(".pkl"):
+                    try:
+                        os.remove(os.path.join(self.directorio, nombre))
+                    except OSError:
+                        pass
+
+    def valor(self, clave):
+        """Lo que haya guardado para `clave` (aunque esté vencido), sin cargar nada; None si no hay."""
+        entrada = self._leer(clave)
+        return None if entrada is None else entrada.valor
+
+    def identificadores(self):
+        """id() de los valores en memoria (para no contarlos como memoria de una sesión)."""
+        with self._lock:
+            return {id(entrada.valor) for entrada in self._datos.values()}
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self.contadores)
+            stats["entradas"] = len(self._datos)
+        consultas = stats["aciertos"] + stats["aciertos_stale"] + stats["fallos"] + stats["fusionadas"]
+        stats["tasa_aciertos"] = round((consultas - stats["fallos"]) / consultas, 3) if consultas else 0.0
+        return stats
+
+    # ---------- Internos ----------
+
+    def _contar(self, nombre):
+        with self._lock:
+            self.contadores[nombre] += 1
+
+    def _leer(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+                return entrada
+        entrada = self._leer_disco(clave)
+        if entrada is not None:
+            self._contar("aciertos_disco")
+            with self._lock:
+                self._datos[clave] = entrada
+                self._datos.move_to_end(clave)
+        return entrada
+
+    def _revalidar_en_fondo(self, clave, cargador, viejo):
+        """
+        Refresca `clave` en un hilo, registrado como vuelo: una consulta que
+        llegue mientras tanto (p. ej. tras una expulsión) se une a él en
+        lugar de pedir lo mismo al origen otra vez.
+        """
+        with self._lock:
+            if clave in self._en_vuelo:
+                return
+            vuelo = self._en_vuelo[clave] = _Vuelo()
+
+        def tarea():
+            try:
+                vuelo.valor = cargador()
+                self.guardar(clave, vuelo.valor)
+                self._contar("revalidaciones")
+            except Exception as e:
+                # Nos quedamos con el dato viejo; se volverá a intentar en la siguiente consulta
+                self._contar("errores_revalidacion")
+                logger.warning("No se pudo revalidar %s: %s", clave, e)
+                vuelo.valor = viejo
+            finally:
+                with self._lock:
+                    self._en_vuelo.pop(clave, None)
+                vuelo.evento.set()
+
+        threading.Thread(target=tarea, name=f"revalidar-{clave[:8]}", daemon=True).start()
+
+    # ---------- Nivel en disco ----------
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        try:
+            with open(self._ruta(clave), "rb") as f:
+                creado, valor = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        # Aunque esté vencido se regresa: sirve como último dato bueno si el origen falla
+        return _Entrada(valor, creado)
+
+    def _escribir_disco(self, clave, entrada):
+        if not self.directorio:
+            return
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                pickle.dump((entrada.creado, entrada.valor), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)  # escritura atómica
+        except OSError as e:
+            logger.warning("No se pudo escribir la caché en disco: %s", e)
+            return
+        self._podar_disco()
+
+    def _podar_disco(self):
+        try:
+            archivos = [os.path.join(self.directorio, f) for f in os.listdir(self.directorio) if f.endswith(".pkl")]
+            if len(archivos) <= self.max_archivos:
+                return
+            archivos.sort(key=os.path.getmtime)
+            for ruta in archivos[: len(archivos) - self.max_archivos]:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+# ==========================================
+# INSTANCIA COMPARTIDA DEL PROCESO
+# ==========================================
+
+_cache_compartida = None
+_lock_global = threading.Lock()
+
+
+def cache_compartida():
+    """
+    Caché única del proceso. El nivel en disco se activa definiendo la
+    variable de entorno HORARIOS_CACHE_DIR.
+    """
+    global _cache_compartida
+    if _cache_compartida is None:
+        with _lock_global:
+            if _cache_compartida is None:
+                _cache_compartida = CacheRespuestas(directorio=os.environ.get("HORARIOS_CACHE_DIR") or None)
+                metricas.registrar_colector("cache", _cache_compartida.estadisticas)
+    return _cache_compartida
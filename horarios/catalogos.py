@@ -0,0 +1,248 @@
+"""
+Catálogos dinámicos de index.php: profesores, talleres, asignaturas, LIPs
+y áreas de optativas.
+
+Una sola pasada sobre index.php saca todos los <select> a la vez.
+index.php no recibe ciclo (muestra los catálogos vigentes del sitio), así
+que hay un solo archivo, <snapshots>/catalogos.json, con el ETag, el
+Last-Modified y un hash del HTML:
+  * arrancar en frío solo lee ese JSON (no hay petición ni parseo);
+  * al vencer (VIGENCIA_CATALOGOS_HORAS) se manda un GET condicional; si el
+    sitio contesta 304, o el HTML trae el mismo hash, no se vuelve a parsear;
+  * si el sitio no responde se sirve lo último guardado y, si no hay nada,
+    los catálogos fijos de config.py.
+
+    catalogos()["TALLERES"]    -> {"LUIS BARRAGÁN": 7, ...}
+    catalogos()["PROFESORES"]  -> {"ABUD RAMIREZ RAMON": "AURR6106285A0|ABUD ...", ...}
+
+    python -m horarios.catalogos [--forzar]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from horarios.config import CATALOGOS, DIRECTORIO_SNAPSHOTS, VIGENCIA_CATALOGOS_HORAS
+
+logger = logging.getLogger(__name__)
+
+REINTENTO_SEGUNDOS = 5 * 60   # si index.php falla, cuándo volver a intentar
+
+# id (o name) del <select> de index.php de cada catálogo; gana el primero que exista
+SELECTS = {
+    "PROFESORES": ("idprof",),
+    "TALLERES": ("tal", "idtal", "taller"),
+    "ASIGNATURAS": ("asig", "idasig", "asignatura"),
+    "LIPS": ("lip", "idlip"),
+    "AREAS_OPTATIVAS": ("area", "idarea"),
+}
+
+# Lo que se usa mientras no haya nada del sitio
+RESPALDO = {
+    "PROFESORES": {},
+    "TALLERES": CATALOGOS["TALLERES"],
+    "ASIGNATURAS": CATALOGOS["ASIGNATURAS_COMUNES"],
+    "LIPS": CATALOGOS["LIPS"],
+    "AREAS_OPTATIVAS": CATALOGOS["AREAS_OPTATIVAS"],
+}
+
+
+# ==========================================
+# EXTRACCIÓN
+# ==========================================
+
+_ENTERO = re.compile(r"0|[1-9]\d{0,8}")
+
+
+def _valor(texto):
+    """'7' -> 7 como en config.py; '0402' se queda como texto para no perder el cero."""
+    return int(texto) if _ENTERO.fullmatch(texto) else texto
+
+
+def _catalogo(nombre, opciones):
+    """[(texto, valor)] de un <select> -> {etiqueta: valor} como en config.py."""
+    if nombre == "PROFESORES":
+        # Mismo filtro que extraer_profesores: fuera "--PROFESOR--" y valores cortos
+        return {texto: valor for texto, valor in opciones if "PROFESOR" not in valor and len(valor) > 2}
+    if nombre == "ASIGNATURAS":
+        return {(texto if texto.startswith(valor) else f"{valor} - {texto}"): _valor(valor)
+                for texto, valor in opciones}
+    catalogo = {texto: _valor(valor) for texto, valor in opciones}
+    # La opción "todos" (valor 0) la agregamos nosotros si el sitio no la trae
+    todos = {k: v for k, v in RESPALDO[nombre].items() if v == 0 and 0 not in catalogo.values()}
+    return {**todos, **catalogo}
+
+
+def extraer_catalogos(html):
+    """{nombre: {etiqueta: valor}} de todos los catálogos que aparezcan en index.php."""
+    from horarios.parser import extraer_selects
+
+    selects = extraer_selects(html)
+    catalogos = {}
+    for nombre, ids in SELECTS.items():
+        for id_select in ids:
+            if selects.get(id_select):
+                catalogos[nombre] = _catalogo(nombre, selects[id_select])
+                break
+    return catalogos
+
+
+# ==========================================
+# DISCO Y REFRESCO CONDICIONAL
+# ==========================================
+
+def ruta_catalogos(directorio=DIRECTORIO_SNAPSHOTS):
+    return os.path.join(directorio, "catalogos.json")
+
+
+def leer(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir(ruta, documento):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(documento, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def refrescar(directorio=DIRECTORIO_SNAPSHOTS, forzar=False):
+    """
+    Pregunta a index.php si cambió y guarda el resultado en disco.
+    Regresa (documento, estado) con estado "304", "mismo_hash" o "nuevo".
+    Lanza excepción si el sitio falla o la página no trae ningún catálogo.
+    """
+    from horarios.sitio import consultar_index
+
+    ruta = ruta_catalogos(directorio)
+    previo = None if forzar else leer(ruta)
+    respuesta = consultar_index(*((previo.get("etag"), previo.get("modificado")) if previo else (None, None)))
+
+    if respuesta.status_code == 304 and previo:
+        documento, estado = previo, "304"
+    else:
+        huella = hashlib.sha1(respuesta.content).hexdigest()
+        if previo and previo.get("sha1") == huella:
+            documento, estado = previo, "mismo_hash"
+        else:
+            catalogos = extraer_catalogos(respuesta.text)
+            if not catalogos:
+                raise ValueError("index.php no trae ningún catálogo")
+            documento, estado = {
+                "descargado": datetime.now().isoformat(timespec="seconds"),
+                "sha1": huella,
+                "catalogos": catalogos,
+            }, "nuevo"
+        documento["etag"] = respuesta.headers.get("ETag")
+        documento["modificado"] = respuesta.headers.get("Last-Modified")
+
+    documento["verificado"] = time.time()
+    _escribir(ruta, documento)
+    logger.info("Catálogos: %s (%s)", estado,
+                ", ".join(f"{k}={len(v)}" for k, v in documento["catalogos"].items()))
+    return documento, estado
+
+
+# ==========================================
+# ACCESO
+# ==========================================
+
+_documentos = {}
+_refrescando = {}   # directorio -> Event del refresco en curso
+_lock = threading.Lock()
+
+
+def _vigente(documento):
+    return documento is not None and time.time() - documento.get("verificado", 0) < VIGENCIA_CATALOGOS_HORAS * 3600
+
+
+def _completar(documento):
+    documento["completos"] = {**RESPALDO, **documento["catalogos"]}
+    return documento
+
+
+def _refrescar_y_publicar(llave, evento):
+    """Refresca desde el sitio (fuera del lock) y publica el resultado en memoria."""
+    documento = None
+    try:
+        documento, _ = refrescar(llave)
+    except Exception as e:
+        logger.warning("No se pudieron refrescar los catálogos: %s", e)
+    finally:
+        with _lock:
+            if documento is None:
+                # No insistir en cada rerun: volver a probar en REINTENTO_SEGUNDOS
+                documento = dict(_documentos.get(llave) or {"catalogos": {}},
+                                 verificado=time.time() - VIGENCIA_CATALOGOS_HORAS * 3600 + REINTENTO_SEGUNDOS)
+            _documentos[llave] = _completar(documento)
+            _refrescando.pop(llave, None)
+        evento.set()
+
+
+def catalogos(directorio=DIRECTORIO_SNAPSHOTS):
+    """
+    Catálogos vigentes: memoria del proceso -> disco -> sitio (condicional).
+    Siempre regresa todas las llaves de SELECTS; lo que el sitio no trae
+    sale del respaldo fijo. Es compartido: no modificarlo.
+
+    Al vencer, una sola sesión refresca en un hilo y todas siguen con lo
+    que ya había; solo si no hay nada (ni en disco) se espera al sitio.
+    """
+    llave = directorio
+    documento = _documentos.get(llave)
+    if _vigente(documento):
+        return documento["completos"]
+    with _lock:
+        documento = _documentos.get(llave)
+        if _vigente(documento):
+            return documento["completos"]
+        evento = _refrescando.get(llave)
+        lider = evento is None
+        if lider:
+            # Otro proceso (crawler, CLI) pudo haberlos refrescado en disco
+            en_disco = leer(ruta_catalogos(directorio))
+            if en_disco is not None and (documento is None or _vigente(en_disco)):
+                documento = _documentos[llave] = _completar(en_disco)
+                if _vigente(documento):
+                    return documento["completos"]
+            evento = _refrescando[llave] = threading.Event()
+
+    if documento is not None:
+        # Vencidos pero servibles: se refrescan en segundo plano
+        if lider:
+            threading.Thread(target=_refrescar_y_publicar, args=(llave, evento),
+                             name="catalogos", daemon=True).start()
+        return documento["completos"]
+    if lider:
+        _refrescar_y_publicar(llave, evento)
+    else:
+        evento.wait()
+    return _documentos[llave]["completos"]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Descargar (si cambiaron) los catálogos de index.php.")
+    ap.add_argument("--salida", default=DIRECTORIO_SNAPSHOTS)
+    ap.add_argument("--forzar", action="store_true", help="Ignorar ETag/hash y volver a parsear")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    documento, estado = refrescar(args.salida, forzar=args.forzar)
+    print(f"{ruta_catalogos(args.salida)}: {estado}")
+    for nombre, catalogo in documento["catalogos"].items():
+        print(f"  {nombre:16} {len(catalogo)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,328 @@
+"""
+Capa de conexión compartida con el servidor de escolares.
+
+Todas las consultas del proceso pasan por una sola sesión de `requests`
+con pool de conexiones keep-alive por host, gzip negociado, reintentos con
+backoff aleatorio (jitter) dentro de un presupuesto de tiempo y
+estadísticas de latencia por endpoint.
+
+Además se limita el número de peticiones simultáneas al servidor y se usa
+un interruptor (circuit breaker) por host: tras varias fallas seguidas se
+deja de consultar un rato para no castigar al origen.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from horarios import metricas
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+TIMEOUT_CONEXION = 5      # segundos para abrir el socket / TLS
+TIMEOUT_LECTURA = 15      # segundos máximos esperando la respuesta
+MAX_INTENTOS = 3
+PRESUPUESTO_SEGUNDOS = 25  # tiempo total permitido incluyendo reintentos
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 4.0
+POOL_CONEXIONES = 32       # conexiones vivas por host
+MAX_CONCURRENTES = 8       # peticiones simultáneas al origen (todo el proceso)
+FALLAS_PARA_ABRIR = 5      # fallas seguidas que abren el circuito
+ENFRIAMIENTO_SEGUNDOS = 30  # tiempo con el circuito abierto antes de volver a probar
+
+# Errores del servidor que vale la pena reintentar
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ErrorReintentable(requests.HTTPError):
+    """Respuesta HTTP transitoria (5xx / 429)."""
+
+
+class CircuitoAbierto(requests.ConnectionError):
+    """El origen viene fallando; no se intenta la petición."""
+
+
+# ==========================================
+# SESIÓN COMPARTIDA
+# ==========================================
+
+_sesion = None
+_lock_sesion = threading.Lock()
+
+
+def obtener_sesion():
+    """Regresa la sesión HTTP del proceso (se crea una sola vez)."""
+    global _sesion
+    if _sesion is None:
+        with _lock_sesion:
+            if _sesion is None:
+                sesion = requests.Session()
+                # max_retries=0: los reintentos los controlamos nosotros (con presupuesto)
+                adaptador = HTTPAdapter(
+                    pool_connections=4, pool_maxsize=POOL_CONEXIONES, max_retries=0
+                )
+                sesion.mount("https://", adaptador)
+                sesion.mount("http://", adaptador)
+                sesion.headers["Accept-Encoding"] = "gzip, deflate"
+                sesion.headers["Connection"] = "keep-alive"
+                _sesion = sesion
+    return _sesion
+
+
+# ==========================================
+# LIMITADOR DE CONCURRENCIA E INTERRUPTOR
+# ==========================================
+
+_limitador = threading.BoundedSemaphore(MAX_CONCURRENTES)
+_en_curso = 0
+_lock_en_curso = threading.Lock()
+
+
+def peticiones_en_curso():
+    """Turnos del limitador ocupados ahora (la precarga cede si quedan pocos)."""
+    return _en_curso
+
+
+def _ocupar(delta):
+    global _en_curso
+    with _lock_en_curso:
+        _en_curso += delta
+
+
+class Interruptor:
+    """
+    Circuit breaker simple por host.
+    cerrado -> (N fallas seguidas) -> abierto -> (enfriamiento) -> semiabierto
+    En semiabierto pasa UNA petición de prueba: si sale bien se cierra.
+    """
+
+    def __init__(self, fallas_para_abrir=FALLAS_PARA_ABRIR, enfriamiento=ENFRIAMIENTO_SEGUNDOS):
+        self.fallas_para_abrir = fallas_para_abrir
+        self.enfriamiento = enfriamiento
+        self.fallas_seguidas = 0
+        self.abierto_desde = None
+        self.probando = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self.abierto_desde is None:
+                return True
+            if time.monotonic() - self.abierto_desde < self.enfriamiento or self.probando:
+                return False
+            self.probando = True  # semiabierto: dejamos pasar una sola prueba
+            return True
+
+    def exito(self):
+        with self._lock:
+            self.fallas_seguidas = 0
+            self.abierto_desde = None
+            self.probando = False
+
+    def falla(self):
+        with self._lock:
+            self.fallas_seguidas += 1
+            if self.probando or self.fallas_seguidas >= self.fallas_para_abrir:
+                if self.abierto_desde is None:
+                    logger.warning("Circuito abierto tras %d fallas seguidas", self.fallas_seguidas)
+                self.abierto_desde = time.monotonic()
+            self.probando = False
+
+    def soltar(self):
+        """Libera la prueba del semiabierto sin juzgar al origen (la petición falló de nuestro lado)."""
+        with self._lock:
+            self.probando = False
+
+    def estado(self):
+        with self._lock:
+            if self.abierto_desde is None:
+                return "cerrado"
+            if self.probando or time.monotonic() - self.abierto_desde >= self.enfriamiento:
+                return "semiabierto"
+            return "abierto"
+
+
+_interruptores = {}
+_lock_interruptores = threading.Lock()
+
+
+def _interruptor(url):
+    host = urlsplit(url).netloc
+    with _lock_interruptores:
+        if host not in _interruptores:
+            _interruptores[host] = Interruptor()
+        return _interruptores[host]
+
+
+def estado_circuitos():
+    """Diccionario host -> 'cerrado' / 'abierto' / 'semiabierto'."""
+    with _lock_interruptores:
+        return {host: i.estado() for host, i in _interruptores.items()}
+
+
+def origen_disponible(url):
+    """False si el circuito del host está abierto (el origen viene fallando)."""
+    return _interruptor(url).estado() != "abierto"
+
+
+# ==========================================
+# ESTADÍSTICAS DE LATENCIA
+# ==========================================
+
+class EstadisticaEndpoint:
+    """Acumula latencias y errores de un endpoint (ej: 'taller.php')."""
+
+    def __init__(self, muestras_max=500):
+        self.llamadas = 0
+        self.errores = 0
+        self.reintentos = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.muestras = deque(maxlen=muestras_max)
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos, ok):
+        with self._lock:
+            self.llamadas += 1
+            if not ok:
+                self.errores += 1
+            self.total_s += segundos
+            self.max_s = max(self.max_s, segundos)
+            self.muestras.append(segundos)
+
+    def contar_reintento(self):
+        with self._lock:
+            self.reintentos += 1
+
+    def percentil(self, p):
+        with self._lock:
+            ordenadas = sorted(self.muestras)
+        if not ordenadas:
+            return 0.0
+        idx = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[idx]
+
+    def resumen(self):
+        return {
+            "llamadas": self.llamadas,
+            "errores": self.errores,
+            "reintentos": self.reintentos,
+            "promedio_ms": round(1000 * self.total_s / self.llamadas, 1) if self.llamadas else 0.0,
+            "p50_ms": round(1000 * self.percentil(50), 1),
+            "p95_ms": round(1000 * self.percentil(95), 1),
+            "max_ms": round(1000 * self.max_s, 1),
+        }
+
+
+_estadisticas = {}
+_lock_estadisticas = threading.Lock()
+
+
+def _estadistica(endpoint):
+    with _lock_estadisticas:
+        if endpoint not in _estadisticas:
+            _estadisticas[endpoint] = EstadisticaEndpoint()
+        return _estadisticas[endpoint]
+
+
+def resumen_latencias():
+    """Diccionario endpoint -> métricas (llamadas, errores, p50, p95...)."""
+    with _lock_estadisticas:
+        return {ep: est.resumen() for ep, est in sorted(_estadisticas.items())}
+
+
+# ==========================================
+# PETICIONES CON REINTENTO
+# ==========================================
+
+def _espera_backoff(intento, respuesta=None):
+    """Backoff exponencial con 'full jitter'; respeta Retry-After si viene."""
+    espera = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (intento - 1))))
+    if respuesta is not None:
+        retry_after = respuesta.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            espera = max(espera, float(retry_after))
+    return espera
+
+
+def solicitar(metodo, url, endpoint=None, idempotente=True, presupuesto=PRESUPUESTO_SEGUNDOS, **kwargs):
+    """
+    Hace la petición con la sesión compartida.
+    Reintenta errores de red y 5xx/429 solo si la consulta es idempotente
+    y mientras quede presupuesto de tiempo. Lanza la última excepción si falla.
+    Si el circuito del host está abierto lanza CircuitoAbierto sin consultar.
+    """
+    endpoint = endpoint or url.rsplit("/", 1)[-1]
+    estadistica = _estadistica(endpoint)
+    interruptor = _interruptor(url)
+    sesion = obtener_sesion()
+    intentos = MAX_INTENTOS if idempotente else 1
+    inicio = time.monotonic()
+
+    for intento in range(1, intentos + 1):
+        restante = presupuesto - (time.monotonic() - inicio)
+        timeout = (TIMEOUT_CONEXION, max(1.0, min(TIMEOUT_LECTURA, restante)))
+        # Esperar turno en el limitador global (cuenta dentro del presupuesto)
+        if not _limitador.acquire(timeout=max(0.0, restante)):
+            raise requests.Timeout(f"Demasiadas consultas simultáneas a {endpoint}")
+        _ocupar(1)
+        respuesta = None
+        espera = None
+        try:
+            if not interruptor.permitir():
+                raise CircuitoAbierto(f"El servidor no responde; se reintentará en {interruptor.enfriamiento}s")
+            t0 = time.monotonic()
+            try:
+                respuesta = sesion.request(metodo, url, timeout=timeout, **kwargs)
+                metricas.observar("origen_segundos", time.monotonic() - t0, endpoint=endpoint, estado=respuesta.status_code)
+                if respuesta.status_code in ESTADOS_REINTENTABLES:
+                    raise ErrorReintentable(f"{respuesta.status_code} en {endpoint}", response=respuesta)
+                respuesta.raise_for_status()
+                estadistica.registrar(time.monotonic() - t0, ok=True)
+                interruptor.exito()
+                return respuesta
+            except (requests.ConnectionError, requests.Timeout, ErrorReintentable) as e:
+                estadistica.registrar(time.monotonic() - t0, ok=False)
+                if respuesta is None:
+                    metricas.observar("origen_segundos", time.monotonic() - t0, endpoint=endpoint, estado=type(e).__name__)
+                interruptor.falla()
+                espera = _espera_backoff(intento, respuesta)
+                transcurrido = time.monotonic() - inicio
+                if intento >= intentos or transcurrido + espera >= presupuesto:
+                    raise
+                estadistica.contar_reintento()
+                metricas.contar("reintentos", endpoint=endpoint)
+                logger.warning("Reintento %d de %s tras %s (espera %.2fs)", intento, endpoint, e, espera)
+            except requests.RequestException:
+                # 4xx u otros errores: no tiene caso reintentar (el origen sí respondió)
+                estadistica.registrar(time.monotonic() - t0, ok=False)
+                interruptor.exito()
+                raise
+            except BaseException:
+                # Error de nuestro lado (decodificación, Ctrl-C, adaptador...): no dice
+                # nada del origen, pero no puede dejar tomada la prueba del semiabierto
+                interruptor.soltar()
+                raise
+        finally:
+            _ocupar(-1)
+            _limitador.release()
+        # El backoff se duerme fuera del limitador para no acaparar turnos
+        time.sleep(espera)
+
+
+def post(url, data=None, endpoint=None, **kwargs):
+    """POST de consulta (taller.php, LipHorarios.php...). Se considera idempotente."""
+    return solicitar("POST", url, endpoint=endpoint, data=data, **kwargs)
+
+
+def get(url, endpoint=None, **kwargs):
+    return solicitar("GET", url, endpoint=endpoint, **kwargs)
@@ -0,0 +1,72 @@
+"""
+Configuración del sitio de escolares y catálogos fijos.
+"""
+import os
+
+# ==========================================
+# 1. CONFIGURACIÓN Y CONSTANTES
+# ==========================================
+
+# HORARIOS_URL_BASE apunta la app a otro servidor (p. ej. el simulado de bench/servidor.py)
+URL_BASE = os.environ.get("HORARIOS_URL_BASE", "https://escolares.arq.unam.mx:8086/horario/arquitectura/plan17").rstrip("/")
+CICLO_ACTUAL = "20262"  # Ajustar según la fecha
+
+# Snapshots locales de la oferta (crawler + almacén SQLite)
+DIRECTORIO_SNAPSHOTS = os.environ.get("HORARIOS_SNAPSHOTS", "snapshots")
+VIGENCIA_SNAPSHOT_HORAS = float(os.environ.get("HORARIOS_VIGENCIA_HORAS", "24"))
+# Catálogos de index.php guardados en disco: antes de esto no se vuelve a preguntar al sitio
+VIGENCIA_CATALOGOS_HORAS = float(os.environ.get("HORARIOS_VIGENCIA_CATALOGOS_HORAS", "6"))
+# Precarga en segundo plano de las búsquedas que suelen seguir (horarios/precarga.py); 0 la apaga
+PRECARGA_ACTIVA = os.environ.get("HORARIOS_PRECARGA", "1") != "0"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": f"{URL_BASE}/index.php"
+}
+
+# ==========================================
+# 2. CATÁLOGOS DE DATOS (Diccionarios)
+# ==========================================
+# Respaldo si index.php no responde: los catálogos vigentes se leen del
+# sitio (horarios/catalogos.py) y sustituyen a estos.
+
+CATALOGOS = {
+    "TALLERES": {
+        "- TODOS -": 0,  # <--- AGREGADO NUEVO
+        "ANTONIO GARCÍA GAYOU": 3, "CARLOS LAZO BARREIRO": 8, "CARLOS LEDUC MONTAÑO": 11,
+        "HANNES MEYER": 13, "JORGE GONZÁLEZ REYNA": 5, "JOSÉ VILLAGRÁN GARCÍA": 4,
+        "JUAN O GORMAN": 16, "LUIS BARRAGÁN": 7, "MAX CETTO": 15, "TALLER UNO": 10,
+        "DOMINGO GARCÍA RAMOS": 2, "EHECATL 21": 14, "FEDERICO MARISCAL Y PIÑA": 6,
+        "JOSÉ REVUELTAS": 17, "RAMÓN MARCOS NORIEGA": 9, "TALLER TRES": 12
+    },
+    "AREAS_OPTATIVAS": {
+        "- TODAS LAS ÁREAS -": 0, # <--- AGREGADO NUEVO
+        "Extensión Universitaria": 40, "Proyecto": 41, "Tecnología": 42,
+        "Teoría Historia": 43, "Urbano Ambiental": 44
+    },
+    "LIPS": {
+        "- TODAS LAS LÍNEAS -": 0, # <--- AGREGADO NUEVO
+        "CRITICA Y REFLEXION": 4110, "CULTURA Y CONSER.DEL PAT": 4111,
+        "DISEÑO DEL HABIT.Y MED.AM": 4112, "ESTRUCT.Y TECNOL.CONSTRU": 4113,
+        "EXPRESIVIDAD ARQUITECTONI": 4114, "GERENCIA DE PROYECTOS": 4115,
+        "GEST.EN LA PROD.DEL HABIT": 4116, "PROCESO PROYECTUAL": 4117
+    },
+    # Nota: Para Asignaturas y Profesores, lo ideal es scrapear la lista completa al inicio.
+    # Aquí pongo algunos ejemplos basados en tu input para que funcione el demo.
+    "ASIGNATURAS_COMUNES": {
+        "1135 - ARQUEOLOGIA DEL HABITAT I": 1135,
+        "1137 - GEOMETRIA I": 1137,
+        "1140 - TALLER INTEGRAL I": 1140,
+        "1555 - TALLER INTEGRAL III": 1555,
+        "1238 - SISTEMAS AMBIENTALES II": 1238
+    },
+    # Nota: El value del profesor debe ser exactamente el string largo (RFC|NOMBRE)
+    "PROFESORES_EJEMPLO": {
+        "ABUD RAMIREZ RAMON": "AURR6106285A0|ABUD RAMIREZ RAMON, MTRO.",
+        "AGUADO VILLARCE ARTURO": "AUVA530411PQ0|AGUADO VILLARCE ARTURO, ARQ.",
+        "CALDERON KLUCZYNSKI JOSE": "CAKJ6204196I5|CALDERON KLUCZYNSKI JOSE, MTRO.",
+        "MIRANDA CRUZ JOSE": "MICJ510803UV6|MIRANDA CRUZ JOSE, ARQ."
+    }
+}
@@ -0,0 +1,155 @@
+"""
+Motor de choques con máscaras de bits.
+
+Cada oferta se codifica como 6 enteros (uno por día, Lunes..Sábado) donde
+el bit i indica que hay clase en el slot de media hora i. Saber si dos
+ofertas chocan es un AND por día; los choques se regresan como registros
+(qué materias, qué día, qué slots) en lugar de textos sueltos.
+
+Para tablas de resultados (miles de filas) las máscaras van en un arreglo
+(n, 6) de int64 y el choque contra el horario actual es un AND vectorizado.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from horarios.horario import DIAS, interpretar_slots, slot_a_texto
+
+NUM_DIAS = len(DIAS)
+
+# Columnas con las máscaras por día en la tabla compacta de ofertas (horarios/oferta.py)
+COLUMNAS_MASCARA = ["m_lu", "m_ma", "m_mi", "m_ju", "m_vi", "m_sa"]
+
+# materia_a / materia_b: ids de las materias; dia: 0 = Lunes; slots: tupla de slots en choque
+Conflicto = namedtuple("Conflicto", ["materia_a", "materia_b", "dia", "slots"])
+
+
+@lru_cache(maxsize=8192)
+def mascaras_de_bloques(bloques):
+    """Tupla de Bloques -> tupla de 6 máscaras (una por día)."""
+    mascaras = [0] * NUM_DIAS
+    for dia, inicio, fin in bloques:
+        mascaras[dia] |= ((1 << (fin - inicio)) - 1) << inicio
+    return tuple(mascaras)
+
+
+def mascaras_de(materia):
+    """
+    Máscaras de una materia de mi_horario o de una fila de la oferta. Usa
+    las columnas de la tabla compacta o 'Bloques' si ya vienen; si no,
+    interpreta el texto del horario.
+    """
+    if COLUMNAS_MASCARA[0] in materia:
+        return tuple(int(materia[c]) for c in COLUMNAS_MASCARA)
+    bloques = materia.get("Bloques")
+    if bloques is None:
+        bloques = interpretar_slots(materia.get("Horario", ""))
+    return mascaras_de_bloques(bloques)
+
+
+def slots_de_mascara(mascara):
+    """Índices de los bits encendidos, de menor a mayor."""
+    slots = []
+    while mascara:
+        bajo = mascara & -mascara
+        slots.append(bajo.bit_length() - 1)
+        mascara ^= bajo
+    return slots
+
+
+def chocan(mascaras_a, mascaras_b):
+    """True si dos ofertas comparten al menos un slot."""
+    return any(a & b for a, b in zip(mascaras_a, mascaras_b))
+
+
+def union(lista_mascaras):
+    """OR por día de varias ofertas (el horario completo)."""
+    total = [0] * NUM_DIAS
+    for mascaras in lista_mascaras:
+        for dia in range(NUM_DIAS):
+            total[dia] |= mascaras[dia]
+    return tuple(total)
+
+
+def detectar_conflictos(lista_materias):
+    """
+    Choques por pares entre las materias de un horario.
+    Regresa una lista de Conflicto (un registro por par y día).
+    """
+    codificadas = [(m["id"], mascaras_de(m)) for m in lista_materias]
+    conflictos = []
+    acumulado = [0] * NUM_DIAS
+    for i, (id_b, mascaras_b) in enumerate(codificadas):
+        # Atajo: si no toca nada de lo anterior, no hay que comparar por pares
+        if any(acumulado[d] & mascaras_b[d] for d in range(NUM_DIAS)):
+            for id_a, mascaras_a in codificadas[:i]:
+                for dia in range(NUM_DIAS):
+                    comun = mascaras_a[dia] & mascaras_b[dia]
+                    if comun:
+                        conflictos.append(Conflicto(id_a, id_b, dia, tuple(slots_de_mascara(comun))))
+        for dia in range(NUM_DIAS):
+            acumulado[dia] |= mascaras_b[dia]
+    return conflictos
+
+
+def matriz_mascaras(horarios):
+    """
+    Textos de horario -> arreglo (n, 6) int64 con las máscaras por día.
+    Cada texto distinto se interpreta una sola vez (suelen repetirse mucho).
+    Si viene una tabla compacta de ofertas usa sus columnas tal cual.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(horarios, pd.DataFrame):
+        if COLUMNAS_MASCARA[0] in horarios.columns:
+            return horarios[COLUMNAS_MASCARA].to_numpy(dtype=np.int64)
+        horarios = horarios["Horario"] if "Horario" in horarios.columns else [""] * len(horarios)
+
+    horarios = pd.Series(horarios)
+    if isinstance(horarios.dtype, pd.CategoricalDtype):
+        # Ya vienen factorizados; el código -1 (NaN) cae en la fila vacía del final
+        codigos, unicos = horarios.cat.codes.to_numpy(), list(horarios.cat.categories) + [""]
+    else:
+        codigos, unicos = pd.factorize(horarios.astype(object).fillna(""))
+    tabla = np.array(
+        [mascaras_de_bloques(interpretar_slots(texto)) for texto in unicos], dtype=np.int64
+    ).reshape(-1, NUM_DIAS)
+    return tabla[codigos]
+
+
+def choques_con_horario(ofertas, lista_materias):
+    """
+    Para cada fila de `ofertas` (tabla de resultados o textos de horario),
+    id de la primera materia de `lista_materias` con la que choca ("" si
+    con ninguna). Arreglo de objetos de largo n.
+    """
+    import numpy as np
+
+    resultado = np.full(len(ofertas), "", dtype=object)
+    if not lista_materias or not len(ofertas):
+        return resultado
+    filas = matriz_mascaras(ofertas)
+    total = np.array(union(mascaras_de(m) for m in lista_materias), dtype=np.int64)
+    pendientes = (filas & total).any(axis=1)
+    # Solo las filas que tocan algo se comparan materia por materia
+    for materia in lista_materias:
+        if not pendientes.any():
+            break
+        choca = pendientes & (filas & np.array(mascaras_de(materia), dtype=np.int64)).any(axis=1)
+        resultado[choca] = materia["id"]
+        pendientes &= ~choca
+    return resultado
+
+
+def describir(conflicto):
+    """Texto para la interfaz: 'A choca con B el Martes 13:00-14:30'."""
+    rangos = []
+    inicio = previo = conflicto.slots[0]
+    for slot in conflicto.slots[1:] + (None,):
+        if slot is not None and slot == previo + 1:
+            previo = slot
+            continue
+        rangos.append(f"{slot_a_texto(inicio)}-{slot_a_texto(previo + 1)}")
+        if slot is not None:
+            inicio = previo = slot
+    return f"{conflicto.materia_a} choca con {conflicto.materia_b} el {DIAS[conflicto.dia]} {', '.join(rangos)}"
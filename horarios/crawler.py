@@ -0,0 +1,278 @@
+"""
+Crawler del ciclo completo.
+
+Enumera todas las consultas que puede hacer la app (talleres x semestres,
+complementarios, optativas por área y por LIP, género, cada asignatura y
+cada profesor), las descarga en paralelo respetando un límite de cortesía
+y escribe un snapshot normalizado de la oferta del ciclo.
+
+Uso:
+    python -m horarios.crawler 20262 --salida snapshots --precalentar
+
+Además del snapshot (JSON) se construye el almacén SQLite que usa la app.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from horarios import almacen, cache, catalogos
+from horarios.config import CATALOGOS, CICLO_ACTUAL, DIRECTORIO_SNAPSHOTS
+from horarios.oferta import compactar
+from horarios.ingesta import lote_a_df, parsear_en_paralelo, procesos_disponibles
+from horarios.parser import parsear_html_generico
+from horarios.sitio import armar_payload, descargar_html
+
+logger = logging.getLogger(__name__)
+
+SEMESTRES = range(0, 11)                 # 0 = todos los semestres
+SEMESTRES_COMPLEMENTARIOS = range(1, 11)
+TALLER_COMPLEMENTARIOS = 18
+TALLER_OPTATIVAS = 19
+
+CONCURRENCIA = 4              # descargas simultáneas
+PETICIONES_POR_SEGUNDO = 4.0  # ritmo máximo de arranque de peticiones
+
+CAMPOS = ["Clave", "Materia", "Grupo", "Profesor", "Horario", "Agrupación", "Turno"]
+
+Consulta = namedtuple("Consulta", ["endpoint", "payload", "tipo_parseo"])
+
+
+# ==========================================
+# ENUMERACIÓN DE CONSULTAS
+# ==========================================
+
+def consultas_base(catalogo=CATALOGOS):
+    """Todo lo que se puede pedir sin profesores ni asignaturas (talleres, áreas, LIPs)."""
+    consultas = []
+    for id_taller in catalogo["TALLERES"].values():
+        for semestre in SEMESTRES:
+            consultas.append(Consulta("taller.php", {"tal": id_taller, "talsem": semestre}, "ESTANDAR"))
+    for semestre in SEMESTRES_COMPLEMENTARIOS:
+        consultas.append(Consulta("taller.php", {"tal": TALLER_COMPLEMENTARIOS, "talsem": semestre}, "ESTANDAR"))
+    for id_area in catalogo["AREAS_OPTATIVAS"].values():
+        consultas.append(Consulta("taller.php", {"tal": TALLER_OPTATIVAS, "talsem": id_area}, "ESTANDAR"))
+    for id_lip in catalogo["LIPS"].values():
+        consultas.append(Consulta("LipHorarios.php", {"tal": TALLER_OPTATIVAS, "talsem": id_lip}, "ESTANDAR"))
+    consultas.append(Consulta("genero.php", {"tal": 18, "talsem": 20}, "GENERO"))
+    return consultas
+
+
+def consultas_profesores(profesores):
+    return [Consulta("profe.php", {"idprof": valor}, "PROFESOR") for valor in profesores]
+
+
+def consultas_asignaturas(claves):
+    return [Consulta("asignatura.php", {"asig": clave}, "ASIGNATURA_CONTEXTO") for clave in claves]
+
+
+# ==========================================
+# DESCARGA EN PARALELO
+# ==========================================
+
+class LimiteCortesia:
+    """Espacia el arranque de peticiones para no saturar al servidor."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def descargar_todas(consultas, ciclo, concurrencia=CONCURRENCIA, por_segundo=PETICIONES_POR_SEGUNDO, procesos=1):
+    """
+    Descarga y parsea cada consulta. Regresa lista de (consulta, DataFrame o None, error o None)
+    en el mismo orden de `consultas`.
+    Con procesos > 1 los hilos solo descargan y el parseo se reparte en un
+    pool de procesos (ver horarios/ingesta.py).
+    """
+    limite = LimiteCortesia(por_segundo)
+    resultados = [None] * len(consultas)
+
+    def tarea(consulta):
+        limite.esperar()
+        html = descargar_html(consulta.endpoint, consulta.payload, ciclo)
+        if procesos > 1:
+            return html
+        return parsear_html_generico(html, consulta.tipo_parseo)
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="crawler") as pool:
+        futuros = {pool.submit(tarea, c): i for i, c in enumerate(consultas)}
+        for hechos, futuro in enumerate(as_completed(futuros), 1):
+            i = futuros[futuro]
+            try:
+                resultados[i] = (consultas[i], futuro.result(), None)
+            except Exception as e:
+                logger.warning("Falló %s %s: %s", consultas[i].endpoint, consultas[i].payload, e)
+                resultados[i] = (consultas[i], None, str(e))
+            if hechos % 25 == 0 or hechos == len(consultas):
+                logger.info("%d/%d consultas", hechos, len(consultas))
+
+    if procesos > 1:
+        descargadas = [i for i, r in enumerate(resultados) if r[2] is None]
+        lotes = parsear_en_paralelo([(resultados[i][1], consultas[i].tipo_parseo) for i in descargadas], procesos)
+        for i, lote in zip(descargadas, lotes):
+            if lote.error is not None:
+                logger.warning("No se pudo parsear %s %s: %s", consultas[i].endpoint, consultas[i].payload, lote.error)
+                resultados[i] = (consultas[i], None, lote.error)
+            else:
+                resultados[i] = (consultas[i], lote_a_df(lote), None)
+    return resultados
+
+
+# ==========================================
+# SNAPSHOT NORMALIZADO
+# ==========================================
+
+def filas_normalizadas(df):
+    """Filas de un resultado como tuplas en el orden de CAMPOS (texto, sin nulos)."""
+    return list(df.reindex(columns=CAMPOS).fillna("").itertuples(index=False, name=None))
+
+
+def normalizar(resultados, ciclo):
+    """
+    Une todos los resultados en una sola tabla de ofertas sin repetidos.
+    Cada consulta guarda solo los índices de sus filas, así la app puede
+    responder cualquier búsqueda desde el snapshot.
+    """
+    ofertas = []
+    indice = {}
+    consultas = []
+    errores = []
+
+    for consulta, df, error in resultados:
+        registro = {
+            "endpoint": consulta.endpoint,
+            "payload": consulta.payload,
+            "tipo_parseo": consulta.tipo_parseo,
+            "clave": cache.clave_consulta(consulta.endpoint, armar_payload(consulta.payload, ciclo), consulta.tipo_parseo),
+        }
+        if error is not None:
+            errores.append({**registro, "error": error})
+            continue
+        filas = []
+        for fila in filas_normalizadas(df):
+            if fila not in indice:
+                indice[fila] = len(ofertas)
+                ofertas.append(dict(zip(CAMPOS, fila)))
+            filas.append(indice[fila])
+        consultas.append({**registro, "filas": filas})
+
+    return {
+        "ciclo": ciclo,
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "ofertas": ofertas,
+        "consultas": consultas,
+        "errores": errores,
+    }
+
+
+def ruta_snapshot(directorio, ciclo):
+    return os.path.join(directorio, f"oferta_{ciclo}.json.gz")
+
+
+def guardar_snapshot(snapshot, ruta):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp"
+    with gzip.open(temporal, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def leer_snapshot(ruta):
+    with gzip.open(ruta, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def precalentar_cache(resultados, ciclo):
+    """Mete cada DataFrame (compacto, como lo guarda la app) en la caché compartida con la misma clave."""
+    compartida = cache.cache_compartida()
+    for consulta, df, error in resultados:
+        if error is None:
+            clave = cache.clave_consulta(consulta.endpoint, armar_payload(consulta.payload, ciclo), consulta.tipo_parseo)
+            compartida.guardar(clave, compactar(df))
+
+
+# ==========================================
+# PUNTO DE ENTRADA
+# ==========================================
+
+def rastrear_ciclo(ciclo=CICLO_ACTUAL, concurrencia=CONCURRENCIA, por_segundo=PETICIONES_POR_SEGUNDO,
+                   incluir_profesores=True, incluir_asignaturas=True, procesos=1):
+    """
+    Rastrea el ciclo completo y regresa (snapshot, resultados crudos).
+    Fase 1: catálogos de index.php + consultas fijas + una por profesor.
+    Fase 2: una consulta por cada asignatura del catálogo o vista en la fase 1.
+    """
+    inicio = time.monotonic()
+    cats = catalogos.catalogos()
+    consultas = consultas_base(cats)
+    if incluir_profesores:
+        if not cats["PROFESORES"]:
+            logger.warning("No se pudo leer el catálogo de profesores")
+        consultas += consultas_profesores(cats["PROFESORES"].values())
+
+    logger.info("Fase 1: %d consultas", len(consultas))
+    resultados = descargar_todas(consultas, ciclo, concurrencia, por_segundo, procesos)
+
+    if incluir_asignaturas:
+        claves = set(CATALOGOS["ASIGNATURAS_COMUNES"].values()) | {c for c in cats["ASIGNATURAS"].values() if isinstance(c, int)}
+        for _, df, error in resultados:
+            if error is None and "Clave" in df.columns:
+                claves.update(int(c) for c in df["Clave"] if str(c).isdigit())
+        logger.info("Fase 2: %d asignaturas", len(claves))
+        resultados += descargar_todas(consultas_asignaturas(sorted(claves)), ciclo, concurrencia, por_segundo, procesos)
+
+    snapshot = normalizar(resultados, ciclo)
+    snapshot["duracion_s"] = round(time.monotonic() - inicio, 1)
+    return snapshot, resultados
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Descarga la oferta completa de un ciclo.")
+    ap.add_argument("ciclo", nargs="?", default=CICLO_ACTUAL, help="Ciclo escolar (ej: 20262)")
+    ap.add_argument("--salida", default=DIRECTORIO_SNAPSHOTS, help="Directorio del snapshot")
+    ap.add_argument("--concurrencia", type=int, default=CONCURRENCIA)
+    ap.add_argument("--por-segundo", type=float, default=PETICIONES_POR_SEGUNDO)
+    ap.add_argument("--procesos", type=int, default=1,
+                    help="Procesos para parsear (0 = todos los núcleos); los hilos solo descargan")
+    ap.add_argument("--sin-profesores", action="store_true")
+    ap.add_argument("--sin-asignaturas", action="store_true")
+    ap.add_argument("--precalentar", action="store_true",
+                    help="Guardar también en la caché compartida (usar con HORARIOS_CACHE_DIR)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    snapshot, resultados = rastrear_ciclo(
+        args.ciclo, args.concurrencia, args.por_segundo,
+        incluir_profesores=not args.sin_profesores,
+        incluir_asignaturas=not args.sin_asignaturas,
+        procesos=args.procesos or procesos_disponibles(),
+    )
+    ruta = ruta_snapshot(args.salida, args.ciclo)
+    guardar_snapshot(snapshot, ruta)
+    almacen.construir(snapshot, almacen.ruta_almacen(args.ciclo, args.salida))
+    if args.precalentar:
+        precalentar_cache(resultados, args.ciclo)
+
+    print(f"{len(snapshot['ofertas'])} ofertas de {len(snapshot['consultas'])} consultas "
+          f"({len(snapshot['errores'])} errores) en {snapshot['duracion_s']}s -> {ruta}")
+    return 1 if snapshot["errores"] and not snapshot["consultas"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
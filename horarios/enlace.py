@@ -0,0 +1,172 @@
+"""
+Horario en un enlace: ciclo + (Clave, Grupo) de cada materia en unos
+cuantos bytes, para ?h=... en la URL.
+
+Recargar, abrir otra pestaña, reiniciar el servidor o compartir el enlace
+ya no obliga a repetir las búsquedas: restaurar() arma mi_horario con los
+datos locales (almacén del ciclo o caché compartida) sin ir al sitio.
+
+Formato (después base64 url-safe sin '='):
+    versión (1 byte) | ciclo | n | n x (clave, grupo) | CRC-32 (4 bytes)
+Cada campo es un varint: si es texto de dígitos, (entero << 4) | largo
+(así "0203" conserva el cero); si no, (bytes << 4) seguido del UTF-8.
+Un horario de 8 materias cabe en ~45 caracteres.
+
+    codigo = codificar(mi_horario)          # "AaWeAQ..."
+    materias, faltantes = restaurar(codigo)
+"""
+import base64
+import re
+import zlib
+
+from horarios.config import CICLO_ACTUAL
+
+VERSION = 1
+
+
+# Ciclo escolar: año + periodo ("20262"). Del código no se acepta otra
+# cosa: el ciclo termina en rutas de archivos (almacen.ruta_almacen)
+_CICLO = re.compile(r"\d{5}")
+
+
+class EnlaceInvalido(ValueError):
+    """El código no es de esta versión, está truncado o no pasa el CRC."""
+
+
+class EnlaceDeOtroCiclo(EnlaceInvalido):
+    """El código es válido pero de un ciclo distinto al que sirve la app."""
+
+    def __init__(self, ciclo):
+        super().__init__(f"es del ciclo {ciclo}")
+        self.ciclo = ciclo
+
+
+# ==========================================
+# CODIFICAR / DECODIFICAR
+# ==========================================
+
+def _varint(n, salida):
+    while n > 0x7F:
+        salida.append((n & 0x7F) | 0x80)
+        n >>= 7
+    salida.append(n)
+
+
+def _campo(texto, salida):
+    if texto.isdigit() and len(texto) < 16:
+        _varint(int(texto) << 4 | len(texto), salida)
+    else:
+        datos = texto.encode("utf-8")
+        _varint(len(datos) << 4, salida)
+        salida += datos
+
+
+def _leer_varint(datos, i):
+    n = desplazamiento = 0
+    while True:
+        if i >= len(datos):
+            raise EnlaceInvalido("código truncado")
+        octeto = datos[i]
+        i += 1
+        n |= (octeto & 0x7F) << desplazamiento
+        if octeto < 0x80:
+            return n, i
+        desplazamiento += 7
+
+
+def _leer_campo(datos, i):
+    n, i = _leer_varint(datos, i)
+    largo = n & 0xF
+    if largo:
+        return str(n >> 4).zfill(largo), i
+    fin = i + (n >> 4)
+    if fin > len(datos):
+        raise EnlaceInvalido("código truncado")
+    return datos[i:fin].decode("utf-8", "replace"), fin
+
+
+def codificar_grupos(ciclo, grupos):
+    """ciclo + [(clave, grupo)] -> texto para la URL."""
+    salida = bytearray([VERSION])
+    _campo(str(ciclo), salida)
+    _varint(len(grupos), salida)
+    for clave, grupo in grupos:
+        _campo(str(clave), salida)
+        _campo(str(grupo), salida)
+    salida += zlib.crc32(salida).to_bytes(4, "big")
+    return base64.urlsafe_b64encode(salida).rstrip(b"=").decode("ascii")
+
+
+def codificar(mi_horario, ciclo=CICLO_ACTUAL):
+    """mi_horario -> texto para la URL. Las materias sin Clave (sesiones viejas) se omiten."""
+    return codificar_grupos(ciclo, [(m["Clave"], m["Grupo"]) for m in mi_horario if m.get("Clave")])
+
+
+def decodificar(codigo):
+    """Texto de la URL -> (ciclo, [(clave, grupo)]). Lanza EnlaceInvalido."""
+    try:
+        datos = base64.urlsafe_b64decode(codigo + "=" * (-len(codigo) % 4))
+    except (ValueError, TypeError) as e:
+        raise EnlaceInvalido("no es base64") from e
+    if len(datos) < 6 or datos[0] != VERSION:
+        raise EnlaceInvalido("versión desconocida")
+    if zlib.crc32(datos[:-4]).to_bytes(4, "big") != datos[-4:]:
+        raise EnlaceInvalido("CRC no coincide")
+    cuerpo = datos[:-4]
+    ciclo, i = _leer_campo(cuerpo, 1)
+    if not _CICLO.fullmatch(ciclo):
+        raise EnlaceInvalido("ciclo inválido")
+    n, i = _leer_varint(cuerpo, i)
+    grupos = []
+    for _ in range(n):
+        clave, i = _leer_campo(cuerpo, i)
+        grupo, i = _leer_campo(cuerpo, i)
+        grupos.append((clave, grupo))
+    if i != len(cuerpo):
+        raise EnlaceInvalido("sobran bytes")
+    return ciclo, grupos
+
+
+# ==========================================
+# RESTAURAR SIN IR AL SITIO
+# ==========================================
+
+def _desde_cache(ciclo, clave, grupo):
+    """El grupo en la página de su asignatura, si ya está en la caché compartida."""
+    from horarios import cache
+    from horarios.sitio import armar_payload
+
+    clave_consulta = cache.clave_consulta("asignatura.php", armar_payload({"asig": clave}, ciclo), "ASIGNATURA_CONTEXTO")
+    df = cache.cache_compartida().valor(clave_consulta)
+    if df is None or "Grupo" not in df.columns:
+        return None
+    filas = df[df["Grupo"].astype(str) == grupo]
+    return None if filas.empty else filas.iloc[0]
+
+
+def restaurar(codigo, ciclo_actual=CICLO_ACTUAL):
+    """
+    Código -> (mi_horario, [(clave, grupo)] que no se encontraron), buscando
+    cada grupo en el almacén del ciclo y luego en la caché; nunca en el sitio.
+    Lanza EnlaceDeOtroCiclo si el código no es de `ciclo_actual`.
+    """
+    from horarios import almacen
+    from horarios.sesion import materia_para_horario
+
+    ciclo, grupos = decodificar(codigo)
+    if ciclo != str(ciclo_actual):
+        raise EnlaceDeOtroCiclo(ciclo)
+    local = almacen.almacen_local(ciclo)
+    materias, faltantes, vistos = [], [], set()
+    for clave, grupo in grupos:
+        fila = local.grupo(clave, grupo) if local is not None else None
+        if fila is None:
+            fila = _desde_cache(ciclo, clave, grupo)
+        if fila is None:
+            faltantes.append((clave, grupo))
+            continue
+        materia = materia_para_horario(fila)
+        if materia["id"] not in vistos:
+            vistos.add(materia["id"])
+            materias.append(materia)
+    return materias, faltantes
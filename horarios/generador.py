@@ -0,0 +1,378 @@
+"""
+Generador automático de horarios sin choques.
+
+Dada una lista de claves deseadas y la oferta de grupos, enumera
+combinaciones (un grupo por clave) sin choques con backtracking podado
+sobre máscaras de bits y regresa las mejores k según un criterio, dentro
+de un presupuesto de tiempo fijo.
+
+Trucos para que siga siendo interactivo con 8+ materias y decenas de
+grupos cada una:
+  * Cada grupo es UN entero de 6 x 48 bits (día x media hora): saber si
+    choca con lo ya elegido es un solo AND.
+  * Grupos con exactamente el mismo horario de una misma clave son
+    intercambiables: se buscan una sola vez y se listan como alternativas.
+  * En cada paso se elige la clave con menos opciones compatibles y se
+    descarta la rama en cuanto alguna clave pendiente se queda sin opciones.
+  * Se poda por cota contra la peor solución del top-k con cualquier
+    criterio: agregar grupos no quita clases, así que los huecos que ya
+    nadie puede llenar, los días que piden las claves pendientes y la
+    salida de cada día solo pueden crecer. Las opciones que ya no pueden
+    mejorar el top-k se quitan de su clave para todo el subárbol.
+"""
+import heapq
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from horarios.conflictos import NUM_DIAS, mascaras_de, mascaras_de_bloques
+from horarios.horario import SLOTS_POR_DIA, SLOTS_POR_HORA
+
+CRITERIOS = {
+    "huecos": "Menos horas muertas entre clases",
+    "salida": "Salir más temprano",
+    "dias": "Menos días con clase",
+}
+
+_MASCARA_DIA = (1 << SLOTS_POR_DIA) - 1
+
+Solucion = namedtuple("Solucion", ["puntaje", "grupos", "alternativas", "metricas"])
+Resultado = namedtuple("Resultado", ["soluciones", "completo", "nodos", "segundos", "sin_opciones"])
+
+
+# ==========================================
+# CODIFICACIÓN
+# ==========================================
+
+def mascara_semana(bloques):
+    """Tupla de Bloques -> un solo entero (día d ocupa los bits d*48 .. d*48+47)."""
+    return _semana(mascaras_de_bloques(bloques))
+
+
+def _semana(mascaras):
+    total = 0
+    for dia, mascara in enumerate(mascaras):
+        total |= mascara << (dia * SLOTS_POR_DIA)
+    return total
+
+
+def mascara_bloqueo(dias_libres=(), hora_min=None, hora_max=None):
+    """Slots donde el alumno NO quiere clase (días libres y fuera de [hora_min, hora_max))."""
+    por_dia = 0
+    if hora_min is not None:
+        por_dia |= (1 << int(hora_min * SLOTS_POR_HORA)) - 1
+    if hora_max is not None:
+        por_dia |= _MASCARA_DIA & ~((1 << int(hora_max * SLOTS_POR_HORA)) - 1)
+    total = 0
+    for dia in range(NUM_DIAS):
+        total |= (_MASCARA_DIA if dia in dias_libres else por_dia) << (dia * SLOTS_POR_DIA)
+    return total
+
+
+def metricas(ocupado):
+    """Horas muertas, días con clase, hora de salida más tardía y promedio."""
+    huecos = 0
+    dias = 0
+    salidas = []
+    for dia in range(NUM_DIAS):
+        m = (ocupado >> (dia * SLOTS_POR_DIA)) & _MASCARA_DIA
+        if not m:
+            continue
+        dias += 1
+        primero = (m & -m).bit_length() - 1
+        ultimo = m.bit_length()
+        huecos += (ultimo - primero) - bin(m).count("1")
+        salidas.append(ultimo)
+    return {
+        "horas_muertas": huecos / SLOTS_POR_HORA,
+        "dias_con_clase": dias,
+        "salida_max": max(salidas, default=0) / SLOTS_POR_HORA,
+        "salida_promedio": round(sum(salidas) / len(salidas) / SLOTS_POR_HORA, 2) if salidas else 0.0,
+    }
+
+
+# Componentes del puntaje de cada criterio, en orden de importancia
+_COMPONENTES = {
+    "huecos": ("horas_muertas", "dias_con_clase", "salida_promedio"),
+    "salida": ("salida_max", "salida_promedio", "horas_muertas"),
+    "dias": ("dias_con_clase", "horas_muertas", "salida_promedio"),
+}
+
+
+def _puntaje(ocupado, criterio):
+    """Menor es mejor. El segundo y tercer elemento desempatan."""
+    m = metricas(ocupado)
+    return tuple(m[nombre] for nombre in _COMPONENTES[criterio])
+
+
+# ==========================================
+# COTAS
+# ==========================================
+
+# Subconjuntos de días (bits) de menos a más días
+_SUBCONJUNTOS_DIAS = sorted(range(1, 1 << NUM_DIAS), key=lambda s: bin(s).count("1"))
+
+
+def _dias(ocupado):
+    """Bits de los días con clase (bit d = día d)."""
+    total = 0
+    for dia in range(NUM_DIAS):
+        if (ocupado >> (dia * SLOTS_POR_DIA)) & _MASCARA_DIA:
+            total |= 1 << dia
+    return total
+
+
+def _por_dia(ocupado):
+    """Entero de la semana -> lista con la máscara de cada día."""
+    return [(ocupado >> (dia * SLOTS_POR_DIA)) & _MASCARA_DIA for dia in range(NUM_DIAS)]
+
+
+def _estado_dia(m, libre):
+    """
+    (huecos seguros, salida, salida más temprana posible) de un día con
+    clases `m` cuando las opciones pendientes alcanzan los slots `libre`.
+    """
+    if m:
+        rango = (1 << m.bit_length()) - (m & -m)
+        return bin(rango & ~m & ~libre).count("1"), m.bit_length(), 0
+    return 0, 0, (libre & -libre).bit_length()
+
+
+def _sin_mejora_posible(estado, dias, criterio, dias_nuevos, peor):
+    """
+    True si ninguna solución que complete lo ya elegido puede ser mejor que
+    `peor`. `estado`: _estado_dia de cada día; `dias`: bits de los días con
+    clase; `dias_nuevos(dias)`: cuántos días fuera de `dias` necesitan como
+    mínimo las claves pendientes.
+    Agregar grupos nunca quita clases, solo alarga los días: los huecos que
+    nadie puede llenar y la salida de cada día ya son seguros. Las cotas se
+    comparan en el orden del puntaje y solo se calcula la que hace falta.
+    """
+    huecos = 0
+    salidas = []   # salida actual de cada día con clase
+    posibles = []  # salida más temprana de cada día sin clase que alguna opción alcanza
+    for h, salida, posible in estado:
+        huecos += h
+        if salida:
+            salidas.append(salida)
+        elif posible:
+            posibles.append(posible)
+
+    minimo_dias = None
+    maximo_dias = NUM_DIAS
+    for nombre, tope in zip(_COMPONENTES[criterio], peor):
+        if nombre == "horas_muertas":
+            cota = huecos / SLOTS_POR_HORA
+        elif nombre == "salida_max":
+            cota = max(salidas, default=0) / SLOTS_POR_HORA
+        else:
+            if minimo_dias is None:
+                minimo_dias = len(salidas) + dias_nuevos(dias)
+            if nombre == "dias_con_clase":
+                cota = minimo_dias
+                # Si empata, solo cuentan las soluciones con exactamente esos días
+                maximo_dias = tope
+            else:
+                cota = _promedio_minimo(salidas, posibles, minimo_dias, maximo_dias)
+        if cota != tope:
+            return cota > tope
+    # Empata con la peor: tampoco entraría al top-k
+    return True
+
+
+def _dias_nuevos(dias, dias_pendientes):
+    """Menos días fuera de `dias` con los que cada clave pendiente tiene alguna opción (sin ver choques)."""
+    faltan = []
+    for opciones in dias_pendientes:
+        nuevos = {d & ~dias for d in opciones}
+        if 0 not in nuevos:
+            faltan.append(nuevos)
+    if not faltan:
+        return 0
+    return next(bin(s).count("1") for s in _SUBCONJUNTOS_DIAS
+                if all(any(not n & ~s for n in nuevos) for nuevos in faltan))
+
+
+def _promedio_minimo(salidas, posibles, minimo_dias, maximo_dias):
+    """Lo más que puede bajar el promedio de salida: sumando los días nuevos que salen más temprano."""
+    posibles.sort()
+    total = sum(salidas)
+    mejor = float("inf")
+    for extra in range(len(posibles) + 1):
+        n = len(salidas) + extra
+        if n and minimo_dias <= n <= maximo_dias:
+            mejor = min(mejor, round(total / n / SLOTS_POR_HORA, 2))
+        if extra < len(posibles):
+            total += posibles[extra]
+    return mejor
+
+
+# ==========================================
+# FILTROS
+# ==========================================
+
+def _pasa_filtros(grupo, turno, taller, evitar_profesores):
+    if turno and grupo.get("Turno") not in (turno, "Indistinto", "ND", "", None):
+        return False
+    if taller and taller.upper() not in (grupo.get("Agrupación") or "").upper():
+        return False
+    profesor = (grupo.get("Profesor") or "").upper()
+    return not any(p.upper() in profesor for p in evitar_profesores if p)
+
+
+def candidatos_por_clave(ofertas, claves, bloqueo=0, ocupado=0, turno=None, taller=None, evitar_profesores=()):
+    """
+    {clave: [(mascara, [grupos con ese mismo horario]), ...]}
+    Ya sin grupos que violan restricciones o chocan con lo fijo.
+    """
+    claves = [str(c) for c in claves]
+    por_clave = {c: {} for c in claves}
+    vistos = set()
+    for grupo in ofertas:
+        clave = str(grupo.get("Clave"))
+        if clave not in por_clave:
+            continue
+        identidad = (clave, grupo.get("Grupo"))
+        if identidad in vistos:
+            continue
+        # El mismo grupo puede venir en varios contextos (taller, LIP...): se
+        # marca como visto solo cuando una de sus filas pasa los filtros
+        if not _pasa_filtros(grupo, turno, taller, evitar_profesores):
+            continue
+        # Usa las máscaras de la tabla compacta si vienen
+        mascara = _semana(mascaras_de(grupo))
+        if mascara & (bloqueo | ocupado):
+            continue
+        vistos.add(identidad)
+        por_clave[clave].setdefault(mascara, []).append(grupo)
+    return {c: list(opciones.items()) for c, opciones in por_clave.items()}
+
+
+# ==========================================
+# BÚSQUEDA
+# ==========================================
+
+def generar_horarios(ofertas, claves, k=5, criterio="huecos", presupuesto_s=1.0,
+                     turno=None, taller=None, evitar_profesores=(), dias_libres=(),
+                     hora_min=None, hora_max=None, fijos=()):
+    """
+    ofertas: iterable de dicts con Clave, Grupo, Horario (y Turno,
+    Agrupación, Profesor para los filtros). `fijos`: materias ya elegidas
+    (mismo formato que mi_horario) con las que no se puede chocar.
+    Regresa Resultado(soluciones ordenadas de mejor a peor, completo,
+    nodos visitados, segundos, claves que se quedaron sin opciones).
+    """
+    inicio = time.perf_counter()
+    limite = inicio + presupuesto_s
+
+    ocupado_fijo = 0
+    for materia in fijos:
+        ocupado_fijo |= _semana(mascaras_de(materia))
+
+    candidatos = candidatos_por_clave(
+        ofertas, claves, mascara_bloqueo(dias_libres, hora_min, hora_max), ocupado_fijo,
+        turno, taller, evitar_profesores,
+    )
+    sin_opciones = [c for c, opciones in candidatos.items() if not opciones]
+    if sin_opciones or not candidatos:
+        return Resultado([], True, 0, time.perf_counter() - inicio, sin_opciones)
+
+    # Orden fijo de prueba: primero las opciones que solas dan mejor puntaje
+    # (se calcula una vez aquí y no en cada nodo del árbol)
+    for clave in candidatos:
+        candidatos[clave].sort(key=lambda op: _puntaje(op[0], criterio))
+    partes_de = {}
+    dias_de = {}
+    for opciones in candidatos.values():
+        for mascara, _ in opciones:
+            partes_de[mascara] = [(dia, m) for dia, m in enumerate(_por_dia(mascara)) if m]
+            dias_de[mascara] = _dias(mascara)
+
+    mejores = []  # heap de (-puntaje, contador, eleccion)
+    contador = 0
+    nodos = 0
+    completo = True
+
+    def buscar(compatibles, ocupado, eleccion):
+        """`compatibles`: opciones de cada clave pendiente que no chocan con `ocupado`."""
+        nonlocal contador, nodos, completo
+        nodos += 1
+        if nodos % 512 == 0 and time.perf_counter() > limite:
+            completo = False
+            return False
+
+        if not compatibles:
+            puntaje = _puntaje(ocupado, criterio)
+            contador += 1
+            if len(mejores) < k:
+                heapq.heappush(mejores, (_negar(puntaje), contador, dict(eleccion), ocupado))
+            elif puntaje < _negar(mejores[0][0]):
+                heapq.heapreplace(mejores, (_negar(puntaje), contador, dict(eleccion), ocupado))
+            return True
+
+        if len(mejores) >= k:
+            peor = _negar(mejores[0][0])
+            alcanzable = 0
+            for opciones in compatibles.values():
+                for mascara, _ in opciones:
+                    alcanzable |= mascara
+            por_dia = _por_dia(ocupado)
+            libres = _por_dia(alcanzable)
+            estado = [_estado_dia(m, libre) for m, libre in zip(por_dia, libres)]
+            dias = _dias(ocupado)
+            dias_pendientes = [{dias_de[mascara] for mascara, _ in opciones} for opciones in compatibles.values()]
+            # Muchas opciones dejan los mismos días: se calcula una vez por combinación de días
+            dias_nuevos = lru_cache(maxsize=None)(lambda d: _dias_nuevos(d, dias_pendientes))
+            if _sin_mejora_posible(estado, dias, criterio, dias_nuevos, peor):
+                return True
+            # Quita de cada clave las opciones que ya no pueden mejorar el top-k: tampoco
+            # podrán más abajo, donde hay más ocupado y menos opciones
+            utiles = {}
+            for c, opciones in compatibles.items():
+                quedan = []
+                for mascara, grupos in opciones:
+                    hijo = estado[:]
+                    for dia, bits in partes_de[mascara]:
+                        hijo[dia] = _estado_dia(por_dia[dia] | bits, libres[dia])
+                    if not _sin_mejora_posible(hijo, dias | dias_de[mascara], criterio, dias_nuevos, peor):
+                        quedan.append((mascara, grupos))
+                if not quedan:
+                    return True
+                utiles[c] = quedan
+            compatibles = utiles
+
+        # La clave más restringida primero
+        clave = min(compatibles, key=lambda c: len(compatibles[c]))
+        for mascara, grupos in compatibles[clave]:
+            # Solo se filtra contra el grupo nuevo; si alguna clave se queda sin opciones, se poda
+            siguientes = {}
+            for otra, opciones in compatibles.items():
+                if otra == clave:
+                    continue
+                opciones = [op for op in opciones if not op[0] & mascara]
+                if not opciones:
+                    break
+                siguientes[otra] = opciones
+            else:
+                eleccion[clave] = (mascara, grupos)
+                if not buscar(siguientes, ocupado | mascara, eleccion):
+                    return False
+                del eleccion[clave]
+        return True
+
+    buscar(candidatos, ocupado_fijo, {})
+
+    soluciones = []
+    for neg, _, eleccion, ocupado in sorted(mejores, key=lambda x: (_negar(x[0]), x[1])):
+        soluciones.append(Solucion(
+            puntaje=_negar(neg),
+            grupos=[eleccion[c][1][0] for c in candidatos],
+            alternativas={c: eleccion[c][1][1:] for c in candidatos},
+            metricas=metricas(ocupado),
+        ))
+    return Resultado(soluciones, completo, nodos, time.perf_counter() - inicio, [])
+
+
+def _negar(puntaje):
+    """heapq es de mínimos: negamos para tener a la PEOR solución en la cima."""
+    return tuple(-x for x in puntaje)
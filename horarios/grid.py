@@ -0,0 +1,130 @@
+"""
+Grid semanal del horario armado: texto, colores, choques y estilos CSS.
+
+`vista_semanal` memoiza todo lo anterior por la huella del horario (ids,
+grupos y horarios en orden): los reruns de Streamlit que no cambian
+mi_horario (clicks en la tabla de resultados, etc.) no recalculan nada.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from horarios import metricas
+from horarios.conflictos import NUM_DIAS, detectar_conflictos, mascaras_de, slots_de_mascara
+from horarios.horario import DIAS, SLOT_FIN_GRID, SLOT_INICIO_GRID, slot_a_texto
+
+COLOR_CHOQUE = "#ff4b4b" # Rojo intenso
+TEXTO_CHOQUE = "⚠️ CHOQUE"
+
+def generar_paleta_colores(n):
+    """Genera una lista de colores pastel bonitos"""
+    colores_base = [
+        "#FFB3BA", "#FFDFBA", "#FFFFBA", "#BAFFC9", "#BAE1FF", # Pastel Red, Orange, Yellow, Green, Blue
+        "#E6B3FF", "#F0E68C", "#98FB98", "#DDA0DD", "#87CEFA"  # Purple, Khaki, PaleGreen, Plum, LightSkyBlue
+    ]
+    return colores_base * (n // len(colores_base) + 1)
+
+def crear_grid_horario(lista_materias):
+    """
+    Genera dos DataFrames: Texto (visual) y Colores (fondo), más la lista
+    de choques (registros Conflicto, ver horarios/conflictos.py).
+    Filas de media hora (07:00, 07:30 ... 21:30).
+
+    Los choques se calculan con máscaras de bits por materia (no por color,
+    que se repite cuando hay más de 10 materias) y el grid se llena en una
+    sola pasada sobre listas antes de crear los DataFrames.
+    """
+    n_slots = SLOT_FIN_GRID - SLOT_INICIO_GRID
+    ventana = (1 << n_slots) - 1
+    etiquetas = [slot_a_texto(s) for s in range(SLOT_INICIO_GRID, SLOT_FIN_GRID)]
+
+    texto = [[""] * NUM_DIAS for _ in range(n_slots)]
+    colores = [[""] * NUM_DIAS for _ in range(n_slots)]
+
+    # Generamos colores pastel
+    paleta = generar_paleta_colores(len(lista_materias))
+
+    # 1. Máscaras (desplazadas a la ventana del grid) y slots en choque por día
+    codificadas = []
+    acumulado = [0] * NUM_DIAS
+    choque = [0] * NUM_DIAS
+    for materia in lista_materias:
+        mascaras = [(m >> SLOT_INICIO_GRID) & ventana for m in mascaras_de(materia)]
+        for dia in range(NUM_DIAS):
+            choque[dia] |= acumulado[dia] & mascaras[dia]
+            acumulado[dia] |= mascaras[dia]
+        codificadas.append(mascaras)
+
+    # 2. Pintar: color en cada slot y nombre solo en el primer slot de cada bloque
+    for i, (materia, mascaras) in enumerate(zip(lista_materias, codificadas)):
+        # Formato corto para que no ocupe tanto espacio
+        nombre_display = f"{materia['Materia']}\n(G:{materia['Grupo']})"
+        color = paleta[i]
+        for dia in range(NUM_DIAS):
+            libres = mascaras[dia] & ~choque[dia]
+            if not libres:
+                continue
+            inicios = mascaras[dia] & ~(mascaras[dia] << 1)
+            for s in slots_de_mascara(libres):
+                colores[s][dia] = color
+            for s in slots_de_mascara(inicios & libres):
+                texto[s][dia] = nombre_display
+
+    # 3. Celdas en choque
+    for dia in range(NUM_DIAS):
+        for s in slots_de_mascara(choque[dia]):
+            colores[s][dia] = COLOR_CHOQUE
+            texto[s][dia] = TEXTO_CHOQUE
+
+    df_texto = pd.DataFrame(texto, index=etiquetas, columns=DIAS)
+    df_colores = pd.DataFrame(colores, index=etiquetas, columns=DIAS)
+    return df_texto, df_colores, detectar_conflictos(lista_materias)
+
+# Si hay texto en la celda es el inicio del bloque -> borde superior blanco
+ESTILO_INICIO = "border-top: 2px solid white; vertical-align: top; font-weight: bold; font-size: 12px;"
+# Si no hay texto es continuación -> sin bordes internos para que parezca unido
+ESTILO_CONTINUA = "border-top: none; color: transparent;"
+
+Vista = namedtuple("Vista", ["texto", "colores", "conflictos", "estilos"])
+
+def aplicar_estilos(df_val, grid_colores):
+    """
+    Aplica estilos CSS a todo el dataframe basado en grid_colores.
+    Uso: grid_texto.style.apply(aplicar_estilos, grid_colores=grid_colores, axis=None)
+    Se arma la matriz completa de una vez (sin recorrer celda por celda).
+    """
+    fondo = grid_colores.reindex(index=df_val.index, columns=df_val.columns).fillna("")
+    extra = np.where(df_val.to_numpy() != "", ESTILO_INICIO, ESTILO_CONTINUA)
+    estilos = "background-color: " + fondo + "; color: #000000;" + extra
+    return estilos.where(fondo != "", "")
+
+def huella_horario(lista_materias):
+    """Tupla hashable con lo que determina el grid (el orden importa: define los colores)."""
+    return tuple(
+        (m["id"], m["Materia"], m["Grupo"], m.get("Horario", ""), m.get("Bloques"))
+        for m in lista_materias
+    )
+
+@lru_cache(maxsize=64)
+def _vista_por_huella(huella):
+    lista = [
+        {"id": id_, "Materia": materia, "Grupo": grupo, "Horario": horario, "Bloques": bloques}
+        for id_, materia, grupo, horario, bloques in huella
+    ]
+    with metricas.fase("grid"):
+        texto, colores, conflictos = crear_grid_horario(lista)
+    with metricas.fase("estilos"):
+        estilos = aplicar_estilos(texto, colores)
+    return Vista(texto, colores, tuple(conflictos), estilos)
+
+metricas.registrar_colector("vista_semanal", lambda: _vista_por_huella.cache_info()._asdict())
+
+def vista_semanal(lista_materias):
+    """
+    Vista(texto, colores, conflictos, estilos) memoizada por la huella del
+    horario. Los DataFrames son compartidos: no modificarlos en sitio.
+    Uso: vista.texto.style.apply(lambda _: vista.estilos, axis=None)
+    """
+    return _vista_por_huella(huella_horario(lista_materias))
@@ -0,0 +1,92 @@
+"""
+Interpretación de los textos de horario ("LU 9:00-11:00 / MI 7-12").
+
+El resultado es una tupla inmutable de Bloque(dia, inicio, fin) en slots
+de media hora, memoizada por texto: cada horario distinto se interpreta
+una sola vez por proceso (y normalmente al agregarlo, no al dibujar).
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+DIAS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
+
+SLOT_MINUTOS = 30
+SLOTS_POR_HORA = 60 // SLOT_MINUTOS
+SLOTS_POR_DIA = 24 * SLOTS_POR_HORA
+
+# Rango que se dibuja en el grid: 7:00 a 22:00
+HORA_INICIO_GRID = 7
+HORA_FIN_GRID = 22
+SLOT_INICIO_GRID = HORA_INICIO_GRID * SLOTS_POR_HORA
+SLOT_FIN_GRID = HORA_FIN_GRID * SLOTS_POR_HORA
+
+# dia: 0 = Lunes ... 5 = Sábado
+# inicio / fin: slot de media hora contado desde las 00:00 (fin exclusivo)
+Bloque = namedtuple("Bloque", ["dia", "inicio", "fin"])
+
+_INDICE_DIAS = {"lu": 0, "ma": 1, "mi": 2, "ju": 3, "vi": 4, "sa": 5, "sá": 5}
+
+# Un solo patrón (sobre el texto en minúsculas): o es un día ("lu", "lun",
+# "lunes"...) como palabra completa, para que "SALÓN" o "MAESTRÍA" en una
+# observación no cuenten como sábado o martes; o es un rango de horas
+# ("9-14", "0900-1400", "13:30 - 15:00"). Después del día puede venir un
+# dígito pegado ("LU7-9"), por eso se limita con letras y no con \b.
+# findall regresa tuplas (dia, h1, m1, h2, m2) sin pasar por objetos Match.
+_TOKEN = re.compile(
+    r"\b(lu|ma|mi|ju|vi|s[aá])(?:nes|n|rtes|r|[eé]rcoles|[eé]|eves|ernes|e|bado|b)?(?![a-záéíóúñü])"
+    r"|(\d{1,2})(?:[:.]?(\d{2}))?\s*-\s*(\d{1,2})(?:[:.]?(\d{2}))?"
+)
+
+
+def slot_a_texto(slot):
+    """29 -> '14:30'"""
+    return f"{slot // SLOTS_POR_HORA:02d}:{(slot % SLOTS_POR_HORA) * SLOT_MINUTOS:02d}"
+
+
+@lru_cache(maxsize=8192)
+def interpretar_slots(texto_horario):
+    """
+    Convierte el texto de horario en una tupla de Bloques.
+    Días seguidos comparten el rango que viene después
+    ("LU,MI 7-9" -> lunes y miércoles) y un día aplica a todos los rangos
+    que le siguen ("MI 7-12 y 13-15").
+    El inicio se redondea hacia abajo y el fin hacia arriba a la media hora.
+    """
+    if not texto_horario:
+        return ()
+
+    bloques = []
+    dias_activos = []      # Memoria de qué días estamos leyendo
+    ultimo_fue_dia = False
+
+    for dia, h1, m1, h2, m2 in _TOKEN.findall(texto_horario.lower()):
+        if dia:
+            if ultimo_fue_dia:
+                dias_activos.append(_INDICE_DIAS[dia])
+            else:
+                dias_activos = [_INDICE_DIAS[dia]]
+            ultimo_fue_dia = True
+            continue
+
+        ultimo_fue_dia = False
+        # Minutos desde las 00:00 -> slot (inicio hacia abajo, fin hacia arriba)
+        inicio = (int(h1) * 60 + (int(m1) if m1 else 0)) // SLOT_MINUTOS
+        fin = min(-(-(int(h2) * 60 + (int(m2) if m2 else 0)) // SLOT_MINUTOS), SLOTS_POR_DIA)
+        if fin <= inicio:
+            continue
+        for d in dias_activos:
+            bloques.append(Bloque(d, inicio, fin))
+
+    return tuple(bloques)
+
+
+def interpretar_horario(texto_horario):
+    """
+    Versión en diccionarios (compatibilidad): [{"dia": "Lunes", "inicio": 9.0, "fin": 11.5}, ...]
+    con horas en decimales de media hora.
+    """
+    return [
+        {"dia": DIAS[b.dia], "inicio": b.inicio / SLOTS_POR_HORA, "fin": b.fin / SLOTS_POR_HORA}
+        for b in interpretar_slots(texto_horario)
+    ]
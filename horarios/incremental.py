@@ -0,0 +1,423 @@
+"""
+Refresco incremental del snapshot del ciclo.
+
+Durante inscripciones la oferta cambia de a poco (un profesor aquí, un
+grupo nuevo allá). En lugar de volver a rastrear y parsear todo:
+  * cada página del snapshot se vuelve a pedir y se compara el sha1 de la
+    respuesta cruda con el de la vez anterior; si es igual ni se parsea;
+  * en las que cambiaron, cada fila se identifica por (Clave, Grupo) y se
+    compara su huella con la anterior: de ahí salen altas, bajas y cambios
+    que se aplican al snapshot (JSON) y al almacén SQLite en sitio, sin
+    reconstruirlo;
+  * los cambios se publican en <snapshots>/cambios_<ciclo>.jsonl con un
+    número de versión, p. ej. "1555-0203 TALLER INTEGRAL: Horario LU MI 7-9 -> MA 16-20".
+
+En la app un hilo revisa ese archivo cada pocos segundos (vigilar(), un
+stat si no hay nada nuevo) y borra de la caché compartida solo las
+consultas afectadas; en cada rerun la sesión compara la versión en memoria
+y corrige los grupos de Mi Horario que cambiaron.
+
+    python -m horarios.incremental 20262
+
+El sitio no manda ETag en las páginas de horarios, así que cada página se
+sigue pidiendo una vez; lo que se ahorra es el parseo, la reconstrucción
+del almacén y vaciar la caché entera.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from horarios import almacen, metricas
+from horarios.config import CICLO_ACTUAL, DIRECTORIO_SNAPSHOTS
+from horarios.crawler import (
+    CAMPOS, CONCURRENCIA, PETICIONES_POR_SEGUNDO, LimiteCortesia,
+    filas_normalizadas, guardar_snapshot, leer_snapshot, ruta_snapshot,
+)
+from horarios.parser import parsear_html_generico
+from horarios.sitio import descargar_html
+
+logger = logging.getLogger(__name__)
+
+_CLAVE, _GRUPO = CAMPOS.index("Clave"), CAMPOS.index("Grupo")
+
+
+def huella(contenido):
+    if isinstance(contenido, str):
+        contenido = contenido.encode("utf-8")
+    return hashlib.sha1(contenido).hexdigest()
+
+
+def huella_fila(fila):
+    return huella("\x1f".join(map(str, fila)))[:16]
+
+
+# ==========================================
+# DIFERENCIAS POR FILA
+# ==========================================
+
+def _por_grupo(filas):
+    """{(clave, grupo, n): fila}; n separa las filas repetidas de un mismo grupo."""
+    vistas = {}
+    for fila in filas:
+        llave = (str(fila[_CLAVE]), str(fila[_GRUPO]))
+        n = vistas.get(llave, 0)
+        vistas[llave] = n + 1
+        yield (*llave, n), fila
+
+
+def diferencias(antes, despues):
+    """
+    Compara las filas (tuplas en orden de CAMPOS) de una página antes y
+    después por (Clave, Grupo). Regresa eventos:
+        {"tipo": "alta" | "baja" | "cambio", "clave", "grupo", "materia",
+         "campos": {campo: [antes, después]}, "fila": {campo: valor}}
+    "fila" es la fila nueva (la anterior en las bajas).
+    """
+    previas = {llave: (huella_fila(fila), fila) for llave, fila in _por_grupo(antes)}
+    nuevas = {llave: (huella_fila(fila), fila) for llave, fila in _por_grupo(despues)}
+    eventos = []
+    for llave, (h, fila) in nuevas.items():
+        previa = previas.get(llave)
+        if previa is None:
+            eventos.append(_evento("alta", fila))
+        elif previa[0] != h:
+            campos = {c: [a, b] for c, a, b in zip(CAMPOS, previa[1], fila) if a != b}
+            eventos.append(_evento("cambio", fila, campos))
+    for llave, (_, fila) in previas.items():
+        if llave not in nuevas:
+            eventos.append(_evento("baja", fila))
+    return eventos
+
+
+def _evento(tipo, fila, campos=None):
+    datos = dict(zip(CAMPOS, fila))
+    return {
+        "tipo": tipo, "clave": str(datos["Clave"]), "grupo": str(datos["Grupo"]), "materia": datos["Materia"],
+        "campos": campos or {}, "fila": datos,
+    }
+
+
+def describir(evento):
+    """Texto corto de un evento para logs y avisos."""
+    grupo = f"{evento['clave']}-{evento['grupo']} {evento['materia']}".strip()
+    if evento["tipo"] == "alta":
+        return f"Grupo nuevo {grupo} ({evento['fila'].get('Horario', '')})"
+    if evento["tipo"] == "baja":
+        return f"Ya no aparece {grupo}"
+    return f"{grupo}: " + ", ".join(f"{c} {a or '—'} -> {b or '—'}" for c, (a, b) in evento["campos"].items())
+
+
+# ==========================================
+# REFRESCO
+# ==========================================
+
+def _registros(snapshot):
+    """Consultas a revisar: las del snapshot y las que fallaron la última vez."""
+    registros = list(snapshot["consultas"])
+    conocidas = {r["clave"] for r in registros}
+    for error in snapshot.get("errores", []):
+        if error["clave"] not in conocidas:
+            registros.append({k: v for k, v in error.items() if k != "error"})
+    return registros
+
+
+def _revisar(registros, ciclo, concurrencia, por_segundo):
+    """
+    Descarga cada página; solo parsea las que cambiaron. Va regresando
+    (registro, sha1, filas o None si no cambió, error o None).
+    """
+    limite = LimiteCortesia(por_segundo)
+
+    def tarea(registro):
+        limite.esperar()
+        html = descargar_html(registro["endpoint"], registro["payload"], ciclo)
+        sha1 = huella(html)
+        if sha1 == registro.get("sha1") and "filas" in registro:
+            return sha1, None
+        return sha1, filas_normalizadas(parsear_html_generico(html, registro["tipo_parseo"]))
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="incremental") as pool:
+        futuros = {pool.submit(tarea, r): r for r in registros}
+        for futuro in as_completed(futuros):
+            registro = futuros[futuro]
+            try:
+                sha1, filas = futuro.result()
+            except Exception as e:
+                logger.warning("Falló %s %s: %s", registro["endpoint"], registro["payload"], e)
+                yield registro, None, None, str(e)
+                continue
+            yield registro, sha1, filas, None
+
+
+def refrescar(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS, concurrencia=CONCURRENCIA,
+              por_segundo=PETICIONES_POR_SEGUNDO):
+    """
+    Refresca el snapshot del ciclo en sitio (requiere un rastreo completo
+    previo). Regresa el registro publicado en el feed, o None si no cambió
+    nada. Una consulta que falla conserva sus filas anteriores.
+    """
+    inicio = time.monotonic()
+    ruta = ruta_snapshot(directorio, ciclo)
+    snapshot = leer_snapshot(ruta)
+    ofertas = snapshot["ofertas"]
+    indice = {tuple(o[c] for c in CAMPOS): i for i, o in enumerate(ofertas) if o is not None}
+    libres = [i for i, o in enumerate(ofertas) if o is None]
+    altas = {}
+
+    def oferta_id(fila):
+        i = indice.get(fila)
+        if i is None:
+            i = libres.pop() if libres else len(ofertas)
+            if i == len(ofertas):
+                ofertas.append(None)
+            ofertas[i] = altas[i] = dict(zip(CAMPOS, fila))
+            indice[fila] = i
+        return i
+
+    registros = _registros(snapshot)
+    con_datos, errores, cambiadas = [], [], []
+    eventos = {}
+    sin_cambio = 0
+    for registro, sha1, filas, error in _revisar(registros, ciclo, concurrencia, por_segundo):
+        if error is not None:
+            errores.append({**registro, "error": error})
+            if "filas" in registro:
+                con_datos.append(registro)
+            continue
+        registro["sha1"] = sha1
+        con_datos.append(registro)
+        if filas is None:
+            sin_cambio += 1
+            continue
+        filas = [tuple(str(v) for v in fila) for fila in filas]
+        previas = [tuple(ofertas[i][c] for c in CAMPOS) for i in registro.get("filas", [])]
+        # Las páginas de profesor repiten grupos que ya vienen completos en las de
+        # taller/asignatura (sin el nombre del profesor): cambian el almacén pero no el feed
+        if registro["tipo_parseo"] != "PROFESOR":
+            for evento in diferencias(previas, filas):
+                llave = json.dumps([evento["tipo"], evento["clave"], evento["grupo"], evento["campos"]], sort_keys=True)
+                eventos.setdefault(llave, {**evento, "consultas": []})["consultas"].append(registro["clave"])
+        nuevas = [oferta_id(fila) for fila in filas]
+        if nuevas != registro.get("filas"):
+            registro["filas"] = nuevas
+            cambiadas.append(registro)
+    metricas.contar("paginas_sin_cambio", sin_cambio)
+    metricas.contar("paginas_cambiadas", len(cambiadas))
+
+    # Ofertas que ya no usa ninguna consulta: hueco en el JSON, baja en SQLite
+    usadas = {i for r in con_datos for i in r["filas"]}
+    bajas = [i for i, o in enumerate(ofertas) if o is not None and i not in usadas]
+    for i in bajas:
+        del indice[tuple(ofertas[i][c] for c in CAMPOS)]
+        ofertas[i] = None
+        altas.pop(i, None)
+
+    orden = {r["clave"]: n for n, r in enumerate(registros)}
+    snapshot["consultas"] = sorted(con_datos, key=lambda r: orden[r["clave"]])
+    snapshot["errores"] = [e for e in errores if "filas" not in e]
+    snapshot["generado"] = datetime.now().isoformat(timespec="seconds")
+    registro_feed = None
+    if cambiadas or bajas:
+        snapshot["version"] = max(snapshot.get("version", 0), ultima_version(ciclo, directorio)) + 1
+        registro_feed = {
+            "version": snapshot["version"],
+            "fecha": snapshot["generado"],
+            "consultas": [r["clave"] for r in cambiadas],
+            "eventos": list(eventos.values()),
+        }
+    guardar_snapshot(snapshot, ruta)
+
+    ruta_db = almacen.ruta_almacen(ciclo, directorio)
+    meta = {"generado": snapshot["generado"], "version": snapshot.get("version", 0)}
+    if os.path.exists(ruta_db):
+        almacen.aplicar_cambios(ruta_db, altas, bajas, cambiadas, meta)
+    else:
+        almacen.construir(snapshot, ruta_db)
+
+    if registro_feed is not None:
+        _publicar(registro_feed, ruta_cambios(ciclo, directorio))
+    logger.info("Refresco %s: %d páginas, %d sin cambio, %d cambiadas, %d errores; %d altas, %d bajas, %d eventos (%.1fs)",
+                ciclo, len(registros), sin_cambio, len(cambiadas), len(errores), len(altas), len(bajas),
+                len(eventos), time.monotonic() - inicio)
+    return registro_feed
+
+
+# ==========================================
+# FEED DE CAMBIOS
+# ==========================================
+
+def ruta_cambios(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    return os.path.join(directorio, f"cambios_{ciclo}.jsonl")
+
+
+def _publicar(registro, ruta):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    # Una línea por versión, escrita de una vez (los lectores ignoran una línea incompleta)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+_leidos = {}   # ruta -> (mtime, registros)
+_aplicada = {}  # ruta -> última versión ya invalidada en la caché de este proceso
+_lock = threading.Lock()
+
+
+def _leer(ruta):
+    """Registros del feed, releyendo el archivo solo si cambió."""
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return []
+    with _lock:
+        leido = _leidos.get(ruta)
+        if leido is not None and leido[0] == mtime:
+            return leido[1]
+    registros = []
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                break
+    with _lock:
+        _leidos[ruta] = (mtime, registros)
+    return registros
+
+
+def ultima_version(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    registros = _leer(ruta_cambios(ciclo, directorio))
+    return registros[-1]["version"] if registros else 0
+
+
+def cambios_desde(version, ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    """Registros del feed con versión mayor que `version`, en orden."""
+    return [r for r in _leer(ruta_cambios(ciclo, directorio)) if r["version"] > version]
+
+
+def _ruta_aplicadas(directorio_cache):
+    return os.path.join(directorio_cache, "cambios_aplicados.json")
+
+
+def _version_aplicada_en_disco(ruta, directorio_cache):
+    """Última versión del feed `ruta` ya invalidada en el nivel en disco de la caché (0 si ninguna)."""
+    try:
+        with open(_ruta_aplicadas(directorio_cache), encoding="utf-8") as f:
+            return int(json.load(f).get(os.path.abspath(ruta), 0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0
+
+
+def _guardar_version_aplicada(ruta, version, directorio_cache):
+    destino = _ruta_aplicadas(directorio_cache)
+    try:
+        with open(destino, encoding="utf-8") as f:
+            aplicadas = json.load(f)
+    except (OSError, ValueError):
+        aplicadas = {}
+    aplicadas[os.path.abspath(ruta)] = version
+    temporal = f"{destino}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(aplicadas, f)
+        os.replace(temporal, destino)
+    except OSError as e:
+        logger.warning("No se pudo guardar la versión aplicada del feed: %s", e)
+
+
+def sincronizar(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    """
+    Si el feed tiene versiones nuevas borra de la caché
+    compartida las consultas que cambiaron (una vez por proceso) y regresa
+    la última versión.
+
+    Al arrancar, la memoria está vacía pero el nivel en disco de la caché
+    (HORARIOS_CACHE_DIR) puede traer respuestas de antes de versiones que
+    ya están en el feed: por eso la última versión aplicada se guarda junto
+    a esa caché y lo que falte se invalida en la primera sincronización.
+    Sin nivel en disco no hay nada viejo que invalidar.
+    """
+    from horarios import busqueda, cache
+
+    ruta = ruta_cambios(ciclo, directorio)
+    version = ultima_version(ciclo, directorio)
+    directorio_cache = cache.cache_compartida().directorio
+    with _lock:
+        previa = _aplicada.get(ruta)
+        arranque = previa is None
+        if previa is None and not directorio_cache:
+            previa = version
+        elif previa is None:
+            previa = _version_aplicada_en_disco(ruta, directorio_cache)
+            if previa > version:
+                previa = 0   # el feed volvió a empezar
+        _aplicada[ruta] = version
+        if previa >= version:
+            return version
+    claves = {clave for r in cambios_desde(previa, ciclo, directorio) for clave in r["consultas"]}
+    busqueda.invalidar_consultas(claves, uniones_previas=arranque)
+    if directorio_cache:
+        _guardar_version_aplicada(ruta, version, directorio_cache)
+    logger.info("Cambios %d -> %d: %d consultas invalidadas", previa, version, len(claves))
+    return version
+
+
+INTERVALO_VIGILANCIA = 5   # segundos entre revisiones del feed desde la app
+
+_vigilados = {}   # ruta del feed -> última versión sincronizada
+_lock_vigilancia = threading.Lock()
+
+
+def _vigilar(ciclo, directorio, ruta, intervalo):
+    while True:
+        time.sleep(intervalo)
+        try:
+            _vigilados[ruta] = sincronizar(ciclo, directorio)
+        except Exception as e:
+            logger.warning("No se pudo sincronizar el feed %s: %s", ruta, e)
+
+
+def vigilar(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS, intervalo=INTERVALO_VIGILANCIA):
+    """
+    Para la app, en cada rerun: la última versión ya sincronizada, sin tocar
+    el disco. La primera llamada del proceso sincroniza y deja un hilo que
+    revisa el feed cada `intervalo` segundos.
+    """
+    ruta = ruta_cambios(ciclo, directorio)
+    version = _vigilados.get(ruta)
+    if version is not None:
+        return version
+    with _lock_vigilancia:
+        if ruta not in _vigilados:
+            _vigilados[ruta] = sincronizar(ciclo, directorio)
+            threading.Thread(target=_vigilar, args=(ciclo, directorio, ruta, intervalo),
+                             name=f"cambios-{ciclo}", daemon=True).start()
+        return _vigilados[ruta]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Refresca el snapshot del ciclo solo donde cambió.")
+    ap.add_argument("ciclo", nargs="?", default=CICLO_ACTUAL)
+    ap.add_argument("--salida", default=DIRECTORIO_SNAPSHOTS, help="Directorio del snapshot")
+    ap.add_argument("--concurrencia", type=int, default=CONCURRENCIA)
+    ap.add_argument("--por-segundo", type=float, default=PETICIONES_POR_SEGUNDO)
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    registro = refrescar(args.ciclo, args.salida, args.concurrencia, args.por_segundo)
+    if registro is None:
+        print("Sin cambios")
+        return 0
+    print(f"Versión {registro['version']}: {len(registro['consultas'])} consultas cambiaron")
+    for evento in registro["eventos"]:
+        print("  " + describir(evento))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""
+Índice de búsqueda instantánea (typeahead) para profesores y asignaturas.
+
+Se construye una vez por ciclo y se comparte entre sesiones. La búsqueda
+no distingue acentos ni mayúsculas ("garcia" encuentra "GARCÍA") y tiene
+dos pasos:
+  1. Prefijos de palabra: cada palabra de la consulta debe ser el inicio
+     de alguna palabra de la etiqueta ("jua per" -> "PÉREZ LÓPEZ JUAN").
+     Se resuelve intersectando conjuntos precalculados.
+  2. Si faltan resultados, similitud por trigramas (errores de dedo:
+     "gonzales" -> "GONZÁLEZ").
+
+    indice = indice_del_ciclo("profesores", "20262", catalogo.items())
+    indice.buscar("garcia ma")  ->  [(etiqueta, valor), ...]
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+LONGITUD_MAX_PREFIJO = 12     # prefijos más largos se verifican con startswith
+SIMILITUD_MINIMA = 0.3        # Jaccard de trigramas para aceptar un resultado aproximado
+
+_NO_ALFANUM = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def normalizar(texto):
+    """'Pérez-López, ARQ.' -> 'perez lopez arq'"""
+    sin_acentos = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return _NO_ALFANUM.sub(" ", sin_acentos.lower()).strip()
+
+
+def _trigramas(normal):
+    relleno = f" {normal} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceBusqueda:
+    """Índice inmutable sobre pares (etiqueta, valor)."""
+
+    def __init__(self, entradas):
+        self.etiquetas = []
+        self.valores = []
+        self._normales = []
+        self._palabras = []
+        self._n_trigramas = []
+        prefijos = {}
+        trigramas = {}
+        for i, (etiqueta, valor) in enumerate(entradas):
+            normal = normalizar(etiqueta)
+            palabras = normal.split()
+            self.etiquetas.append(etiqueta)
+            self.valores.append(valor)
+            self._normales.append(normal)
+            self._palabras.append(palabras)
+            for palabra in set(palabras):
+                for k in range(1, min(len(palabra), LONGITUD_MAX_PREFIJO) + 1):
+                    prefijos.setdefault(palabra[:k], set()).add(i)
+            tris = _trigramas(normal)
+            self._n_trigramas.append(len(tris))
+            for tri in tris:
+                trigramas.setdefault(tri, []).append(i)
+        self._prefijos = {k: frozenset(v) for k, v in prefijos.items()}
+        self._trigramas = {k: tuple(v) for k, v in trigramas.items()}
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+    def buscar(self, consulta, limite=10):
+        """Hasta `limite` pares (etiqueta, valor), los mejores primero."""
+        normal = normalizar(consulta)
+        if not normal:
+            return []
+        encontrados = self._por_prefijos(normal, limite)
+        if len(encontrados) < limite:
+            ya = set(encontrados)
+            encontrados += [i for i in self._aproximados(normal, limite) if i not in ya][: limite - len(encontrados)]
+        return [(self.etiquetas[i], self.valores[i]) for i in encontrados]
+
+    def _por_prefijos(self, normal, limite):
+        palabras = normal.split()
+        conjuntos = sorted((self._prefijos.get(p[:LONGITUD_MAX_PREFIJO], frozenset()) for p in palabras), key=len)
+        if not conjuntos[0]:
+            return []
+        candidatos = conjuntos[0].intersection(*conjuntos[1:])
+        largas = [p for p in palabras if len(p) > LONGITUD_MAX_PREFIJO]
+        if largas:
+            candidatos = {i for i in candidatos
+                          if all(any(w.startswith(p) for w in self._palabras[i]) for p in largas)}
+        # Primero las que empiezan igual que la consulta, luego las más cortas
+        return heapq.nsmallest(limite, candidatos, key=lambda i: (
+            not self._normales[i].startswith(normal), len(self._normales[i]), i))
+
+    def _aproximados(self, normal, limite):
+        tris = _trigramas(normal)
+        comunes = {}
+        for tri in tris:
+            for i in self._trigramas.get(tri, ()):
+                comunes[i] = comunes.get(i, 0) + 1
+        similitud = {i: c / (len(tris) + self._n_trigramas[i] - c) for i, c in comunes.items()}
+        mejores = heapq.nsmallest(limite, similitud, key=lambda i: (-similitud[i], i))
+        return [i for i in mejores if similitud[i] >= SIMILITUD_MINIMA]
+
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def huella(catalogo):
+    """
+    Versión de un catálogo {etiqueta: valor} para indice_del_ciclo: cambia
+    si cambia cualquier etiqueta, valor u orden (no solo el tamaño).
+    ~0.4 ms con 5000 profesores.
+    """
+    return hash(tuple(catalogo.items()))
+
+
+def indice_del_ciclo(nombre, ciclo, entradas, version=None):
+    """
+    Índice `nombre` del ciclo, construido una sola vez por proceso.
+    `entradas` (iterable o función que lo regresa) solo se usa al construir;
+    si cambia `version` (p. ej. el catálogo se refrescó, ver huella()) se
+    reconstruye.
+    """
+    llave = (nombre, ciclo)
+    with _lock:
+        actual = _indices.get(llave)
+        if actual is not None and actual[0] == version:
+            return actual[1]
+    nuevo = IndiceBusqueda(entradas() if callable(entradas) else entradas)
+    with _lock:
+        _indices[llave] = (version, nuevo)
+    return nuevo
@@ -0,0 +1,113 @@
+"""
+Ingesta masiva: parseo de muchas páginas en un pool de procesos.
+
+Parsear es CPU puro y un ciclo completo son cientos de páginas; con hilos
+el GIL deja todo en un solo núcleo. Aquí cada proceso recibe el HTML crudo
+(str o bytes) y regresa un Lote compacto (columnas + tuplas) en lugar de un
+DataFrame, que es más caro de serializar. Los lotes se regresan en el mismo
+orden en que se entregaron las páginas y un error en una página solo marca
+ese lote. Si un proceso muere, el pool cancela todo lo pendiente: se
+reintenta en un pool nuevo y, si vuelve a caerse, envío por envío, de
+modo que solo se pierden las páginas del envío que lo tumba.
+
+    lotes = parsear_en_paralelo([(html, "ESTANDAR"), ...], procesos=8)
+    df = lote_a_df(lotes[0])
+
+Los procesos importan solo horarios.parser y lxml (sin pandas), así que
+arrancan rápido.
+"""
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from horarios.parser import parsear_filas
+
+logger = logging.getLogger(__name__)
+
+# indice: posición de la página en la entrada; error: texto o None
+Lote = namedtuple("Lote", ["indice", "columnas", "filas", "error"])
+
+PAGINAS_POR_ENVIO = 4   # páginas por viaje al proceso (menos IPC con páginas chicas)
+
+
+def procesos_disponibles():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _parsear_pagina(indice, html, tipo_parseo):
+    """Corre en el proceso: nunca lanza, el error viaja dentro del Lote."""
+    try:
+        columnas, filas = parsear_filas(html, tipo_parseo)
+        return Lote(indice, columnas, filas, None)
+    except Exception as e:
+        return Lote(indice, (), [], f"{type(e).__name__}: {e}")
+
+
+def _parsear_envio(envio):
+    return [_parsear_pagina(*pagina) for pagina in envio]
+
+
+def parsear_en_paralelo(paginas, procesos=None, por_envio=PAGINAS_POR_ENVIO):
+    """
+    paginas: iterable de (html, tipo_parseo). Regresa una lista de Lote en
+    el mismo orden. Con procesos=1 (o una sola página) no se crea el pool.
+    """
+    tareas = [(i, html, tipo) for i, (html, tipo) in enumerate(paginas)]
+    procesos = procesos or procesos_disponibles()
+    if procesos <= 1 or len(tareas) <= 1:
+        return [_parsear_pagina(*t) for t in tareas]
+
+    envios = [tareas[i:i + por_envio] for i in range(0, len(tareas), por_envio)]
+    lotes = {}   # envío -> sus Lotes
+    rotos = _correr_pool(envios, range(len(envios)), procesos, lotes)
+    if rotos:
+        # Murió un proceso (memoria, señal...) y el pool canceló todo lo que
+        # faltaba: lo pendiente va a un pool nuevo
+        logger.warning("Se cayó el pool de parseo; reintentando %d envíos", len(rotos))
+        rotos = _correr_pool(envios, rotos, procesos, lotes)
+    for n in rotos:
+        # Volvió a caerse: cada envío en su propio proceso, así solo se
+        # pierde el que lo tumba
+        if _correr_pool(envios, [n], 1, lotes):
+            logger.warning("Falló el parseo de %d páginas: el proceso murió", len(envios[n]))
+            lotes[n] = [Lote(i, (), [], "BrokenProcessPool: el proceso murió") for i, _, _ in envios[n]]
+    return [lote for n in range(len(envios)) for lote in lotes[n]]
+
+
+def _correr_pool(envios, indices, procesos, lotes):
+    """
+    Parsea los envíos `indices` en un pool nuevo y guarda sus Lotes en
+    `lotes`. Regresa los que no terminaron porque el pool se rompió.
+    """
+    rotos = []
+    with ProcessPoolExecutor(max_workers=min(procesos, len(indices))) as pool:
+        futuros = []
+        for n in indices:
+            try:
+                futuros.append((n, pool.submit(_parsear_envio, envios[n])))
+            except BrokenProcessPool:
+                rotos.append(n)
+        for n, futuro in futuros:
+            try:
+                lotes[n] = futuro.result()
+            except BrokenProcessPool:
+                rotos.append(n)
+            except Exception as e:
+                # p. ej. el resultado no se pudo serializar
+                logger.warning("Falló el parseo de %d páginas: %s", len(envios[n]), e)
+                lotes[n] = [Lote(i, (), [], f"{type(e).__name__}: {e}") for i, _, _ in envios[n]]
+    return sorted(rotos)
+
+
+def lote_a_df(lote):
+    """Lote -> el mismo DataFrame que daría parsear_html_generico."""
+    import pandas as pd
+
+    if not lote.columnas:
+        return pd.DataFrame()
+    return pd.DataFrame(lote.filas, columns=list(lote.columnas))
@@ -0,0 +1,276 @@
+"""
+Instrumentación por fase (descarga, decodificación, parseo, grid, estilos,
+render), contadores e histogramas de latencia del origen.
+
+Apagada no cuesta casi nada: `fase()` regresa un objeto vacío compartido y
+`observar()` / `contar()` salen en la primera línea. Se prende con
+HORARIOS_METRICAS=1 o con activar() (el panel de la app lo hace, solo si
+puede_controlar(): arrancó con HORARIOS_METRICAS o trae el token de
+HORARIOS_METRICAS_TOKEN).
+
+    with metricas.fase("parse"):
+        df = ...
+    metricas.contar("filas", len(df), tipo="ESTANDAR")
+    metricas.como_prometheus()   -> texto para /metrics
+    metricas.como_json()         -> dict
+
+Además, perfil() corre cProfile sobre un bloque (un rerun, una consulta)
+para ver en qué funciones se fue el tiempo.
+"""
+import bisect
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites de las cubetas de los histogramas (segundos), como los de Prometheus
+CUBETAS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIJO = "horarios"
+
+_activas = os.environ.get("HORARIOS_METRICAS", "") not in ("", "0")
+_por_entorno = _activas
+_token = os.environ.get("HORARIOS_METRICAS_TOKEN") or None
+_lock = threading.Lock()
+_histogramas = {}   # (nombre, etiquetas) -> [cuentas por cubeta + inf, suma]
+_contadores = {}    # (nombre, etiquetas) -> total
+_colectores = {}    # nombre -> función que regresa {dato: número} al exportar
+
+
+def activar(valor=True):
+    global _activas
+    _activas = bool(valor)
+
+
+def activas():
+    return _activas
+
+
+def puede_controlar(token=None):
+    """
+    True si se permite prender/apagar y reiniciar las métricas (que son de
+    todo el proceso): el operador arrancó con HORARIOS_METRICAS o `token`
+    coincide con HORARIOS_METRICAS_TOKEN. Ver el panel no lo requiere.
+    """
+    if _por_entorno:
+        return True
+    return bool(_token and token) and hmac.compare_digest(str(token).encode(), _token.encode())
+
+
+# ==========================================
+# REGISTRO
+# ==========================================
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def observar(nombre, segundos, **etiquetas):
+    """Agrega una medición al histograma `nombre` (con sus etiquetas)."""
+    if not _activas:
+        return
+    llave = (nombre, _etiquetas(etiquetas))
+    i = bisect.bisect_left(CUBETAS, segundos)
+    with _lock:
+        histograma = _histogramas.get(llave)
+        if histograma is None:
+            histograma = _histogramas[llave] = [[0] * (len(CUBETAS) + 1), 0.0]
+        histograma[0][i] += 1
+        histograma[1] += segundos
+
+
+def contar(nombre, n=1, **etiquetas):
+    if not _activas:
+        return
+    llave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _contadores[llave] = _contadores.get(llave, 0) + n
+
+
+class _Fase:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar("fase_segundos", time.perf_counter() - self.inicio, fase=self.nombre)
+        return False
+
+
+class _Nada:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NADA = _Nada()
+
+
+def fase(nombre):
+    """Context manager que mide el bloque como la fase `nombre`."""
+    return _Fase(nombre) if _activas else _NADA
+
+
+def registrar_colector(nombre, funcion):
+    """`funcion()` -> {dato: número}; se llama solo al exportar (p. ej. estadísticas de la caché)."""
+    with _lock:
+        _colectores[nombre] = funcion
+
+
+def reiniciar():
+    with _lock:
+        _histogramas.clear()
+        _contadores.clear()
+
+
+# ==========================================
+# EXPORTAR
+# ==========================================
+
+def _percentil(cuentas, p):
+    """Percentil aproximado: límite superior de la cubeta donde cae."""
+    total = sum(cuentas)
+    if not total:
+        return 0.0
+    objetivo = p / 100 * total
+    acumulado = 0
+    for limite, n in zip(CUBETAS + (float("inf"),), cuentas):
+        acumulado += n
+        if acumulado >= objetivo:
+            return limite
+    return float("inf")
+
+
+def _nombre(nombre, etiquetas):
+    return nombre + ("{" + ",".join(f"{k}={v}" for k, v in etiquetas) + "}" if etiquetas else "")
+
+
+def _colectados():
+    with _lock:
+        colectores = list(_colectores.items())
+    datos = {}
+    for nombre, funcion in colectores:
+        try:
+            datos[nombre] = {k: v for k, v in funcion().items() if isinstance(v, (int, float))}
+        except Exception as e:
+            datos[nombre] = {"error": str(e)}
+    return datos
+
+
+def como_json():
+    """Histogramas (n, suma, promedio y p50/p95/p99 aproximados), contadores y colectores."""
+    with _lock:
+        histogramas = {llave: (list(h[0]), h[1]) for llave, h in _histogramas.items()}
+        contadores = dict(_contadores)
+    resumen = {}
+    for (nombre, etiquetas), (cuentas, suma) in sorted(histogramas.items()):
+        n = sum(cuentas)
+        resumen[_nombre(nombre, etiquetas)] = {
+            "n": n,
+            "total_ms": round(suma * 1000, 2),
+            "prom_ms": round(suma / n * 1000, 3) if n else 0.0,
+            **{f"p{p}_ms": round(_percentil(cuentas, p) * 1000, 1) for p in (50, 95, 99)},
+        }
+    return {
+        "activas": _activas,
+        "histogramas": resumen,
+        "contadores": {_nombre(n, e): v for (n, e), v in sorted(contadores.items())},
+        "colectores": _colectados(),
+    }
+
+
+def _etiquetas_prometheus(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pares) + "}"
+
+
+def como_prometheus():
+    """Formato de texto de Prometheus (version 0.0.4)."""
+    with _lock:
+        histogramas = {llave: (list(h[0]), h[1]) for llave, h in _histogramas.items()}
+        contadores = dict(_contadores)
+    lineas = []
+    vistos = set()
+    for (nombre, etiquetas), (cuentas, suma) in sorted(histogramas.items()):
+        completo = f"{PREFIJO}_{nombre}"
+        if completo not in vistos:
+            vistos.add(completo)
+            lineas.append(f"# TYPE {completo} histogram")
+        acumulado = 0
+        for limite, n in zip(CUBETAS + (float("inf"),), cuentas):
+            acumulado += n
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            lineas.append(f"{completo}_bucket{_etiquetas_prometheus(etiquetas, [('le', le)])} {acumulado}")
+        lineas.append(f"{completo}_sum{_etiquetas_prometheus(etiquetas)} {suma:.6f}")
+        lineas.append(f"{completo}_count{_etiquetas_prometheus(etiquetas)} {acumulado}")
+    for (nombre, etiquetas), valor in sorted(contadores.items()):
+        completo = f"{PREFIJO}_{nombre}_total"
+        if completo not in vistos:
+            vistos.add(completo)
+            lineas.append(f"# TYPE {completo} counter")
+        lineas.append(f"{completo}{_etiquetas_prometheus(etiquetas)} {valor}")
+    for colector, datos in sorted(_colectados().items()):
+        completo = f"{PREFIJO}_{colector}"
+        lineas.append(f"# TYPE {completo} gauge")
+        for dato, valor in sorted(datos.items()):
+            if isinstance(valor, (int, float)):
+                lineas.append(f"{completo}{_etiquetas_prometheus([('dato', dato)])} {valor}")
+    return "\n".join(lineas) + "\n"
+
+
+# ==========================================
+# PERFIL BAJO DEMANDA
+# ==========================================
+
+class Perfil:
+    """Resultado de perfil(): `texto` con las funciones más costosas."""
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.texto = ""
+        self.segundos = 0.0
+
+
+@contextmanager
+def perfil(limite=25, orden="cumulative"):
+    """
+    cProfile sobre un bloque (solo el hilo actual):
+
+        with metricas.perfil(25) as p:
+            ...
+        print(p.texto)
+    """
+    import cProfile
+    import io
+    import pstats
+
+    resultado = Perfil(limite)
+    perfilador = cProfile.Profile()
+    try:
+        perfilador.enable()
+    except ValueError:
+        # Ya hay otro perfilador activo en el proceso (otra sesión perfilando)
+        perfilador = None
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        resultado.segundos = time.perf_counter() - inicio
+        if perfilador is None:
+            resultado.texto = "Otro perfil estaba corriendo; inténtalo de nuevo."
+        else:
+            perfilador.disable()
+            salida = io.StringIO()
+            pstats.Stats(perfilador, stream=salida).sort_stats(orden).print_stats(limite)
+            resultado.texto = salida.getvalue()
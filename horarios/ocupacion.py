@@ -0,0 +1,277 @@
+"""
+Ocupación de todo el ciclo: la oferta completa en un tensor
+(oferta × día × slot de media hora) de booleanos.
+
+grid.py y conflictos.py solo ven las pocas materias de un horario; aquí
+las preguntas son sobre miles de grupos a la vez y se contestan con
+operaciones de NumPy sobre el tensor, sin recorrer filas en Python:
+
+    oc = ocupacion_del_ciclo()                       # desde el almacén SQLite
+    oc.ventanas_libres(oc.seleccion(ids=...))        # huecos de un taller/semestre
+    oc.carga_profesores()                            # horas, días y horas en choque
+    oc.choques_profesor("GARCIA LOPEZ ANA")          # [Conflicto]
+    oc.turnos_por_agrupacion()                       # Matutino/Vespertino por agrupación
+    oc.caben(1555, mi_horario)                       # grupos de 1555 que no chocan
+
+Sirve igual con cualquier tabla de ofertas (p. ej. una búsqueda): Ocupacion(df).
+
+    python -m horarios.ocupacion profesores
+    python -m horarios.ocupacion libres 6 3
+"""
+import argparse
+import json
+import os
+import threading
+
+from horarios import almacen
+from horarios.config import CICLO_ACTUAL, DIRECTORIO_SNAPSHOTS
+from horarios.conflictos import Conflicto, NUM_DIAS, mascaras_de, matriz_mascaras, slots_de_mascara, union
+from horarios.horario import (
+    DIAS, SLOT_FIN_GRID, SLOT_INICIO_GRID, SLOTS_POR_DIA, SLOTS_POR_HORA, Bloque, slot_a_texto,
+)
+
+HORA_CORTE_TURNO = 14   # antes: matutino; desde aquí: vespertino
+SIN_PROFESOR = {"", "BUSQUEDA PROFESOR"}
+
+
+def desempacar(mascaras):
+    """Máscaras (n, 6) int64 -> tensor (n, 6, SLOTS_POR_DIA) de booleanos."""
+    import numpy as np
+
+    n = len(mascaras)
+    # Cada máscara cabe en 48 bits: sus 8 bytes little-endian se desempacan de una vez
+    octetos = np.ascontiguousarray(mascaras, dtype="<i8").view(np.uint8).reshape(n, NUM_DIAS, 8)
+    return np.unpackbits(octetos, axis=2, bitorder="little")[:, :, :SLOTS_POR_DIA].view(bool)
+
+
+class Ocupacion:
+    """
+    Tensor de ocupación de una tabla de ofertas. `ofertas` queda tal cual
+    (compacta o no); la fila i de la tabla es la oferta i del tensor.
+    """
+
+    def __init__(self, ofertas):
+        import numpy as np
+        import pandas as pd
+
+        self.ofertas = ofertas.reset_index(drop=True)
+        self.mascaras = matriz_mascaras(self.ofertas)
+        self.tensor = desempacar(self.mascaras)
+        self._texto = {c: self.ofertas[c].astype(str).to_numpy()
+                       for c in ("Clave", "Grupo", "Materia", "Profesor", "Agrupación", "Turno")
+                       if c in self.ofertas.columns}
+        # Un grupo (Clave, Grupo) aparece en varias páginas (taller, asignatura,
+        # profesor); para cargas y conteos se toma una vez, prefiriendo la fila
+        # que sí trae el nombre del profesor.
+        orden = np.argsort(np.isin(self._texto["Profesor"], list(SIN_PROFESOR)), kind="stable")
+        llaves = pd.Series(self._texto["Clave"][orden]) + "-" + self._texto["Grupo"][orden]
+        self.unicos = np.zeros(len(self.ofertas), dtype=bool)
+        self.unicos[orden[~llaves.duplicated().to_numpy()]] = True
+        self._ids = pd.Index(self.ofertas["id"]) if "id" in self.ofertas.columns else None
+
+    def __len__(self):
+        return len(self.ofertas)
+
+    # ---------- Selección ----------
+
+    def seleccion(self, clave=None, profesor=None, agrupacion=None, turno=None, ids=None):
+        """Vector booleano de filas que cumplen todo lo que se pida (ids = columna "id")."""
+        import numpy as np
+
+        elegidas = np.ones(len(self.ofertas), dtype=bool)
+        for columna, valor in (("Clave", clave), ("Profesor", profesor), ("Agrupación", agrupacion), ("Turno", turno)):
+            if valor is not None:
+                elegidas &= self._texto[columna] == str(valor)
+        if ids is not None:
+            if self._ids is None:
+                raise ValueError("La tabla no trae la columna id")
+            posiciones = self._ids.get_indexer(list(ids))
+            por_id = np.zeros(len(self.ofertas), dtype=bool)
+            por_id[posiciones[posiciones >= 0]] = True
+            elegidas &= por_id
+        return elegidas
+
+    # ---------- Preguntas ----------
+
+    def densidad(self, elegidas=None):
+        """(6, SLOTS_POR_DIA): cuántos grupos tienen clase en cada día y slot."""
+        tensor = self.tensor if elegidas is None else self.tensor[elegidas]
+        return tensor.sum(axis=0, dtype="int32")
+
+    def mapa(self, elegidas=None):
+        """densidad() como tabla del rango del grid (filas = hora, columnas = día)."""
+        import pandas as pd
+
+        conteo = self.densidad(elegidas)[:, SLOT_INICIO_GRID:SLOT_FIN_GRID]
+        return pd.DataFrame(conteo.T, columns=DIAS,
+                            index=[slot_a_texto(s) for s in range(SLOT_INICIO_GRID, SLOT_FIN_GRID)])
+
+    def ventanas_libres(self, elegidas=None, minimo_slots=2, desde=SLOT_INICIO_GRID, hasta=SLOT_FIN_GRID):
+        """
+        Huecos (Bloques) entre `desde` y `hasta` en los que ninguno de los
+        grupos elegidos tiene clase, de al menos `minimo_slots` medias horas.
+        """
+        import numpy as np
+
+        libre = ~self.densidad(elegidas)[:, desde:hasta].astype(bool)
+        bordes = np.zeros((NUM_DIAS, libre.shape[1] + 2), dtype=np.int8)
+        bordes[:, 1:-1] = libre
+        cambios = np.diff(bordes, axis=1)
+        # nonzero recorre por día y luego por slot: inicios y finales quedan emparejados
+        dias, inicios = np.nonzero(cambios == 1)
+        _, fines = np.nonzero(cambios == -1)
+        largos = fines - inicios
+        return [Bloque(int(d), desde + int(i), desde + int(f))
+                for d, i, f, largo in zip(dias, inicios, fines, largos) if largo >= minimo_slots]
+
+    def carga_profesores(self):
+        """
+        Por profesor: grupos, horas frente a grupo a la semana, días con
+        clase y horas en que tiene dos grupos a la vez (incluye grupos
+        compartidos entre claves). Ordenada por horas.
+        """
+        import numpy as np
+        import pandas as pd
+
+        elegidas = self.unicos & ~np.isin(self._texto["Profesor"], list(SIN_PROFESOR))
+        codigos, nombres = pd.factorize(self._texto["Profesor"][elegidas])
+        if not len(nombres):
+            return pd.DataFrame(columns=["Profesor", "grupos", "horas", "dias", "horas_en_choque"])
+        orden = np.argsort(codigos, kind="stable")
+        inicios = np.searchsorted(codigos[orden], np.arange(len(nombres)))
+        conteo = np.add.reduceat(self.tensor[elegidas][orden].astype(np.int16), inicios, axis=0)
+        return pd.DataFrame({
+            "Profesor": nombres,
+            "grupos": np.bincount(codigos),
+            "horas": conteo.sum(axis=(1, 2)) / SLOTS_POR_HORA,
+            "dias": conteo.any(axis=2).sum(axis=1),
+            "horas_en_choque": (conteo > 1).sum(axis=(1, 2)) / SLOTS_POR_HORA,
+        }).sort_values(["horas", "Profesor"], ascending=[False, True], ignore_index=True)
+
+    def choques_profesor(self, profesor):
+        """Pares de grupos del profesor que se enciman: [Conflicto] con ids "Materia-Grupo"."""
+        import numpy as np
+
+        filas = np.nonzero(self.unicos & (self._texto["Profesor"] == profesor))[0]
+        mascaras = self.mascaras[filas]
+        a, b = np.triu_indices(len(filas), k=1)
+        comunes = mascaras[a] & mascaras[b]
+        pares, dias = np.nonzero(comunes)
+        ids = [f"{self._texto['Materia'][i]}-{self._texto['Grupo'][i]}" for i in filas]
+        return [Conflicto(ids[a[p]], ids[b[p]], int(d), tuple(slots_de_mascara(int(comunes[p, d]))))
+                for p, d in zip(pares, dias)]
+
+    def turnos_por_agrupacion(self):
+        """
+        Por agrupación: grupos por turno (como los marca el sitio) y horas de
+        clase antes y después de HORA_CORTE_TURNO, con la proporción matutina.
+        """
+        import numpy as np
+        import pandas as pd
+
+        elegidas = self.unicos
+        codigos, agrupaciones = pd.factorize(self._texto["Agrupación"][elegidas])
+        corte = HORA_CORTE_TURNO * SLOTS_POR_HORA
+        tensor = self.tensor[elegidas]
+        manana = tensor[:, :, :corte].sum(axis=(1, 2)) / SLOTS_POR_HORA
+        tarde = tensor[:, :, corte:].sum(axis=(1, 2)) / SLOTS_POR_HORA
+        turnos = self._texto["Turno"][elegidas]
+        tabla = pd.DataFrame({
+            "Agrupación": agrupaciones,
+            "grupos": np.bincount(codigos, minlength=len(agrupaciones)),
+            "Matutino": np.bincount(codigos, weights=turnos == "Matutino", minlength=len(agrupaciones)).astype(int),
+            "Vespertino": np.bincount(codigos, weights=turnos == "Vespertino", minlength=len(agrupaciones)).astype(int),
+            "horas_matutino": np.bincount(codigos, weights=manana, minlength=len(agrupaciones)),
+            "horas_vespertino": np.bincount(codigos, weights=tarde, minlength=len(agrupaciones)),
+        })
+        total = tabla["horas_matutino"] + tabla["horas_vespertino"]
+        tabla["proporcion_matutino"] = (tabla["horas_matutino"] / total.where(total > 0)).round(3)
+        return tabla.sort_values("grupos", ascending=False, ignore_index=True)
+
+    def caben(self, clave, lista_materias):
+        """Grupos de `clave` que no chocan con ninguna materia de `lista_materias`."""
+        import numpy as np
+
+        elegidas = self.unicos & (self._texto["Clave"] == str(clave))
+        ocupado = np.array(union(mascaras_de(m) for m in lista_materias), dtype=np.int64)
+        elegidas[elegidas] = ~(self.mascaras[elegidas] & ocupado).any(axis=1)
+        return self.ofertas[elegidas]
+
+
+# ==========================================
+# OCUPACIÓN DEL CICLO (ALMACÉN)
+# ==========================================
+
+_ocupaciones = {}
+_lock = threading.Lock()
+
+
+def ocupacion_del_ciclo(ciclo=CICLO_ACTUAL, directorio=DIRECTORIO_SNAPSHOTS):
+    """
+    Ocupacion de toda la oferta del almacén del ciclo (sin las filas del modo
+    PROFESOR), una por proceso; se rehace si el archivo cambia (crawler o
+    refresco incremental). None si no hay snapshot.
+    """
+    local = almacen.almacen_local(ciclo, directorio)
+    if local is None:
+        return None
+    mtime = os.stat(local.ruta).st_mtime_ns
+    with _lock:
+        guardada = _ocupaciones.get(local.ruta)
+        if guardada is None or guardada[0] != mtime:
+            ofertas = local.ofertas()
+            guardada = _ocupaciones[local.ruta] = (mtime, Ocupacion(ofertas[ofertas["Profesor"] != "BUSQUEDA PROFESOR"]))
+        return guardada[1]
+
+
+def main(argv=None):
+    from horarios.crawler import SEMESTRES
+
+    ap = argparse.ArgumentParser(description="Ocupación de toda la oferta del ciclo (requiere el almacén).")
+    ap.add_argument("--ciclo", default=CICLO_ACTUAL)
+    ap.add_argument("--salida", default=DIRECTORIO_SNAPSHOTS, help="Directorio del snapshot")
+    sub = ap.add_subparsers(dest="pregunta", required=True)
+    p = sub.add_parser("profesores", help="Carga y choques por profesor")
+    p.add_argument("--top", type=int, default=30)
+    p.add_argument("--choques", help="Detalle de choques de este profesor")
+    sub.add_parser("turnos", help="Matutino/Vespertino por agrupación")
+    l = sub.add_parser("libres", help="Huecos de un taller/semestre")
+    l.add_argument("taller", type=int)
+    l.add_argument("semestre", type=int, choices=list(SEMESTRES))
+    l.add_argument("--minimo", type=float, default=1.0, help="horas mínimas del hueco")
+    c = sub.add_parser("caben", help="Grupos de una clave que caben en un horario")
+    c.add_argument("clave")
+    c.add_argument("--horario", help="JSON con [{Materia, Grupo, Horario}] (mi_horario)")
+    args = ap.parse_args(argv)
+
+    oc = ocupacion_del_ciclo(args.ciclo, args.salida)
+    if oc is None:
+        raise SystemExit(f"No hay almacén de {args.ciclo} en {args.salida}: correr antes el crawler")
+
+    if args.pregunta == "profesores":
+        if args.choques:
+            from horarios.conflictos import describir
+            for conflicto in oc.choques_profesor(args.choques):
+                print(describir(conflicto))
+        else:
+            print(oc.carga_profesores().head(args.top).to_string(index=False))
+    elif args.pregunta == "turnos":
+        print(oc.turnos_por_agrupacion().to_string(index=False))
+    elif args.pregunta == "libres":
+        ids = almacen.almacen_local(args.ciclo, args.salida).ids_consulta(
+            "taller.php", {"tal": args.taller, "talsem": args.semestre}, ciclo=args.ciclo)
+        if ids is None:
+            raise SystemExit("Ese taller/semestre no está en el snapshot")
+        for bloque in oc.ventanas_libres(oc.seleccion(ids=ids), minimo_slots=int(args.minimo * SLOTS_POR_HORA)):
+            print(f"{DIAS[bloque.dia]:10} {slot_a_texto(bloque.inicio)}-{slot_a_texto(bloque.fin)}")
+    else:
+        lista = []
+        if args.horario:
+            with open(args.horario, encoding="utf-8") as f:
+                lista = json.load(f)
+        print(oc.caben(args.clave, lista).drop(columns=["id"], errors="ignore").to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
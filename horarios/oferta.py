@@ -0,0 +1,138 @@
+"""
+Tabla compacta de ofertas.
+
+El DataFrame que sale del parser guarda todo como str de Python y repite
+el mismo profesor, taller, turno y horario en muchas filas. La versión
+compacta usa:
+  * columnas categóricas (cada texto distinto se guarda una vez) para
+    Materia, Profesor, Agrupación, Turno y Horario;
+  * enteros para Clave y Grupo cuando la conversión no pierde nada
+    ("0402" se queda como texto para no perder el cero);
+  * 6 columnas int64 con las máscaras por día (m_lu ... m_sa, bit i =
+    slot de media hora i), calculadas una sola vez al parsear. El grid,
+    los choques y el generador las usan directo sin volver al texto.
+
+    python -m horarios.oferta snapshots/oferta_20262.json.gz
+    -> memoria y costo por fila, plano vs compacto
+"""
+import argparse
+import re
+import time
+
+from horarios.conflictos import COLUMNAS_MASCARA, matriz_mascaras
+
+CATEGORICAS = ["Materia", "Profesor", "Agrupación", "Turno", "Horario"]
+ENTERAS = ["Clave", "Grupo"]
+
+_ENTERO_SIN_CEROS = re.compile(r"[1-9]\d{0,8}")
+
+
+def _entera(serie):
+    """int32 si todos los valores van y vienen sin cambio; si no, categórica."""
+    texto = serie.astype(str)
+    if len(texto) and all(_ENTERO_SIN_CEROS.fullmatch(v) for v in texto.unique()):
+        return texto.astype("int32")
+    return serie.astype("category")
+
+
+def es_compacta(df):
+    return COLUMNAS_MASCARA[0] in df.columns
+
+
+def compactar(df):
+    """DataFrame del parser -> tabla compacta (mismas filas y columnas + máscaras)."""
+    import pandas as pd
+
+    if df.empty or es_compacta(df):
+        return df
+    columnas = {}
+    for nombre in df.columns:
+        if nombre in ENTERAS:
+            columnas[nombre] = _entera(df[nombre])
+        elif nombre in CATEGORICAS:
+            columnas[nombre] = df[nombre].astype("category")
+        else:
+            columnas[nombre] = df[nombre]
+    compacta = pd.DataFrame(columnas, index=df.index)
+
+    mascaras = matriz_mascaras(compacta["Horario"] if "Horario" in compacta.columns else [""] * len(df))
+    for dia, nombre in enumerate(COLUMNAS_MASCARA):
+        compacta[nombre] = mascaras[:, dia]
+    return compacta
+
+
+def unir(tablas, llave=("Clave", "Grupo")):
+    """
+    Varias tablas compactas -> una sola, sin filas repetidas por `llave`
+    (se queda la primera). Las columnas categóricas y enteras se vuelven a
+    compactar porque concat las deja como texto cuando no coinciden.
+    """
+    import pandas as pd
+
+    tablas = [t for t in tablas if not t.empty]
+    if len(tablas) <= 1:
+        return tablas[0] if tablas else pd.DataFrame()
+    df = pd.concat(tablas, ignore_index=True)
+    for nombre in df.columns:
+        if nombre in ENTERAS and not pd.api.types.is_integer_dtype(df[nombre]):
+            df[nombre] = _entera(df[nombre].astype(str))
+        elif nombre in CATEGORICAS and not isinstance(df[nombre].dtype, pd.CategoricalDtype):
+            df[nombre] = df[nombre].astype("category")
+    columnas = [c for c in llave if c in df.columns]
+    if len(columnas) < len(llave):
+        columnas = [c for c in ("Materia", "Grupo") if c in df.columns]
+    return df.drop_duplicates(subset=columnas, ignore_index=True) if columnas else df
+
+
+def memoria_kb(df):
+    return round(float(df.memory_usage(deep=True).sum()) / 1024, 1)
+
+
+def comparar(df, repeticiones=5):
+    """Memoria y costo por fila (construir + filtrar choques) de la tabla plana vs la compacta."""
+    from horarios.conflictos import choques_con_horario
+
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        compacta = compactar(df)
+    t_compactar = (time.perf_counter() - t0) / repeticiones
+
+    # Un horario de ejemplo: las primeras 8 ofertas distintas
+    mi_horario = [{"id": str(i), "Horario": h} for i, h in enumerate(df["Horario"].dropna().unique()[:8])]
+    tiempos = {}
+    for nombre, tabla in (("plana", df), ("compacta", compacta)):
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            choques_con_horario(tabla, mi_horario)
+        tiempos[nombre] = (time.perf_counter() - t0) / repeticiones
+
+    n = max(len(df), 1)
+    return {
+        "filas": len(df),
+        "kb_plana": memoria_kb(df),
+        "kb_compacta": memoria_kb(compacta),
+        "bytes_por_fila_plana": round(memoria_kb(df) * 1024 / n),
+        "bytes_por_fila_compacta": round(memoria_kb(compacta) * 1024 / n),
+        "us_por_fila_compactar": round(t_compactar / n * 1e6, 2),
+        "us_por_fila_choques_plana": round(tiempos["plana"] / n * 1e6, 3),
+        "us_por_fila_choques_compacta": round(tiempos["compacta"] / n * 1e6, 3),
+    }
+
+
+def main(argv=None):
+    import pandas as pd
+
+    from horarios.crawler import CAMPOS, leer_snapshot
+
+    ap = argparse.ArgumentParser(description="Memoria y costo por fila de la tabla compacta.")
+    ap.add_argument("snapshot", help="Archivo oferta_<ciclo>.json.gz del crawler")
+    args = ap.parse_args(argv)
+
+    snapshot = leer_snapshot(args.snapshot)
+    df = pd.DataFrame([o for o in snapshot["ofertas"] if o], columns=CAMPOS)
+    for nombre, valor in comparar(df).items():
+        print(f"{nombre:32} {valor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Parser del HTML que regresan los PHP del sitio de escolares.
+
+`parsear_html_generico` recorre el árbol de lxml directamente (sin
+BeautifulSoup). `parsear_html_bs4` es la implementación original y se
+conserva como referencia para verificar que ambas den lo mismo:
+
+    python -m horarios.parser pagina1.html pagina2.html --tipo ESTANDAR
+
+pandas, lxml y bs4 se importan al primer uso y no al importar el módulo,
+para que los procesos que solo interpretan horarios arranquen rápido.
+"""
+import argparse
+import time
+from functools import lru_cache
+
+from horarios import metricas
+
+# ==========================================
+# UTILIDADES DE TEXTO
+# ==========================================
+
+def limpiar_texto(texto):
+    if not texto: return ""
+    return texto.strip().replace("+ ", "").replace("\n", " ").replace("\r", "")
+
+def extraer_horario(celda_html):
+    etiquetas_b = celda_html.find_all("b")
+    if not etiquetas_b:
+        return celda_html.get_text(strip=True)
+    return " / ".join([b.get_text(strip=True) for b in etiquetas_b])
+
+# ==========================================
+# TABLA DE GRUPOS (taller.php, LipHorarios.php, asignatura.php...)
+# ==========================================
+
+# Mapa de colores para detectar turno
+COLORES_TURNO = {
+    "64C2FD": "Matutino",   # Azul
+    "FFA97C": "Vespertino"  # Naranja
+}
+
+@lru_cache(maxsize=None)
+def _xpaths():
+    """XPath compilados una sola vez (se evalúan en C): (texto, contar_filas)."""
+    from lxml import etree
+    return (
+        etree.XPath("string()"),        # equivalente a `.text` de bs4
+        etree.XPath("count(.//tr)"),
+    )
+
+
+def _texto_compacto(elemento):
+    """Equivalente a `get_text(strip=True)` de bs4."""
+    return "".join(t.strip() for t in elemento.itertext())
+
+
+def _horario_lxml(celda):
+    """Versión lxml de extraer_horario."""
+    etiquetas_b = list(celda.iter("b"))
+    if not etiquetas_b:
+        return _texto_compacto(celda)
+    return " / ".join([_texto_compacto(b) for b in etiquetas_b])
+
+
+def _raiz_html(html):
+    if not html:
+        return None
+    from lxml import etree
+    try:
+        raiz = etree.HTML(html)
+    except ValueError:
+        # str con declaración de encoding: lxml la quiere en bytes
+        raiz = etree.HTML(html.encode("utf-8"))
+    if raiz is not None:
+        # bs4 no cuenta como texto lo que hay dentro de <script>/<style>
+        etree.strip_elements(raiz, "script", "style", "template", with_tail=False)
+    return raiz
+
+
+def parsear_html_generico(html, tipo_parseo="ESTANDAR", compacta=False):
+    """
+    Parsea el HTML devuelto por el servidor y lo convierte en DataFrame.
+    Mismos registros que parsear_html_bs4, pero varias veces más rápido.
+    Con compacta=True regresa la tabla compacta (categorías, enteros y
+    máscaras por día ya calculadas, ver horarios/oferta.py).
+    """
+    import pandas as pd
+
+    with metricas.fase("parseo"):
+        df = pd.DataFrame(_registros(html, tipo_parseo))
+    metricas.contar("filas_parseadas", len(df), tipo=tipo_parseo)
+    if compacta:
+        from horarios.oferta import compactar
+        with metricas.fase("compactar"):
+            return compactar(df)
+    return df
+
+
+def parsear_filas(html, tipo_parseo="ESTANDAR"):
+    """
+    Igual que parsear_html_generico pero sin pandas: regresa
+    (columnas, [tuplas]) con las columnas en el orden en que las pondría el
+    DataFrame y NaN donde a una fila le falta un campo. Es compacto y se
+    puede mandar entre procesos (ver horarios/ingesta.py).
+    """
+    registros = _registros(html, tipo_parseo)
+    columnas = {}
+    for item in registros:
+        for nombre in item:
+            columnas.setdefault(nombre, None)
+    columnas = tuple(columnas)
+    faltante = float("nan")
+    return columnas, [tuple(item.get(c, faltante) for c in columnas) for item in registros]
+
+
+def _registros(html, tipo_parseo):
+    """Lista de dicts (una por grupo) de la tabla más grande del HTML."""
+    _texto, _contar_filas = _xpaths()
+    raiz = _raiz_html(html)
+    if raiz is None: return []
+
+    tablas = list(raiz.iter("table"))
+    if not tablas: return []
+
+    # Tomamos la tabla más grande (conteo de <tr> hecho en C, sin recorrer en Python)
+    tabla = max(tablas, key=_contar_filas)
+
+    datos = []
+
+    # --- MEMORIA DE CONTEXTO ---
+    contexto_actual = "General"
+    turno_actual = "Indistinto"
+
+    for fila in tabla.iter("tr"):
+        celdas = list(fila.iter("td"))
+        if not celdas: continue
+
+        # 1. SEPARADORES (Encabezados): filas sin clase 'sombreado'
+        if "sombreado" not in (fila.get("class") or "").split():
+            celda_header = celdas[0]
+            if celda_header.get("colspan"):
+                estilo_celda = (celda_header.get("style") or "").upper()
+                texto_separador = _texto_compacto(celda_header)
+
+                # A) DETECTAR TURNO POR COLOR
+                for hex_code, nombre_turno in COLORES_TURNO.items():
+                    if hex_code in estilo_celda:
+                        turno_actual = nombre_turno
+                        break
+
+                # B) ACTUALIZAR CONTEXTO (Nombre del Taller/LIP)
+                if texto_separador:
+                    if "Taller:" in texto_separador:
+                        contexto_actual = texto_separador.replace("Taller:", "").strip()
+                    elif "Cursos Optativos" in texto_separador:
+                        contexto_actual = texto_separador.replace("Cursos Optativos Área", "").strip()
+                        turno_actual = "Indistinto"
+                    elif "LIP:" in texto_separador:
+                        contexto_actual = texto_separador.split("LIP:")[1].strip()
+            continue
+
+        # 2. EXTRACCIÓN DE DATOS (Filas 'sombreado')
+        if len(celdas) < 5: continue
+
+        if tipo_parseo in ["ESTANDAR", "ASIGNATURA_CONTEXTO"]:
+            raw_materia = _texto(celdas[1])
+            if "LIP:" in raw_materia:
+                raw_materia = raw_materia.split("LIP:")[0]
+            item = {
+                "Clave": limpiar_texto(_texto(celdas[0])),
+                "Materia": limpiar_texto(raw_materia),
+                "Grupo": limpiar_texto(_texto(celdas[2])),
+                "Profesor": limpiar_texto(_texto(celdas[4])),
+            }
+            if len(celdas) > 5:
+                item["Horario"] = _horario_lxml(celdas[5])
+            item["Agrupación"] = contexto_actual
+            item["Turno"] = turno_actual
+
+        elif tipo_parseo == "PROFESOR":
+            item = {
+                "Clave": limpiar_texto(_texto(celdas[0])),
+                "Materia": limpiar_texto(_texto(celdas[1])),
+                "Grupo": limpiar_texto(_texto(celdas[2])),
+                "Agrupación": limpiar_texto(_texto(celdas[4])),
+                "Profesor": "BUSQUEDA PROFESOR",
+                "Horario": _horario_lxml(celdas[5]),
+                "Turno": "ND",
+            }
+
+        elif tipo_parseo == "GENERO":
+            item = {
+                "Clave": limpiar_texto(_texto(celdas[0])),
+                "Materia": limpiar_texto(_texto(celdas[1])),
+                "Grupo": limpiar_texto(_texto(celdas[2])),
+                "Profesor": limpiar_texto(_texto(celdas[4])),
+                "Horario": limpiar_texto(_texto(celdas[5])),
+                "Agrupación": "Requisito Género",
+                "Turno": "Indistinto",
+            }
+
+        else:
+            continue
+
+        datos.append(item)
+
+    return datos
+
+
+def parsear_html_bs4(html, tipo_parseo="ESTANDAR"):
+    """
+    Implementación original con BeautifulSoup. Solo se usa como referencia
+    para verificar parsear_html_generico.
+    """
+    import pandas as pd
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    
+    tablas = soup.find_all("table")
+    if not tablas: return pd.DataFrame()
+    
+    # Tomamos la tabla más grande
+    tabla = max(tablas, key=lambda t: len(t.find_all("tr")))
+    filas = tabla.find_all("tr")
+    
+    datos = []
+    
+    # --- MEMORIA DE CONTEXTO ---
+    contexto_actual = "General"
+    turno_actual = "Indistinto"
+
+    # Mapa de colores para detectar turno
+    COLORES_TURNO = {
+        "64C2FD": "Matutino",   # Azul
+        "FFA97C": "Vespertino"  # Naranja
+    }
+
+    for fila in filas:
+        celdas = fila.find_all("td")
+        if not celdas: continue
+
+        # ---------------------------------------------------------
+        # 1. DETECCIÓN DE SEPARADORES (Encabezados)
+        # ---------------------------------------------------------
+        if not fila.get("class") or "sombreado" not in fila.get("class"):
+            celda_header = celdas[0]
+            if celda_header.get("colspan"):
+                estilo_celda = celda_header.get("style", "").upper()
+                texto_separador = celda_header.get_text(strip=True)
+
+                # A) DETECTAR TURNO POR COLOR
+                for hex_code, nombre_turno in COLORES_TURNO.items():
+                    if hex_code in estilo_celda:
+                        turno_actual = nombre_turno
+                        break
+                
+                # B) ACTUALIZAR CONTEXTO (Nombre del Taller/LIP)
+                if texto_separador:
+                    if "Taller:" in texto_separador:
+                        contexto_actual = texto_separador.replace("Taller:", "").strip()
+                    elif "Cursos Optativos" in texto_separador:
+                        contexto_actual = texto_separador.replace("Cursos Optativos Área", "").strip()
+                        turno_actual = "Indistinto"
+                    elif "LIP:" in texto_separador:
+                         if "LIP:" in texto_separador:
+                             contexto_actual = texto_separador.split("LIP:")[1].strip()
+            continue
+
+        # ---------------------------------------------------------
+        # 2. EXTRACCIÓN DE DATOS (Filas 'sombreado')
+        # ---------------------------------------------------------
+        if "sombreado" in fila.get("class", []):
+            if len(celdas) < 5: continue
+            
+            item = {}
+            
+            if tipo_parseo in ["ESTANDAR", "ASIGNATURA_CONTEXTO"]:
+                item["Clave"] = limpiar_texto(celdas[0].text)
+                
+                raw_materia = celdas[1].text
+                if "LIP:" in raw_materia:
+                    item["Materia"] = limpiar_texto(raw_materia.split("LIP:")[0])
+                else:
+                    item["Materia"] = limpiar_texto(raw_materia)
+
+                item["Grupo"] = limpiar_texto(celdas[2].text)
+                item["Profesor"] = limpiar_texto(celdas[4].text)
+                
+                idx_horario = 5
+                if len(celdas) > idx_horario:
+                    item["Horario"] = extraer_horario(celdas[idx_horario])
+                
+                item["Agrupación"] = contexto_actual 
+                item["Turno"] = turno_actual 
+
+            elif tipo_parseo == "PROFESOR":
+                item["Clave"] = limpiar_texto(celdas[0].text)
+                item["Materia"] = limpiar_texto(celdas[1].text)
+                item["Grupo"] = limpiar_texto(celdas[2].text)
+                item["Agrupación"] = limpiar_texto(celdas[4].text) 
+                item["Profesor"] = "BUSQUEDA PROFESOR"
+                item["Horario"] = extraer_horario(celdas[5])
+                item["Turno"] = "ND" 
+
+            elif tipo_parseo == "GENERO":
+                item["Clave"] = limpiar_texto(celdas[0].text)
+                item["Materia"] = limpiar_texto(celdas[1].text)
+                item["Grupo"] = limpiar_texto(celdas[2].text)
+                item["Profesor"] = limpiar_texto(celdas[4].text)
+                item["Horario"] = limpiar_texto(celdas[5].text)
+                item["Agrupación"] = "Requisito Género"
+                item["Turno"] = "Indistinto"
+
+            if item:
+                datos.append(item)
+
+    return pd.DataFrame(datos)
+
+# ==========================================
+# CATÁLOGOS DE index.php
+# ==========================================
+
+def extraer_profesores(html):
+    """
+    Lista de profesores del <select id="idprof"> de index.php.
+    Regresa {nombre visible: valor "RFC|NOMBRE"}.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    select_profes = soup.find("select", {"id": "idprof"})
+
+    if not select_profes:
+        return {} # Si no lo encuentra, regresa vacío
+
+    profesores = {}
+    # Iteramos sobre cada <option> dentro del select
+    for option in select_profes.find_all("option"):
+        valor = option.get("value")
+        texto = option.get_text(strip=True)
+
+        # Filtramos la opción por defecto "--PROFESOR--" y valores vacíos
+        if valor and "PROFESOR" not in valor and len(valor) > 2:
+            profesores[texto] = valor
+
+    return profesores
+
+
+def extraer_selects(html):
+    """
+    Todos los <select> de la página en una sola pasada (lxml).
+    Regresa {id o name del select: [(texto visible, valor), ...]} sin las
+    opciones vacías ("--PROFESOR--", "Selecciona...").
+    """
+    raiz = _raiz_html(html)
+    if raiz is None:
+        return {}
+    selects = {}
+    for select in raiz.iter("select"):
+        nombre = select.get("id") or select.get("name")
+        if not nombre:
+            continue
+        opciones = []
+        for option in select.iter("option"):
+            valor = (option.get("value") or "").strip()
+            if valor:
+                opciones.append((_texto_compacto(option), valor))
+        selects[nombre] = opciones
+    return selects
+
+
+# ==========================================
+# VERIFICACIÓN CONTRA LA IMPLEMENTACIÓN ORIGINAL
+# ==========================================
+
+def comparar_parsers(html, tipo_parseo="ESTANDAR"):
+    """
+    Corre ambos parsers sobre el mismo HTML. Regresa
+    (son_iguales, segundos_lxml, segundos_bs4).
+    """
+    t0 = time.perf_counter()
+    rapido = parsear_html_generico(html, tipo_parseo)
+    t1 = time.perf_counter()
+    referencia = parsear_html_bs4(html, tipo_parseo)
+    t2 = time.perf_counter()
+    return rapido.equals(referencia), t1 - t0, t2 - t1
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Verifica parsear_html_generico contra la versión con bs4.")
+    ap.add_argument("archivos", nargs="+", help="Páginas HTML guardadas")
+    ap.add_argument("--tipo", default="ESTANDAR", choices=["ESTANDAR", "ASIGNATURA_CONTEXTO", "PROFESOR", "GENERO"])
+    args = ap.parse_args(argv)
+
+    diferentes = 0
+    for ruta in args.archivos:
+        with open(ruta, encoding="utf-8", errors="replace") as f:
+            iguales, t_lxml, t_bs4 = comparar_parsers(f.read(), args.tipo)
+        diferentes += not iguales
+        print(f"{'OK ' if iguales else 'DIF'} {ruta}: lxml {t_lxml * 1000:.1f} ms, "
+              f"bs4 {t_bs4 * 1000:.1f} ms (x{t_bs4 / max(t_lxml, 1e-9):.1f})")
+    return 1 if diferentes else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
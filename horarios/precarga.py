@@ -0,0 +1,206 @@
+"""
+Precarga en segundo plano de las búsquedas que suelen seguir.
+
+El recorrido de un alumno es predecible: después de taller X semestre N
+casi siempre mira N+1 o N-1, los complementarios de N (tal 18) o las
+optativas (tal 19). Al terminar una búsqueda, la sesión pide aquí esas
+consultas; unos pocos hilos las meten en la caché compartida (misma ruta
+que buscar_ofertas) y así la segunda y tercera búsqueda salen al instante.
+
+Cortesía con el sitio:
+  * hilos propios y pocos (PRECARGA_HILOS) con su propio ritmo
+    (PRECARGA_POR_SEGUNDO), además del limitador global de conexion.py;
+  * si quedan menos de RESERVA_INTERACTIVA turnos libres en ese limitador,
+    o el circuito del sitio está abierto, no se precarga nada;
+  * lo que ya está en la caché o en el snapshot no se pide.
+
+Cancelación: cada búsqueda nueva de una sesión deja sin efecto lo que esa
+sesión tenía pendiente (lo que no arrancó se cancela; lo que espera turno
+se descarta antes de pedirlo).
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from horarios import busqueda, cache, conexion, metricas
+from horarios.config import CICLO_ACTUAL, PRECARGA_ACTIVA, URL_BASE
+from horarios.crawler import LimiteCortesia, SEMESTRES_COMPLEMENTARIOS, TALLER_COMPLEMENTARIOS, TALLER_OPTATIVAS
+
+logger = logging.getLogger(__name__)
+
+PRECARGA_HILOS = 2
+PRECARGA_POR_SEGUNDO = 2.0
+RESERVA_INTERACTIVA = 4        # turnos del limitador que se dejan a las sesiones
+MAX_POR_BUSQUEDA = 4           # consultas que se adivinan por búsqueda
+MAX_PENDIENTES = 32            # en todo el proceso
+MAX_SESIONES = 1000
+
+
+# ==========================================
+# PREDICCIÓN
+# ==========================================
+
+def _consulta(endpoint, tal, talsem):
+    return {"endpoint": endpoint, "payload_extra": {"tal": tal, "talsem": talsem}, "tipo_parseo": "ESTANDAR"}
+
+
+def _vecinas(c):
+    """Lo que suele buscarse después de la consulta `c`, de más a menos probable."""
+    payload = c.get("payload_extra", {})
+    try:
+        tal, semestre = int(payload.get("tal")), int(payload.get("talsem"))
+    except (TypeError, ValueError):
+        return []
+    optativas = _consulta("taller.php", TALLER_OPTATIVAS, 0)
+    if c["endpoint"] == "LipHorarios.php":
+        return [optativas, _consulta("LipHorarios.php", TALLER_OPTATIVAS, 0)]
+    if c["endpoint"] != "taller.php":
+        return []
+    if tal == TALLER_OPTATIVAS:
+        return [optativas, _consulta("LipHorarios.php", TALLER_OPTATIVAS, 0)]
+    vecinas = []
+    if semestre in SEMESTRES_COMPLEMENTARIOS:
+        for otro in (semestre + 1, semestre - 1):
+            if otro in SEMESTRES_COMPLEMENTARIOS:
+                vecinas.append(_consulta("taller.php", tal, otro))
+        if tal != TALLER_COMPLEMENTARIOS:
+            vecinas.append(_consulta("taller.php", TALLER_COMPLEMENTARIOS, semestre))
+    vecinas.append(optativas)
+    return vecinas
+
+
+def siguientes(consultas, limite=MAX_POR_BUSQUEDA):
+    """
+    Consultas probables después de `consultas` (las que recuerda la sesión):
+    se intercalan las vecinas de cada una, sin repetir ni incluir las actuales.
+    """
+    vistas = {cache.clave_consulta(c["endpoint"], c["payload_extra"], c.get("tipo_parseo", "ESTANDAR"))
+              for c in consultas}
+    listas = [_vecinas(c) for c in consultas]
+    resultado = []
+    for ronda in range(max(map(len, listas), default=0)):
+        for vecinas in listas:
+            if ronda < len(vecinas):
+                c = vecinas[ronda]
+                clave = cache.clave_consulta(c["endpoint"], c["payload_extra"], c["tipo_parseo"])
+                if clave not in vistas:
+                    vistas.add(clave)
+                    resultado.append(c)
+                    if len(resultado) >= limite:
+                        return resultado
+    return resultado
+
+
+# ==========================================
+# PRECARGADOR
+# ==========================================
+
+class Precargador:
+    """Hilos de fondo que calientan la caché compartida; uno por proceso."""
+
+    def __init__(self, hilos=PRECARGA_HILOS, por_segundo=PRECARGA_POR_SEGUNDO,
+                 reserva=RESERVA_INTERACTIVA, max_pendientes=MAX_PENDIENTES):
+        self.reserva = reserva
+        self.max_pendientes = max_pendientes
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="precarga")
+        self._limite = LimiteCortesia(por_segundo)
+        self._lock = threading.Lock()
+        self._generacion = OrderedDict()   # sesión -> número de su última búsqueda
+        self._futuros = {}                 # sesión -> futuros de esa búsqueda
+        self._pendientes = 0
+        self.contadores = {
+            "programadas": 0, "hechas": 0, "ya_en_cache": 0, "canceladas": 0,
+            "sitio_ocupado": 0, "descartadas": 0, "errores": 0,
+        }
+
+    def precargar(self, sesion, consultas, ciclo=CICLO_ACTUAL):
+        """
+        Programa las consultas probables después de `consultas` para la
+        sesión `sesion` y cancela lo que tenía pendiente. No bloquea;
+        regresa cuántas quedaron programadas.
+        """
+        probables = siguientes(consultas)
+        candidatas = [c for c in probables if not busqueda.en_cache(ciclo=ciclo, **c)]
+        with self._lock:
+            generacion = self._generacion.pop(sesion, 0) + 1
+            self._generacion[sesion] = generacion
+            while len(self._generacion) > MAX_SESIONES:
+                viejo, _ = self._generacion.popitem(last=False)
+                self._futuros.pop(viejo, None)
+            for futuro in self._futuros.pop(sesion, []):
+                if futuro.cancel():
+                    self._pendientes -= 1
+                    self.contadores["canceladas"] += 1
+            self.contadores["ya_en_cache"] += len(probables) - len(candidatas)
+            futuros = []
+            for c in candidatas:
+                if self._pendientes >= self.max_pendientes:
+                    self.contadores["descartadas"] += len(candidatas) - len(futuros)
+                    break
+                self._pendientes += 1
+                futuros.append(self._pool.submit(self._tarea, sesion, generacion, c, ciclo))
+            self._futuros[sesion] = futuros
+            self.contadores["programadas"] += len(futuros)
+        return len(futuros)
+
+    def _vigente(self, sesion, generacion):
+        with self._lock:
+            return self._generacion.get(sesion) == generacion
+
+    def _contar(self, nombre):
+        with self._lock:
+            self.contadores[nombre] += 1
+        metricas.contar("precargas", estado=nombre)
+
+    def _tarea(self, sesion, generacion, consulta, ciclo):
+        try:
+            if not self._vigente(sesion, generacion):
+                self._contar("canceladas")
+                return
+            self._limite.esperar()
+            # Mientras esperaba turno la sesión pudo buscar otra cosa
+            if not self._vigente(sesion, generacion):
+                self._contar("canceladas")
+                return
+            if (not conexion.origen_disponible(URL_BASE)
+                    or conexion.peticiones_en_curso() > conexion.MAX_CONCURRENTES - self.reserva):
+                self._contar("sitio_ocupado")
+                return
+            if busqueda.en_cache(ciclo=ciclo, **consulta):
+                self._contar("ya_en_cache")
+                return
+            busqueda.buscar_ofertas(ciclo=ciclo, **consulta)
+            self._contar("hechas")
+        except Exception as e:
+            self._contar("errores")
+            logger.info("Precarga de %s %s falló: %s", consulta["endpoint"], consulta["payload_extra"], e)
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+
+    def estadisticas(self):
+        with self._lock:
+            return {**self.contadores, "pendientes": self._pendientes, "sesiones": len(self._generacion)}
+
+
+_precargador = None
+_lock = threading.Lock()
+
+
+def precargador():
+    """Precargador del proceso (se crea la primera vez)."""
+    global _precargador
+    if _precargador is None:
+        with _lock:
+            if _precargador is None:
+                _precargador = Precargador()
+                metricas.registrar_colector("precarga", _precargador.estadisticas)
+    return _precargador
+
+
+def precargar(sesion, consultas, ciclo=CICLO_ACTUAL):
+    """Atajo para la app: no hace nada si HORARIOS_PRECARGA=0."""
+    if not PRECARGA_ACTIVA or not consultas:
+        return 0
+    return precargador().precargar(sesion, consultas, ciclo)
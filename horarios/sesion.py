@@ -0,0 +1,148 @@
+"""
+Estado por sesión acotado.
+
+Una sesión de Streamlit no debe guardar su propia copia de los resultados:
+guarda solo las consultas (endpoint, payload, tipo; varias si la búsqueda
+fue múltiple) y la página que está viendo; el DataFrame vive una sola vez en la caché compartida del proceso
+y todas las sesiones leen el mismo objeto (de solo lectura).
+
+Aquí también se mide cuánto ocupa cada sesión (sin contar lo compartido)
+y se lleva un resumen del proceso para planear capacidad.
+"""
+import sys
+import threading
+import time
+
+from horarios.conflictos import COLUMNAS_MASCARA
+from horarios.horario import interpretar_slots
+
+FILAS_POR_PAGINA = 200
+VIGENCIA_REPORTE_SEGUNDOS = 60 * 60   # sesiones sin rerun en una hora ya no cuentan
+
+
+# ==========================================
+# PAGINACIÓN
+# ==========================================
+
+def paginas(total, por_pagina=FILAS_POR_PAGINA):
+    return max(1, -(-total // por_pagina))
+
+
+def rango_pagina(numero, total, por_pagina=FILAS_POR_PAGINA):
+    """(inicio, fin) de la página `numero` (desde 1), recortada a [1, paginas]."""
+    numero = min(max(1, numero), paginas(total, por_pagina))
+    inicio = (numero - 1) * por_pagina
+    return inicio, min(inicio + por_pagina, total)
+
+
+# ==========================================
+# MI HORARIO
+# ==========================================
+
+def materia_para_horario(row):
+    """Fila de resultados (Series o dict) -> entrada de mi_horario."""
+    return {
+        "id": f"{row['Materia']}-{row['Grupo']}",
+        # Clave + Grupo identifican al grupo en el enlace del horario (horarios/enlace.py)
+        "Clave": str(row.get("Clave", "")),
+        "Materia": row["Materia"],
+        "Grupo": row["Grupo"],
+        "Horario": row.get("Horario", ""),
+        "Profesor": row.get("Profesor", ""),
+        # Se interpreta una sola vez aquí, no en cada rerun
+        "Bloques": interpretar_slots(row.get("Horario", "")),
+        # Máscaras por día de la tabla compacta (grid y choques las usan directo)
+        **{c: int(row[c]) for c in COLUMNAS_MASCARA if c in row},
+    }
+
+
+def aplicar_cambios(mi_horario, registros):
+    """
+    Corrige en sitio los grupos de mi_horario que cambiaron según los
+    registros del feed (horarios/incremental.py). Regresa los avisos para
+    la sesión; un grupo que desaparece se deja y solo se avisa.
+    """
+    from horarios.incremental import describir
+
+    avisos = []
+    for registro in registros:
+        # (Clave, Grupo) identifica al grupo: el nombre de la materia puede
+        # cambiar en el mismo evento o repetirse entre claves
+        eventos = {}
+        for evento in registro["eventos"]:
+            eventos.setdefault((evento["clave"], evento["grupo"]), []).append(evento)
+        for i, materia in enumerate(mi_horario):
+            propios = eventos.get((str(materia.get("Clave", "")), str(materia["Grupo"])), [])
+            vigentes = [e for e in propios if e["tipo"] != "baja"]
+            if vigentes:
+                # La fila nueva trae el horario y profesor actuales; el id se conserva
+                mi_horario[i] = {**materia_para_horario(vigentes[-1]["fila"]), "id": materia["id"]}
+                avisos.extend(describir(e) for e in vigentes if e["tipo"] == "cambio")
+            elif propios:
+                avisos.append(describir(propios[0]))
+    return avisos
+
+
+# ==========================================
+# MEMORIA
+# ==========================================
+
+def tamano(objeto, compartidos=frozenset(), _vistos=None):
+    """
+    Bytes aproximados de `objeto` y lo que contiene. No cuenta los objetos
+    cuyo id() está en `compartidos` (por ejemplo lo que está en la caché).
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(objeto) in vistos or id(objeto) in compartidos:
+        return 0
+    vistos.add(id(objeto))
+
+    # DataFrame / Series / arreglos: ya saben medirse
+    uso = getattr(objeto, "memory_usage", None)
+    if callable(uso) and hasattr(objeto, "columns"):
+        return int(uso(deep=True).sum())
+    if callable(uso) and hasattr(objeto, "dtype"):
+        return int(uso(deep=True))
+    if hasattr(objeto, "nbytes") and hasattr(objeto, "dtype"):
+        return int(objeto.nbytes)
+
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        for clave, valor in objeto.items():
+            total += tamano(clave, compartidos, vistos) + tamano(valor, compartidos, vistos)
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        for valor in objeto:
+            total += tamano(valor, compartidos, vistos)
+    return total
+
+
+def memoria_sesion(estado, compartidos=frozenset()):
+    """{nombre: bytes} de cada valor del estado de la sesión, de mayor a menor."""
+    vistos = set()
+    medidas = {str(nombre): tamano(valor, compartidos, vistos) for nombre, valor in estado.items()}
+    return dict(sorted(medidas.items(), key=lambda x: -x[1]))
+
+
+_reportes = {}
+_lock = threading.Lock()
+
+
+def reportar(id_sesion, total_bytes):
+    """Última medición de una sesión (se llama en cada rerun)."""
+    with _lock:
+        _reportes[id_sesion] = (total_bytes, time.time())
+
+
+def resumen_sesiones():
+    """Sesiones activas del proceso y su memoria propia (sin lo compartido)."""
+    limite = time.time() - VIGENCIA_REPORTE_SEGUNDOS
+    with _lock:
+        for id_sesion in [i for i, (_, t) in _reportes.items() if t < limite]:
+            del _reportes[id_sesion]
+        tamanos = [b for b, _ in _reportes.values()]
+    return {
+        "sesiones": len(tamanos),
+        "kb_total": round(sum(tamanos) / 1024, 1),
+        "kb_promedio": round(sum(tamanos) / len(tamanos) / 1024, 1) if tamanos else 0.0,
+        "kb_max": round(max(tamanos, default=0) / 1024, 1),
+    }
@@ -0,0 +1,57 @@
+"""
+Consultas al sitio de escolares (sin interfaz): arman el payload de cada
+PHP y regresan el HTML. Lanzan excepción si falla; la interfaz decide
+cómo mostrar el error.
+
+La capa de conexión (requests) se importa al primer uso: armar_payload no
+la necesita y lo usan el almacén y la caché.
+"""
+from horarios import metricas
+from horarios.config import CICLO_ACTUAL, HEADERS, URL_BASE
+
+
+def armar_payload(payload_extra, ciclo=CICLO_ACTUAL):
+    """Payload completo que se manda al PHP (incluye el ciclo escolar)."""
+    payload = {
+        "estu": 0,
+        "qsemac": ciclo
+    }
+    payload.update(payload_extra)
+    return payload
+
+
+def descargar_html(endpoint, payload_extra, ciclo=CICLO_ACTUAL):
+    """Hace la consulta al PHP y regresa el HTML."""
+    from horarios import conexion
+
+    url = f"{URL_BASE}/hor/{endpoint}"
+    # Sesión compartida del proceso: keep-alive, gzip y reintentos con backoff
+    with metricas.fase("descarga"):
+        response = conexion.post(url, data=armar_payload(payload_extra, ciclo), headers=HEADERS, endpoint=endpoint)
+    with metricas.fase("decodificacion"):
+        return response.text
+
+
+def descargar_index():
+    """HTML de index.php (ahí vienen los <select> de catálogos)."""
+    from horarios import conexion
+
+    with metricas.fase("descarga"):
+        response = conexion.get(f"{URL_BASE}/index.php", headers=HEADERS, endpoint="index.php")
+    with metricas.fase("decodificacion"):
+        return response.text
+
+
+def consultar_index(etag=None, modificado=None):
+    """
+    GET condicional de index.php: con el ETag / Last-Modified de la última
+    descarga el servidor puede contestar 304 sin cuerpo. Regresa la respuesta.
+    """
+    from horarios import conexion
+
+    headers = dict(HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if modificado:
+        headers["If-Modified-Since"] = modificado
+    return conexion.get(f"{URL_BASE}/index.php", headers=headers, endpoint="index.php")
@@ -0,0 +1,117 @@
+import copy
+
+import pandas as pd
+import pytest
+
+from horarios import almacen, cache
+from horarios.sitio import armar_payload
+
+CAMPOS = ["Clave", "Materia", "Grupo", "Profesor", "Horario", "Agrupación", "Turno"]
+
+
+def _oferta(*valores):
+    return dict(zip(CAMPOS, valores))
+
+
+def _consulta(endpoint, payload, filas, tipo="ESTANDAR"):
+    clave = cache.clave_consulta(endpoint, armar_payload(payload, "20262"), tipo)
+    return {"endpoint": endpoint, "payload": payload, "tipo_parseo": tipo, "clave": clave, "filas": filas}
+
+
+def _snapshot():
+    ofertas = [
+        _oferta("1555", "PROYECTO", "0101", "PÉREZ JUAN", "LU,MI 7:00-9:00", "MAX CETTO", "Matutino"),
+        _oferta("1555", "PROYECTO", "0102", "GÓMEZ ANA", "MA 14:00-16:00", "MAX CETTO", "Vespertino"),
+        _oferta("1620", "TEORÍA", "0003", "NÚÑEZ PEPE", "VI 16:00-18:00", "MAX CETTO", "Vespertino"),
+        _oferta("1555", "PROYECTO", "0101", "BUSQUEDA PROFESOR", "LU,MI 7:00-9:00", "MAX CETTO", ""),
+    ]
+    consultas = [
+        _consulta("taller.php", {"tal": 6, "talsem": 1}, [0, 1, 2]),
+        _consulta("asignatura.php", {"asig": 1555}, [1, 0], "ASIGNATURA_CONTEXTO"),
+        _consulta("profe.php", {"idprof": "PEJ|PEREZ"}, [3], "PROFESOR"),
+    ]
+    return {"ciclo": "20262", "generado": "2026-01-10T08:00:00", "ofertas": ofertas, "consultas": consultas}
+
+
+def _cambiar(snapshot):
+    """
+    Como un refresco incremental: 0102 cambia de horario (oferta nueva en el
+    id 4, baja del 1), 1620 desaparece (baja del 2) y entra 1731 en su hueco.
+    """
+    nuevo = copy.deepcopy(snapshot)
+    ofertas = nuevo["ofertas"]
+    altas = {
+        4: _oferta("1555", "PROYECTO", "0102", "GÓMEZ ANA", "JU 14:00-16:00", "MAX CETTO", "Vespertino"),
+        2: _oferta("1731", "TALLER", "0201", "RUIZ LUIS", "SA 9:00-13:00", "MAX CETTO", "Matutino"),
+    }
+    ofertas[1] = None
+    ofertas.append(None)
+    for i, oferta in altas.items():
+        ofertas[i] = oferta
+    nuevo["consultas"][0]["filas"] = [0, 4, 2]
+    nuevo["consultas"][1]["filas"] = [4, 0]
+    nuevo["generado"] = "2026-01-10T09:00:00"
+    return nuevo, altas, [1], nuevo["consultas"][:2]
+
+
+@pytest.fixture
+def almacenes(tmp_path):
+    """(en sitio, reconstruido) después de los mismos cambios."""
+    snapshot = _snapshot()
+    en_sitio = str(tmp_path / "en_sitio.sqlite")
+    almacen.construir(snapshot, en_sitio)
+    nuevo, altas, bajas, consultas = _cambiar(snapshot)
+    almacen.aplicar_cambios(en_sitio, altas, bajas, consultas, {"generado": nuevo["generado"]})
+    completo = str(tmp_path / "completo.sqlite")
+    almacen.construir(nuevo, completo)
+    return almacen.AlmacenOfertas(en_sitio), almacen.AlmacenOfertas(completo)
+
+
+BUSQUEDAS = [
+    ("taller.php", {"tal": 6, "talsem": 1}, "ESTANDAR"),
+    ("asignatura.php", {"asig": 1555}, "ASIGNATURA_CONTEXTO"),
+    ("profe.php", {"idprof": "PEJ|PEREZ"}, "PROFESOR"),
+    ("taller.php", {"tal": 6, "talsem": 2}, "ESTANDAR"),
+]
+
+
+@pytest.mark.parametrize("endpoint,payload,tipo", BUSQUEDAS)
+def test_en_sitio_igual_que_reconstruido(almacenes, endpoint, payload, tipo):
+    en_sitio, completo = almacenes
+    assert en_sitio.ids_consulta(endpoint, payload, tipo, "20262") == completo.ids_consulta(endpoint, payload, tipo, "20262")
+    uno = en_sitio.buscar(endpoint, payload, tipo, "20262")
+    otro = completo.buscar(endpoint, payload, tipo, "20262")
+    if otro is None:
+        assert uno is None
+    else:
+        pd.testing.assert_frame_equal(uno, otro)
+
+
+def test_buscar_da_las_filas_en_el_orden_de_la_consulta(almacenes):
+    en_sitio, _ = almacenes
+    df = en_sitio.buscar("asignatura.php", {"asig": 1555}, "ASIGNATURA_CONTEXTO", "20262")
+    assert list(df.columns) == CAMPOS
+    assert list(df["Grupo"]) == ["0102", "0101"]
+    assert df["Horario"].iloc[0] == "JU 14:00-16:00"
+
+
+def test_grupo_y_grupos_despues_de_los_cambios(almacenes):
+    for uno in almacenes:
+        assert uno.grupo(1555, "0102")["Horario"] == "JU 14:00-16:00"
+        # Prefiere la fila con profesor a la de profe.php
+        assert uno.grupo("1555", "0101")["Profesor"] == "PÉREZ JUAN"
+        assert uno.grupo("1620", "0003") is None
+        assert list(uno.grupos(clave="1555")["Grupo"]) == ["0101", "0102"]
+        assert list(uno.grupos(dia="Jueves")["Clave"]) == ["1555"]
+        assert list(uno.grupos(dia=5, desde=9, hasta=13)["Clave"]) == ["1731"]
+        assert uno.grupos(dia="Martes").empty
+        assert uno.grupos(dia="Sábado", desde=10).empty
+        assert list(uno.grupos(turno="Vespertino")["Grupo"]) == ["0102"]
+    assert almacenes[0].meta()["generado"] == "2026-01-10T09:00:00"
+
+
+def test_ofertas_sin_los_huecos(almacenes):
+    en_sitio, completo = almacenes
+    pd.testing.assert_frame_equal(en_sitio.ofertas(), completo.ofertas())
+    assert list(en_sitio.ofertas()["id"]) == [0, 2, 3, 4]
+    assert en_sitio.asignaturas() == [("1555", "PROYECTO"), ("1731", "TALLER")]
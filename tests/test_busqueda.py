@@ -0,0 +1,98 @@
+import pytest
+
+from bench import sinteticos
+from horarios import almacen, busqueda, cache
+from horarios.busqueda import BusquedaIncompleta, buscar_combinado, clave_combinada, invalidar_consultas
+from horarios.cache import CacheRespuestas
+from horarios.sitio import armar_payload
+
+UNO = {"endpoint": "taller.php", "payload_extra": {"tal": 6, "talsem": 1}, "tipo_parseo": "ESTANDAR"}
+DOS = {"endpoint": "taller.php", "payload_extra": {"tal": 6, "talsem": 2}, "tipo_parseo": "ESTANDAR"}
+TRES = {"endpoint": "area.php", "payload_extra": {"area": 3}, "tipo_parseo": "ESTANDAR"}
+
+
+def _clave(consulta):
+    return cache.clave_consulta(consulta["endpoint"], armar_payload(consulta["payload_extra"], "20262"),
+                                consulta["tipo_parseo"])
+
+
+@pytest.fixture
+def sitio(monkeypatch):
+    """Sitio falso: {(endpoint, talsem/area): html o excepción}; cuenta las descargas."""
+    respuestas, descargas = {}, []
+    monkeypatch.setattr(cache, "_cache_compartida", CacheRespuestas())
+    monkeypatch.setattr(busqueda, "_uniones", type(busqueda._uniones)())
+    monkeypatch.setattr(almacen, "almacen_local", lambda ciclo: None)
+
+    def descargar(endpoint, payload, ciclo):
+        llave = (endpoint, payload.get("talsem", payload.get("area")))
+        descargas.append(llave)
+        respuesta = respuestas[llave]
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+    monkeypatch.setattr(busqueda, "descargar_html", descargar)
+    return respuestas, descargas
+
+
+def test_incompleta_trae_lo_que_llego_y_no_se_guarda(sitio):
+    respuestas, descargas = sitio
+    respuestas[("taller.php", 1)] = sinteticos.pagina_taller(5, seed=1)
+    respuestas[("taller.php", 2)] = ConnectionError("sin respuesta")
+
+    with pytest.raises(BusquedaIncompleta) as error:
+        buscar_combinado([UNO, DOS], "20262")
+    assert len(error.value.df) == 5
+    assert list(error.value.errores) == [1]
+    assert cache.cache_compartida().valor(clave_combinada([UNO, DOS], "20262")) is None
+
+    # Al volver el sitio se arma la unión completa (UNO ya estaba en caché)
+    respuestas[("taller.php", 2)] = sinteticos.pagina_taller(4, seed=2)
+    df = buscar_combinado([UNO, DOS], "20262")
+    assert len(df) == 9
+    assert descargas.count(("taller.php", 1)) == 1
+    assert cache.cache_compartida().valor(clave_combinada([UNO, DOS], "20262")) is df
+
+
+def test_si_fallan_todas_se_propaga_el_error(sitio):
+    respuestas, _ = sitio
+    respuestas[("taller.php", 1)] = respuestas[("taller.php", 2)] = TimeoutError("lento")
+    with pytest.raises(TimeoutError):
+        buscar_combinado([UNO, DOS], "20262")
+
+
+def test_clave_combinada_sin_importar_el_orden(sitio):
+    assert clave_combinada([UNO, DOS, TRES], "20262") == clave_combinada([TRES, UNO, DOS], "20262")
+    assert clave_combinada([UNO, DOS], "20262") != clave_combinada([UNO, TRES], "20262")
+    assert clave_combinada([UNO, DOS], "20262") != clave_combinada([UNO, DOS], "20261")
+    assert clave_combinada([UNO], "20262").startswith(busqueda.PREFIJO_UNION)
+
+
+def test_invalidar_una_consulta_borra_solo_sus_uniones(sitio):
+    compartida = cache.cache_compartida()
+    uniones = {
+        "uno_dos": clave_combinada([UNO, DOS], "20262"),
+        "uno_tres": clave_combinada([TRES, UNO], "20262"),
+        "dos_tres": clave_combinada([DOS, TRES], "20262"),
+    }
+    for clave in [*uniones.values(), _clave(UNO), _clave(DOS), "almacen:" + _clave(UNO)]:
+        compartida.guardar(clave, clave)
+
+    invalidar_consultas([_clave(UNO)])
+    quedan = {nombre for nombre, clave in uniones.items() if compartida.valor(clave) is not None}
+    assert quedan == {"dos_tres"}
+    assert compartida.valor(_clave(UNO)) is None
+    assert compartida.valor("almacen:" + _clave(UNO)) is None
+    assert compartida.valor(_clave(DOS)) == _clave(DOS)
+
+
+def test_uniones_previas_borra_tambien_las_desconocidas(sitio):
+    compartida = cache.cache_compartida()
+    compartida.guardar(busqueda.PREFIJO_UNION + "de_antes", 1)
+    compartida.guardar(_clave(DOS), 2)
+    invalidar_consultas([_clave(UNO)])
+    assert compartida.valor(busqueda.PREFIJO_UNION + "de_antes") == 1
+    invalidar_consultas([_clave(UNO)], uniones_previas=True)
+    assert compartida.valor(busqueda.PREFIJO_UNION + "de_antes") is None
+    assert compartida.valor(_clave(DOS)) == 2
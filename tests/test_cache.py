@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from horarios.cache import CacheRespuestas
+
+
+def _cargador_lento(llamadas, valor, espera=0.2):
+    def cargar():
+        llamadas.append(1)
+        time.sleep(espera)
+        return valor
+    return cargar
+
+
+def test_single_flight_una_sola_carga():
+    cache = CacheRespuestas()
+    llamadas, resultados = [], []
+    cargador = _cargador_lento(llamadas, "dato")
+    hilos = [threading.Thread(target=lambda: resultados.append(cache.obtener("k", cargador))) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(llamadas) == 1
+    assert resultados == ["dato"] * 8
+    assert cache.estadisticas()["fusionadas"] == 7
+
+
+def test_error_sin_dato_viejo_se_propaga_a_todos():
+    cache = CacheRespuestas()
+    errores = []
+
+    def falla():
+        time.sleep(0.1)
+        raise ConnectionError("caído")
+
+    def pedir():
+        try:
+            cache.obtener("k", falla)
+        except ConnectionError as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=pedir) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(errores) == 4
+    assert cache.valor("k") is None
+
+
+def test_dato_vencido_se_sirve_si_el_origen_falla():
+    cache = CacheRespuestas(ttl=10, ventana_stale=0)
+    cache.guardar("k", "viejo", creado=time.time() - 60)
+
+    def falla():
+        raise ConnectionError("caído")
+
+    assert cache.obtener("k", falla) == "viejo"
+    assert cache.estadisticas()["servidas_por_falla"] == 1
+
+
+def test_stale_while_revalidate():
+    cache = CacheRespuestas(ttl=10, ventana_stale=600)
+    cache.guardar("k", "viejo", creado=time.time() - 60)
+    llamadas = []
+    assert cache.obtener("k", _cargador_lento(llamadas, "nuevo", espera=0.05)) == "viejo"
+    for _ in range(50):
+        if cache.estadisticas()["revalidaciones"]:
+            break
+        time.sleep(0.02)
+    assert cache.obtener("k", _cargador_lento(llamadas, "otro")) == "nuevo"
+    assert len(llamadas) == 1
+
+
+def test_consulta_durante_revalidacion_se_une_al_vuelo():
+    cache = CacheRespuestas(ttl=10, ventana_stale=600)
+    cache.guardar("k", "viejo", creado=time.time() - 60)
+    llamadas = []
+    cargador = _cargador_lento(llamadas, "nuevo", espera=0.3)
+    assert cache.obtener("k", cargador) == "viejo"
+    # La entrada desaparece (expulsión / invalidación) mientras se revalida
+    cache.invalidar("k")
+    assert cache.obtener("k", cargador) == "nuevo"
+    assert len(llamadas) == 1
+    assert cache.estadisticas()["fusionadas"] == 1
+
+
+def test_revalidacion_fallida_entrega_el_dato_viejo_a_quien_espera():
+    cache = CacheRespuestas(ttl=10, ventana_stale=600)
+    cache.guardar("k", "viejo", creado=time.time() - 60)
+
+    def falla():
+        time.sleep(0.2)
+        raise ConnectionError("caído")
+
+    assert cache.obtener("k", falla) == "viejo"
+    cache.invalidar("k")
+    assert cache.obtener("k", falla) == "viejo"
+    assert cache.estadisticas()["errores_revalidacion"] == 1
+
+
+def test_lru_y_disco(tmp_path):
+    cache = CacheRespuestas(max_entradas=2, directorio=str(tmp_path))
+    for i in range(3):
+        cache.guardar(f"k{i}", i)
+    assert cache.estadisticas()["expulsiones"] == 1
+    # k0 salió de memoria pero sigue en disco
+    assert cache.obtener("k0", lambda: pytest.fail("no debía cargarse")) == 0
+    assert cache.estadisticas()["aciertos_disco"] == 1
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from horarios import catalogos
+from horarios.config import VIGENCIA_CATALOGOS_HORAS
+
+VENCIDO = time.time() - VIGENCIA_CATALOGOS_HORAS * 3600 - 60
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogos, "_documentos", {})
+    monkeypatch.setattr(catalogos, "_refrescando", {})
+    return str(tmp_path)
+
+
+def _refresco_lento(llamadas, talleres, espera=0.3, falla=False):
+    def refrescar(directorio):
+        llamadas.append(directorio)
+        time.sleep(espera)
+        if falla:
+            raise ConnectionError("index.php no responde")
+        return {"catalogos": {"TALLERES": talleres}, "verificado": time.time()}, "nuevo"
+    return refrescar
+
+
+def test_vencidos_se_sirven_mientras_un_hilo_refresca(directorio, monkeypatch):
+    catalogos._escribir(catalogos.ruta_catalogos(directorio),
+                        {"catalogos": {"TALLERES": {"VIEJO": 1}}, "verificado": VENCIDO})
+    llamadas = []
+    monkeypatch.setattr(catalogos, "refrescar", _refresco_lento(llamadas, {"NUEVO": 2}))
+
+    t0 = time.perf_counter()
+    vistos = [catalogos.catalogos(directorio)["TALLERES"] for _ in range(20)]
+    assert time.perf_counter() - t0 < 0.2
+    assert vistos == [{"VIEJO": 1}] * 20
+    for _ in range(50):
+        if catalogos.catalogos(directorio)["TALLERES"] == {"NUEVO": 2}:
+            break
+        time.sleep(0.02)
+    assert catalogos.catalogos(directorio)["TALLERES"] == {"NUEVO": 2}
+    assert llamadas == [directorio]
+
+
+def test_sin_nada_guardado_todos_esperan_un_solo_refresco(directorio, monkeypatch):
+    llamadas, resultados = [], []
+    monkeypatch.setattr(catalogos, "refrescar", _refresco_lento(llamadas, {"NUEVO": 2}, espera=0.2))
+    hilos = [threading.Thread(target=lambda: resultados.append(catalogos.catalogos(directorio)))
+             for _ in range(5)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert llamadas == [directorio]
+    assert [r["TALLERES"] for r in resultados] == [{"NUEVO": 2}] * 5
+    # Lo que el sitio no trajo sale del respaldo
+    assert resultados[0]["LIPS"] == catalogos.RESPALDO["LIPS"]
+
+
+def test_si_el_sitio_falla_se_usa_el_respaldo_y_no_se_insiste(directorio, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(catalogos, "refrescar", _refresco_lento(llamadas, None, espera=0, falla=True))
+    completos = catalogos.catalogos(directorio)
+    assert completos["TALLERES"] == catalogos.RESPALDO["TALLERES"]
+    catalogos.catalogos(directorio)
+    assert llamadas == [directorio]
+    assert not catalogos._refrescando
+
+
+def test_extraer_catalogos_de_index():
+    from bench import sinteticos
+
+    extraidos = catalogos.extraer_catalogos(sinteticos.pagina_index(50))
+    assert len(extraidos["PROFESORES"]) == 50
+    assert set(extraidos) == set(catalogos.SELECTS)
+
+
+class _Respuesta:
+    def __init__(self, html, status_code=200, headers=None):
+        self.text, self.content = html, html.encode("utf-8")
+        self.status_code, self.headers = status_code, headers or {}
+
+
+def test_un_solo_archivo_sin_ciclo(directorio, monkeypatch):
+    from bench import sinteticos
+    from horarios import sitio
+
+    html = sinteticos.pagina_index(5)
+    pedidas = []
+
+    def consultar_index(etag=None, modificado=None):
+        pedidas.append(etag)
+        if etag == "v1":
+            return _Respuesta("", 304)
+        return _Respuesta(html, headers={"ETag": "v1"})
+
+    monkeypatch.setattr(sitio, "consultar_index", consultar_index)
+    documento, estado = catalogos.refrescar(directorio)
+    assert estado == "nuevo" and "ciclo" not in documento
+    assert catalogos.ruta_catalogos(directorio).endswith("catalogos.json")
+    assert catalogos.leer(catalogos.ruta_catalogos(directorio))["catalogos"] == documento["catalogos"]
+    # La segunda vez se pregunta con el ETag guardado
+    assert catalogos.refrescar(directorio)[1] == "304"
+    assert pedidas == [None, "v1"]
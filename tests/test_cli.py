@@ -0,0 +1,24 @@
+import pytest
+
+from horarios import busqueda
+from horarios.__main__ import main
+
+
+def test_dia_libre_invalido_se_rechaza_antes_de_consultar(monkeypatch, capsys):
+    def no_consultar(*args, **kwargs):
+        raise AssertionError("no debía consultar el sitio")
+
+    monkeypatch.setattr(busqueda, "ofertas_de_asignaturas", no_consultar)
+    with pytest.raises(SystemExit) as salida:
+        main(["solve", "1555", "--dias-libres", "Viernes", "Viernesx"])
+    assert salida.value.code == 2
+    assert "Viernesx" in capsys.readouterr().err
+
+
+def test_dias_libres_validos(monkeypatch, capsys):
+    ofertas = [{"Clave": "1555", "Grupo": "0101", "Horario": "VI 7-9"},
+               {"Clave": "1555", "Grupo": "0102", "Horario": "SA 7-9"}]
+    monkeypatch.setattr(busqueda, "ofertas_de_asignaturas", lambda claves, ciclo: (ofertas, {}))
+    assert main(["solve", "1555", "--dias-libres", "Viernes", "Miércoles"]) == 0
+    salida = capsys.readouterr().out
+    assert "0102" in salida and "0101" not in salida
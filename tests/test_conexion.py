@@ -0,0 +1,86 @@
+import time
+
+import pytest
+import requests
+
+from horarios import conexion
+from horarios.conexion import Interruptor
+
+
+def _vencer_enfriamiento(interruptor):
+    interruptor.abierto_desde = time.monotonic() - interruptor.enfriamiento - 1
+
+
+def test_abre_tras_n_fallas_seguidas():
+    interruptor = Interruptor(fallas_para_abrir=3, enfriamiento=60)
+    for _ in range(2):
+        interruptor.falla()
+    assert interruptor.estado() == "cerrado"
+    interruptor.falla()
+    assert interruptor.estado() == "abierto"
+    assert not interruptor.permitir()
+
+
+def test_exito_reinicia_la_cuenta():
+    interruptor = Interruptor(fallas_para_abrir=3, enfriamiento=60)
+    interruptor.falla()
+    interruptor.falla()
+    interruptor.exito()
+    interruptor.falla()
+    assert interruptor.estado() == "cerrado"
+
+
+def test_semiabierto_deja_pasar_una_sola_prueba():
+    interruptor = Interruptor(fallas_para_abrir=1, enfriamiento=60)
+    interruptor.falla()
+    _vencer_enfriamiento(interruptor)
+    assert interruptor.estado() == "semiabierto"
+    assert interruptor.permitir()
+    assert not interruptor.permitir()
+    interruptor.exito()
+    assert interruptor.estado() == "cerrado"
+    assert interruptor.permitir()
+
+
+def test_prueba_fallida_vuelve_a_abrir():
+    interruptor = Interruptor(fallas_para_abrir=5, enfriamiento=60)
+    for _ in range(5):
+        interruptor.falla()
+    _vencer_enfriamiento(interruptor)
+    assert interruptor.permitir()
+    interruptor.falla()
+    assert interruptor.estado() == "abierto"
+    assert not interruptor.permitir()
+
+
+class _SesionFalsa:
+    def __init__(self, error):
+        self.error = error
+
+    def request(self, *args, **kwargs):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [ValueError("respuesta ilegible"), KeyboardInterrupt()])
+def test_error_inesperado_no_deja_tomada_la_prueba(monkeypatch, error):
+    url = f"http://interruptor-{type(error).__name__}.invalid/taller.php"
+    interruptor = conexion._interruptor(url)
+    interruptor.falla()
+    interruptor.abierto_desde = time.monotonic() - interruptor.enfriamiento - 1
+    monkeypatch.setattr(conexion, "obtener_sesion", lambda: _SesionFalsa(error))
+    with pytest.raises(type(error)):
+        conexion.get(url)
+    assert not interruptor.probando
+    assert interruptor.permitir()
+    assert conexion.peticiones_en_curso() == 0
+
+
+def test_circuito_abierto_no_consulta(monkeypatch):
+    url = "http://interruptor-abierto.invalid/taller.php"
+    interruptor = conexion._interruptor(url)
+    for _ in range(interruptor.fallas_para_abrir):
+        interruptor.falla()
+    monkeypatch.setattr(conexion, "obtener_sesion", lambda: _SesionFalsa(AssertionError("no debía consultar")))
+    with pytest.raises(conexion.CircuitoAbierto):
+        conexion.get(url)
+    assert isinstance(conexion.CircuitoAbierto(), requests.ConnectionError)
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from bench import sinteticos
+from horarios.conflictos import (
+    Conflicto, chocan, choques_con_horario, describir, detectar_conflictos, mascaras_de,
+    mascaras_de_bloques, matriz_mascaras, slots_de_mascara, union,
+)
+from horarios.horario import Bloque, interpretar_slots
+from horarios.oferta import compactar
+
+
+def _materia(id_, horario):
+    return {"id": id_, "Horario": horario}
+
+
+def test_mascaras_por_dia():
+    mascaras = mascaras_de_bloques((Bloque(0, 14, 18), Bloque(2, 26, 27), Bloque(5, 0, 48)))
+    assert mascaras == (0b1111 << 14, 0, 1 << 26, 0, 0, (1 << 48) - 1)
+    assert slots_de_mascara(mascaras[0]) == [14, 15, 16, 17]
+    assert slots_de_mascara(0) == []
+
+
+def test_mascaras_de_usa_columnas_compactas_o_texto():
+    assert mascaras_de({"Horario": "LU 7-8"}) == (0b11 << 14, 0, 0, 0, 0, 0)
+    fila = {"Horario": "no se usa", **{c: i for i, c in enumerate(["m_lu", "m_ma", "m_mi", "m_ju", "m_vi", "m_sa"])}}
+    assert mascaras_de(fila) == (0, 1, 2, 3, 4, 5)
+
+
+def test_bordes_no_chocan():
+    a, b = mascaras_de({"Horario": "LU 7-9"}), mascaras_de({"Horario": "LU 9-11"})
+    assert not chocan(a, b)
+    assert chocan(a, mascaras_de({"Horario": "LU 8:30-10"}))
+    assert not chocan(a, mascaras_de({"Horario": "MA 7-9"}))
+    assert union([a, b]) == mascaras_de({"Horario": "LU 7-11"})
+
+
+def test_detectar_conflictos_registros():
+    materias = [_materia("A", "LU 7-9 / MI 7-9"), _materia("B", "LU 8-10"), _materia("C", "MI 8:30-9:30")]
+    assert detectar_conflictos(materias) == [
+        Conflicto("A", "B", 0, (16, 17)),
+        Conflicto("A", "C", 2, (17,)),
+    ]
+    assert describir(Conflicto("A", "B", 1, (16, 17, 20))) == "A choca con B el Martes 08:00-09:00, 10:00-10:30"
+
+
+def test_detectar_conflictos_igual_que_comparar_intervalos():
+    materias = sinteticos.materias(40, seed=9)
+    esperado = set()
+    for i, b in enumerate(materias):
+        for a in materias[:i]:
+            for ba in interpretar_slots(a["Horario"]):
+                for bb in interpretar_slots(b["Horario"]):
+                    if ba.dia == bb.dia and ba.inicio < bb.fin and bb.inicio < ba.fin:
+                        esperado.add((a["id"], b["id"], ba.dia))
+    assert {(c.materia_a, c.materia_b, c.dia) for c in detectar_conflictos(materias)} == esperado
+
+
+def test_choques_con_horario_textos_categorias_y_compacta():
+    mi_horario = [_materia("A", "LU 7-9"), _materia("B", "MA 7-9")]
+    textos = ["LU 8-10", "MA 8-9", "MI 7-9", None, "LU 7-8 / MA 7-8"]
+    esperado = ["A", "B", "", "", "A"]
+    assert list(choques_con_horario(textos, mi_horario)) == esperado
+    assert list(choques_con_horario(pd.Series(textos, dtype="category"), mi_horario)) == esperado
+    assert list(choques_con_horario(textos, [])) == [""] * 5
+
+
+def test_matriz_de_tabla_compacta_igual_que_de_textos():
+    plana = pd.DataFrame(sinteticos.ofertas(20, 10, seed=4))
+    compacta = compactar(plana)
+    assert (matriz_mascaras(compacta) == matriz_mascaras(list(plana["Horario"]))).all()
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from bench import sinteticos
+from horarios import cache, catalogos, crawler
+from horarios.crawler import Consulta
+from horarios.sitio import armar_payload
+
+CATALOGO = {"TALLERES": {"MAX CETTO": 6}, "AREAS_OPTATIVAS": {}, "LIPS": {},
+            "PROFESORES": {"PÉREZ JUAN": "PEJ|PEREZ"}, "ASIGNATURAS": {"1555 - PROYECTO": 1555}}
+
+
+def _df(*filas):
+    return pd.DataFrame([dict(zip(crawler.CAMPOS, f)) for f in filas])
+
+
+FILA_A = ("1555", "PROYECTO", "0101", "PÉREZ", "LU 7-9", "MAX CETTO", "Matutino")
+FILA_B = ("1620", "TEORÍA", "0003", "GÓMEZ", "MA 9-11", "MAX CETTO", "Matutino")
+
+
+def test_normalizar_sin_repetidos_y_con_errores():
+    uno = Consulta("taller.php", {"tal": 6, "talsem": 1}, "ESTANDAR")
+    dos = Consulta("asignatura.php", {"asig": 1555}, "ASIGNATURA_CONTEXTO")
+    tres = Consulta("profe.php", {"idprof": "X"}, "PROFESOR")
+    snapshot = crawler.normalizar([(uno, _df(FILA_A, FILA_B), None),
+                                   (dos, _df(FILA_A).drop(columns="Turno"), None),
+                                   (tres, None, "timeout")], "20262")
+
+    # Sin Turno la fila es otra oferta (Turno vacío), no la misma
+    assert [tuple(o.values()) for o in snapshot["ofertas"]] == [FILA_A, FILA_B, FILA_A[:-1] + ("",)]
+    assert [c["filas"] for c in snapshot["consultas"]] == [[0, 1], [2]]
+    assert snapshot["consultas"][0]["clave"] == cache.clave_consulta(
+        "taller.php", armar_payload(uno.payload, "20262"), "ESTANDAR")
+    assert [(e["endpoint"], e["error"]) for e in snapshot["errores"]] == [("profe.php", "timeout")]
+
+
+def test_normalizar_repite_indices_de_filas_compartidas():
+    uno = Consulta("taller.php", {"tal": 6, "talsem": 1}, "ESTANDAR")
+    dos = Consulta("taller.php", {"tal": 6, "talsem": 0}, "ESTANDAR")
+    snapshot = crawler.normalizar([(uno, _df(FILA_A), None), (dos, _df(FILA_B, FILA_A), None)], "20262")
+    assert len(snapshot["ofertas"]) == 2
+    assert [c["filas"] for c in snapshot["consultas"]] == [[0], [1, 0]]
+
+
+def test_rastrear_ciclo_pide_las_asignaturas_vistas(monkeypatch):
+    pedidas = []
+
+    def descargar(endpoint, payload, ciclo):
+        pedidas.append((endpoint, payload.get("asig")))
+        if endpoint == "asignatura.php":
+            return sinteticos.pagina_taller(3, seed=payload["asig"], clave=payload["asig"])
+        if endpoint == "profe.php":
+            raise ConnectionError("sin respuesta")
+        return sinteticos.pagina_taller(20, seed=len(pedidas))
+
+    monkeypatch.setattr(catalogos, "catalogos", lambda: CATALOGO)
+    monkeypatch.setattr(crawler, "descargar_html", descargar)
+    snapshot, resultados = crawler.rastrear_ciclo("20262", por_segundo=0)
+
+    base = crawler.consultas_base(CATALOGO)
+    fase1 = resultados[:len(base) + 1]
+    assert [c for c, _, _ in fase1] == base + crawler.consultas_profesores(["PEJ|PEREZ"])
+    vistas = {int(c) for _, df, e in fase1 if e is None for c in df["Clave"]}
+    esperadas = vistas | {1555} | set(crawler.CATALOGOS["ASIGNATURAS_COMUNES"].values())
+    assert sorted(a for e, a in pedidas if e == "asignatura.php") == sorted(esperadas)
+    assert [e["endpoint"] for e in snapshot["errores"]] == ["profe.php"]
+    assert len(snapshot["consultas"]) == len(resultados) - 1
@@ -0,0 +1,67 @@
+import base64
+
+import pytest
+
+from horarios import enlace
+from horarios.enlace import EnlaceDeOtroCiclo, EnlaceInvalido, codificar, codificar_grupos, decodificar
+
+
+GRUPOS = [("1555", "0203"), ("0042", "0001"), ("1731", "A1"), ("9999", "GRUPO ÚNICO"), ("12", "")]
+
+
+def _alterar(codigo, posicion):
+    datos = bytearray(base64.urlsafe_b64decode(codigo + "=" * (-len(codigo) % 4)))
+    datos[posicion] ^= 0x01
+    return base64.urlsafe_b64encode(bytes(datos)).rstrip(b"=").decode("ascii")
+
+
+def test_ida_y_vuelta():
+    codigo = codificar_grupos("20262", GRUPOS)
+    assert decodificar(codigo) == ("20262", GRUPOS)
+    assert set(codigo) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decodificar(codificar_grupos("20262", [])) == ("20262", [])
+
+
+def test_ocho_materias_caben_en_pocos_caracteres():
+    horario = [{"Clave": str(1100 + i), "Grupo": f"{i:04d}"} for i in range(8)]
+    codigo = codificar(horario, "20262")
+    assert len(codigo) < 60
+    assert decodificar(codigo)[1] == [(m["Clave"], m["Grupo"]) for m in horario]
+
+
+def test_materias_sin_clave_se_omiten():
+    assert decodificar(codificar([{"Grupo": "01"}, {"Clave": "1555", "Grupo": "02"}], "20262"))[1] == [("1555", "02")]
+
+
+@pytest.mark.parametrize("posicion", [1, 3, 8, -1])
+def test_crc_rechaza_cambios(posicion):
+    codigo = codificar_grupos("20262", GRUPOS)
+    with pytest.raises(EnlaceInvalido):
+        decodificar(_alterar(codigo, posicion))
+
+
+@pytest.mark.parametrize("codigo", ["", "basura", "A", "AAAAAAAAAA", "%%%", codificar_grupos("20262", GRUPOS)[:-6]])
+def test_codigos_invalidos(codigo):
+    with pytest.raises(EnlaceInvalido):
+        decodificar(codigo)
+
+
+@pytest.mark.parametrize("ciclo", ["../../tmp/x", "20262/../otro", "", "2026", "abcde", "202620"])
+def test_ciclo_que_no_es_un_ciclo(ciclo):
+    # Aunque el CRC sea correcto, el ciclo no puede ser una ruta ni otra cosa
+    with pytest.raises(EnlaceInvalido, match="ciclo"):
+        decodificar(codificar_grupos(ciclo, GRUPOS))
+
+
+def test_enlace_de_otro_ciclo():
+    with pytest.raises(EnlaceDeOtroCiclo) as error:
+        enlace.restaurar(codificar_grupos("20251", GRUPOS), ciclo_actual="20262")
+    assert error.value.ciclo == "20251"
+
+
+def test_restaurar_sin_datos_locales(tmp_path, monkeypatch):
+    from horarios import almacen
+
+    monkeypatch.setattr(almacen, "almacen_local", lambda ciclo: None)
+    materias, faltantes = enlace.restaurar(codificar_grupos("20262", [("9999", "0001")]), ciclo_actual="20262")
+    assert materias == [] and faltantes == [("9999", "0001")]
@@ -0,0 +1,133 @@
+import itertools
+
+import pytest
+
+from bench import sinteticos
+from horarios.generador import (
+    CRITERIOS, _puntaje, candidatos_por_clave, generar_horarios, mascara_semana, metricas,
+)
+from horarios.horario import interpretar_slots
+
+
+def _grupo(clave, grupo, horario, **extra):
+    return {"Clave": clave, "Grupo": grupo, "Horario": horario, "Profesor": "PROFE",
+            "Turno": "Matutino", "Agrupación": "TALLER MAX CETTO", **extra}
+
+
+def _mascara(grupo):
+    return mascara_semana(interpretar_slots(grupo["Horario"]))
+
+
+def test_soluciones_sin_choques_y_un_grupo_por_clave():
+    ofertas = [
+        _grupo("1", "01", "LU 7-9"), _grupo("1", "02", "MA 7-9"),
+        _grupo("2", "01", "LU 7-9"), _grupo("2", "02", "LU 9-11"),
+        _grupo("3", "01", "LU 8-10"), _grupo("3", "02", "MI 7-9"),
+    ]
+    resultado = generar_horarios(ofertas, ["1", "2", "3"], k=10)
+    assert resultado.completo and resultado.soluciones
+    for solucion in resultado.soluciones:
+        assert sorted(g["Clave"] for g in solucion.grupos) == ["1", "2", "3"]
+        ocupado = 0
+        for g in solucion.grupos:
+            assert not _mascara(g) & ocupado
+            ocupado |= _mascara(g)
+
+
+def test_igual_que_fuerza_bruta():
+    ofertas = sinteticos.ofertas(4, 6, seed=3)
+    claves = sorted({o["Clave"] for o in ofertas})
+    for criterio in ("huecos", "dias", "salida"):
+        esperado = []
+        por_clave = [[o for o in ofertas if o["Clave"] == c] for c in claves]
+        for combinacion in itertools.product(*por_clave):
+            mascaras = [_mascara(g) for g in combinacion]
+            ocupado = 0
+            for m in mascaras:
+                if m & ocupado:
+                    break
+                ocupado |= m
+            else:
+                esperado.append(_puntaje(ocupado, criterio))
+        resultado = generar_horarios(ofertas, claves, k=3, criterio=criterio, presupuesto_s=10)
+        assert resultado.completo
+        assert [s.puntaje for s in resultado.soluciones] == sorted(esperado)[:3]
+
+
+def _mejores_por_fuerza_bruta(ofertas, claves, criterio, k):
+    """Puntajes de las k mejores combinaciones, un horario distinto por clave."""
+    por_clave = [{_mascara(o) for o in ofertas if o["Clave"] == c} for c in claves]
+    puntajes = []
+    for combinacion in itertools.product(*por_clave):
+        ocupado = 0
+        for m in combinacion:
+            if m & ocupado:
+                break
+            ocupado |= m
+        else:
+            puntajes.append(_puntaje(ocupado, criterio))
+    return sorted(puntajes)[:k]
+
+
+def test_criterio_por_omision_termina_con_8_materias():
+    ofertas = sinteticos.ofertas(8, 4, seed=8)
+    claves = sorted({o["Clave"] for o in ofertas})
+    resultado = generar_horarios(ofertas, claves)
+    assert resultado.completo
+    assert [s.puntaje for s in resultado.soluciones] == _mejores_por_fuerza_bruta(ofertas, claves, "huecos", 5)
+
+
+def test_criterio_por_omision_termina_con_muchos_grupos():
+    # 30 grupos de 6 materias: sin cota para los huecos no terminaba ni en 20 s
+    ofertas = sinteticos.ofertas(6, 30, seed=6)
+    claves = sorted({o["Clave"] for o in ofertas})
+    resultado = generar_horarios(ofertas, claves)
+    assert resultado.completo
+    assert resultado.soluciones[0].puntaje == (0.0, 2, 18.0)
+
+
+@pytest.mark.parametrize("criterio", sorted(CRITERIOS))
+@pytest.mark.parametrize("seed", range(6))
+def test_poda_por_cota_no_pierde_soluciones(criterio, seed):
+    ofertas = sinteticos.ofertas(5 + seed % 3, 5, seed=seed)
+    claves = sorted({o["Clave"] for o in ofertas})
+    for k in (1, 4):
+        resultado = generar_horarios(ofertas, claves, k=k, criterio=criterio, presupuesto_s=10)
+        assert resultado.completo
+        assert [s.puntaje for s in resultado.soluciones] == _mejores_por_fuerza_bruta(ofertas, claves, criterio, k)
+
+
+def test_mismo_horario_se_lista_como_alternativa():
+    ofertas = [_grupo("1", "01", "LU 7-9"), _grupo("1", "02", "LU 7-9"), _grupo("2", "01", "MA 7-9")]
+    resultado = generar_horarios(ofertas, ["1", "2"], k=5)
+    assert len(resultado.soluciones) == 1
+    solucion = resultado.soluciones[0]
+    assert solucion.grupos[0]["Grupo"] == "01"
+    assert [g["Grupo"] for g in solucion.alternativas["1"]] == ["02"]
+
+
+def test_sin_opciones_y_restricciones():
+    ofertas = [_grupo("1", "01", "VI 7-9"), _grupo("2", "01", "LU 7-9")]
+    resultado = generar_horarios(ofertas, ["1", "2"], dias_libres=(4,))
+    assert resultado.sin_opciones == ["1"] and not resultado.soluciones
+    resultado = generar_horarios(ofertas, ["1", "2"], fijos=[{"Horario": "LU 8-10"}])
+    assert resultado.sin_opciones == ["2"]
+    resultado = generar_horarios(ofertas, ["1", "2"], hora_min=8)
+    assert sorted(resultado.sin_opciones) == ["1", "2"]
+
+
+def test_grupo_repetido_en_otro_contexto_no_se_pierde():
+    # Misma (Clave, Grupo) listada bajo dos agrupaciones; solo la segunda pasa el filtro
+    ofertas = [
+        _grupo("1", "01", "LU 7-9", **{"Agrupación": "LIP VIVIENDA", "Turno": "Vespertino"}),
+        _grupo("1", "01", "LU 7-9"),
+    ]
+    candidatos = candidatos_por_clave(ofertas, ["1"], taller="MAX CETTO", turno="Matutino")
+    assert [len(grupos) for _, grupos in candidatos["1"]] == [1]
+    assert generar_horarios(ofertas, ["1"], taller="MAX CETTO").soluciones
+
+
+def test_metricas():
+    ocupado = mascara_semana(interpretar_slots("LU 7-9 / LU 11-13 / MI 15-16"))
+    assert metricas(ocupado) == {"horas_muertas": 2.0, "dias_con_clase": 2,
+                                 "salida_max": 16.0, "salida_promedio": 14.5}
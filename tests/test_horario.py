@@ -0,0 +1,43 @@
+import pytest
+
+from horarios.horario import Bloque, interpretar_horario, interpretar_slots
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("LU 9:00-11:00 / MI 7-12", [(0, 18, 22), (2, 14, 24)]),
+    ("LU,MI 7-9", [(0, 14, 18), (2, 14, 18)]),
+    ("LUNES Y MIÉRCOLES 7-9", [(0, 14, 18), (2, 14, 18)]),
+    ("MARTES 13:00-15:00", [(1, 26, 30)]),
+    ("Sábado 8-10", [(5, 16, 20)]),
+    ("SABADO 0800-1000", [(5, 16, 20)]),
+    ("Lun. Mié. 7-9", [(0, 14, 18), (2, 14, 18)]),
+    ("LU7-9", [(0, 14, 18)]),
+    ("MI 7-12 y 13-15", [(2, 14, 24), (2, 26, 30)]),
+    ("JU 7:00-8:30", [(3, 14, 17)]),
+    ("VI 7:15-8:10", [(4, 14, 17)]),
+])
+def test_interpretar(texto, esperado):
+    assert interpretar_slots(texto) == tuple(Bloque(*b) for b in esperado)
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    # Palabras que empiezan como un día no son días
+    ("SALÓN 5 MA 7-9", [(1, 14, 18)]),
+    ("MAESTRÍA: visita de obra 10-12", []),
+    ("Misma aula que el semestre pasado 8-10", []),
+    ("Sesión por la mañana 8-10", []),
+    ("VIERNES 16-18 (sala de juntas, julio)", [(4, 32, 36)]),
+    ("JU 7-9 LUGAR: MAQUETAS", [(3, 14, 18)]),
+])
+def test_dias_solo_como_palabra_completa(texto, esperado):
+    assert interpretar_slots(texto) == tuple(Bloque(*b) for b in esperado)
+
+
+def test_vacio_y_rangos_invertidos():
+    assert interpretar_slots("") == ()
+    assert interpretar_slots(None) == ()
+    assert interpretar_slots("LU 11-9") == ()
+
+
+def test_interpretar_horario_en_horas():
+    assert interpretar_horario("MA 9:30-11") == [{"dia": "Martes", "inicio": 9.5, "fin": 11.0}]
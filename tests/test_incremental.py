@@ -0,0 +1,187 @@
+import time
+
+import pandas as pd
+import pytest
+
+from horarios import almacen, cache, crawler, incremental, sesion
+from horarios.cache import CacheRespuestas
+from horarios.crawler import Consulta
+
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    """Feed en tmp_path/snap y caché con nivel en disco en tmp_path/cache."""
+    snap, disco = tmp_path / "snap", tmp_path / "cache"
+    monkeypatch.setattr(incremental, "_aplicada", {})
+    monkeypatch.setattr(incremental, "_leidos", {})
+
+    def reiniciar(con_disco=True):
+        """Como un proceso nuevo: memoria vacía, mismo disco."""
+        incremental._aplicada.clear()
+        nueva = CacheRespuestas(directorio=str(disco) if con_disco else None)
+        monkeypatch.setattr(cache, "_cache_compartida", nueva)
+        return nueva
+
+    def publicar(version, consultas):
+        incremental._publicar({"version": version, "fecha": "", "consultas": consultas, "eventos": []},
+                              incremental.ruta_cambios("20262", str(snap)))
+
+    def sincronizar():
+        return incremental.sincronizar("20262", str(snap))
+
+    return reiniciar, publicar, sincronizar
+
+
+def test_disco_viejo_se_invalida_al_arrancar(entorno):
+    reiniciar, publicar, sincronizar = entorno
+    compartida = reiniciar()
+    for clave in ("k1", "k2", "union:abc"):
+        compartida.guardar(clave, clave)
+    publicar(1, ["k1"])
+
+    compartida = reiniciar()
+    assert sincronizar() == 1
+    assert compartida.valor("k1") is None
+    assert compartida.valor("union:abc") is None
+    assert compartida.valor("k2") == "k2"
+
+    # Otro reinicio: la versión 1 ya se aplicó a ese disco
+    compartida = reiniciar()
+    compartida.guardar("k1", "nuevo")
+    compartida.guardar("union:def", "nueva")
+    assert sincronizar() == 1
+    assert compartida.valor("k1") == "nuevo"
+    assert compartida.valor("union:def") == "nueva"
+
+
+def test_versiones_nuevas_en_el_mismo_proceso(entorno):
+    reiniciar, publicar, sincronizar = entorno
+    compartida = reiniciar()
+    publicar(1, ["k1"])
+    sincronizar()
+    for clave in ("k1", "k2", "union:abc"):
+        compartida.guardar(clave, clave)
+    publicar(2, ["k2"])
+    assert sincronizar() == 2
+    assert compartida.valor("k2") is None
+    assert compartida.valor("k1") == "k1"
+    # La unión no incluye k2 (no está en el registro): se queda
+    assert compartida.valor("union:abc") == "union:abc"
+
+
+def test_sin_disco_el_arranque_no_invalida(entorno):
+    reiniciar, publicar, sincronizar = entorno
+    publicar(1, ["k1"])
+    compartida = reiniciar(con_disco=False)
+    compartida.guardar("k1", "k1")
+    assert sincronizar() == 1
+    assert compartida.valor("k1") == "k1"
+
+
+def test_diferencias_por_grupo():
+    fila = ("1555", "PROYECTO", "0101", "PÉREZ", "LU 7-9", "TALLER", "Matutino")
+    cambiada = fila[:4] + ("MA 7-9",) + fila[5:]
+    otra = ("1620",) + fila[1:]
+    eventos = incremental.diferencias([fila, otra], [cambiada])
+    assert sorted((e["tipo"], e["clave"]) for e in eventos) == [("baja", "1620"), ("cambio", "1555")]
+    cambio = next(e for e in eventos if e["tipo"] == "cambio")
+    assert list(cambio["campos"]) == [incremental.CAMPOS[4]]
+
+
+
+def test_vigilar_sincroniza_en_un_hilo(entorno, tmp_path, monkeypatch):
+    reiniciar, publicar, _ = entorno
+    monkeypatch.setattr(incremental, "_vigilados", {})
+    compartida = reiniciar(con_disco=False)
+    publicar(1, ["k1"])
+    snap = str(tmp_path / "snap")
+    assert incremental.vigilar("20262", snap, intervalo=0.05) == 1
+    compartida.guardar("k1", "k1")
+    publicar(2, ["k1"])
+    # El rerun no toca el feed: la versión llega con el hilo
+    for _ in range(100):
+        if incremental.vigilar("20262", snap) == 2:
+            break
+        time.sleep(0.02)
+    assert incremental.vigilar("20262", snap) == 2
+    assert compartida.valor("k1") is None
+
+
+# ==========================================
+# REFRESCO CONTRA RECONSTRUCCIÓN COMPLETA
+# ==========================================
+
+A = ("1555", "PROYECTO", "0101", "PÉREZ JUAN", "LU,MI 7:00-9:00", "MAX CETTO", "Matutino")
+B = ("1555", "PROYECTO", "0102", "GÓMEZ ANA", "MA 14:00-16:00", "MAX CETTO", "Vespertino")
+B2 = B[:4] + ("JU 14:00-16:00",) + B[5:]
+C = ("1620", "TEORÍA", "0003", "NÚÑEZ PEPE", "VI 16:00-18:00", "MAX CETTO", "Vespertino")
+D = ("1731", "TALLER", "0201", "RUIZ LUIS", "SA 9:00-13:00", "MAX CETTO", "Matutino")
+E = ("2101", "OPTATIVA", "0001", "LÓPEZ", "MI 16:00-18:00", "", "Vespertino")
+
+CONSULTAS = [
+    Consulta("taller.php", {"tal": 6, "talsem": 1}, "ESTANDAR"),
+    Consulta("asignatura.php", {"asig": 1555}, "ASIGNATURA_CONTEXTO"),
+    Consulta("area.php", {"area": 3}, "ESTANDAR"),
+]
+ANTES = [[A, B, C], [A, B], [E]]
+DESPUES = [[A, B2, D], [B2, A], [E]]
+
+
+def _df(filas):
+    return pd.DataFrame([dict(zip(crawler.CAMPOS, f)) for f in filas])
+
+
+def _rastreo(paginas):
+    return [(c, _df(filas), None) for c, filas in zip(CONSULTAS, paginas)]
+
+
+def test_refrescar_igual_que_rastrear_de_nuevo(tmp_path, monkeypatch):
+    directorio = str(tmp_path / "snap")
+    ruta = crawler.ruta_snapshot(directorio, "20262")
+    inicial = crawler.normalizar(_rastreo(ANTES), "20262")
+    crawler.guardar_snapshot(inicial, ruta)
+    almacen.construir(inicial, almacen.ruta_almacen("20262", directorio))
+
+    # El "HTML" es el índice de la página; el parser lo convierte en sus filas
+    paginas = {(c.endpoint, str(c.payload)): n for n, c in enumerate(CONSULTAS)}
+    parseadas = []
+    monkeypatch.setattr(incremental, "descargar_html",
+                        lambda endpoint, payload, ciclo: str(paginas[(endpoint, str(payload))]))
+
+    def parsear(html, tipo):
+        parseadas.append(html)
+        return _df(DESPUES[int(html)])
+
+    monkeypatch.setattr(incremental, "parsear_html_generico", parsear)
+    registro = incremental.refrescar("20262", directorio, concurrencia=2, por_segundo=0)
+
+    # Mismo resultado que un rastreo completo con las páginas nuevas
+    completo = str(tmp_path / "completo.sqlite")
+    almacen.construir(crawler.normalizar(_rastreo(DESPUES), "20262"), completo)
+    en_sitio, nuevo = almacen.AlmacenOfertas(almacen.ruta_almacen("20262", directorio)), almacen.AlmacenOfertas(completo)
+    for c in CONSULTAS:
+        pd.testing.assert_frame_equal(en_sitio.buscar(c.endpoint, c.payload, c.tipo_parseo, "20262"),
+                                      nuevo.buscar(c.endpoint, c.payload, c.tipo_parseo, "20262"))
+    sin_id = [o.drop(columns="id").sort_values(["Clave", "Grupo"]).reset_index(drop=True)
+              for o in (en_sitio.ofertas(), nuevo.ofertas())]
+    pd.testing.assert_frame_equal(*sin_id)
+    assert en_sitio.asignaturas() == nuevo.asignaturas()
+    # El snapshot en disco también responde igual
+    releido = crawler.leer_snapshot(ruta)
+    assert [[tuple(releido["ofertas"][i].values()) for i in c["filas"]] for c in releido["consultas"]] == DESPUES
+
+    # Un evento por grupo aunque venga en dos páginas; area.php no cambió de filas
+    eventos = sorted((e["tipo"], e["clave"], e["grupo"], len(e["consultas"])) for e in registro["eventos"])
+    assert eventos == [("alta", "1731", "0201", 1), ("baja", "1620", "0003", 1), ("cambio", "1555", "0102", 2)]
+    assert sorted(registro["consultas"]) == sorted(c["clave"] for c in releido["consultas"][:2])
+    assert registro["version"] == incremental.ultima_version("20262", directorio) == 1
+
+    # La sesión con 0102 en su horario lo ve moverse al jueves
+    mi_horario = [sesion.materia_para_horario(dict(zip(crawler.CAMPOS, B)))]
+    sesion.aplicar_cambios(mi_horario, incremental.cambios_desde(0, "20262", directorio))
+    assert mi_horario[0]["Horario"] == "JU 14:00-16:00"
+
+    # Segundo refresco sin cambios: no se parsea nada ni se publica versión
+    parseadas.clear()
+    assert incremental.refrescar("20262", directorio, concurrencia=2, por_segundo=0) is None
+    assert parseadas == []
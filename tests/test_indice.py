@@ -0,0 +1,63 @@
+from bench import sinteticos
+from horarios.indice import IndiceBusqueda, huella, indice_del_ciclo, normalizar
+
+CATALOGO = {
+    "GARCÍA LÓPEZ JUAN": "RFC1|GARCÍA LÓPEZ JUAN",
+    "GONZÁLEZ PÉREZ MARÍA": "RFC2|GONZÁLEZ PÉREZ MARÍA",
+    "NÚÑEZ ÁLVAREZ INÉS": "RFC3|NÚÑEZ ÁLVAREZ INÉS",
+    "HERNÁNDEZ MUÑOZ ANA": "RFC4|HERNÁNDEZ MUÑOZ ANA",
+    "GARCÍA RAMÍREZ SOFÍA": "RFC5|GARCÍA RAMÍREZ SOFÍA",
+}
+
+
+def _etiquetas(indice, consulta, limite=10):
+    return [e for e, _ in indice.buscar(consulta, limite)]
+
+
+def test_normalizar():
+    assert normalizar("Pérez-López, ARQ.") == "perez lopez arq"
+    assert normalizar("  NÚÑEZ  ") == "nunez"
+
+
+def test_sin_acentos_ni_mayusculas():
+    indice = IndiceBusqueda(CATALOGO.items())
+    assert _etiquetas(indice, "nunez") == ["NÚÑEZ ÁLVAREZ INÉS"]
+    assert _etiquetas(indice, "NÚÑEZ") == ["NÚÑEZ ÁLVAREZ INÉS"]
+    assert indice.buscar("munoz", 1) == [("HERNÁNDEZ MUÑOZ ANA", "RFC4|HERNÁNDEZ MUÑOZ ANA")]
+
+
+def test_prefijos_de_palabra_en_cualquier_orden():
+    indice = IndiceBusqueda(CATALOGO.items())
+    assert _etiquetas(indice, "sof gar") == ["GARCÍA RAMÍREZ SOFÍA"]
+    # Primero las que empiezan como la consulta
+    assert _etiquetas(indice, "garcia")[:2] == ["GARCÍA LÓPEZ JUAN", "GARCÍA RAMÍREZ SOFÍA"]
+
+
+def test_errores_de_dedo():
+    indice = IndiceBusqueda(CATALOGO.items())
+    assert _etiquetas(indice, "gonzales maria", 1) == ["GONZÁLEZ PÉREZ MARÍA"]
+    assert _etiquetas(indice, "hernadez munoz", 1) == ["HERNÁNDEZ MUÑOZ ANA"]
+    assert _etiquetas(indice, "zzzz") == []
+    assert _etiquetas(indice, "   ") == []
+
+
+def test_catalogo_grande():
+    catalogo = sinteticos.profesores(2_000, seed=1)
+    indice = IndiceBusqueda(catalogo.items())
+    etiqueta = next(iter(catalogo))
+    palabras = normalizar(etiqueta).split()
+    assert etiqueta in _etiquetas(indice, " ".join(p[:3] for p in palabras), 25)
+    assert len(indice.buscar("garcia", 25)) == 25
+
+
+def test_se_reconstruye_si_cambia_el_contenido():
+    catalogo = dict(CATALOGO)
+    indice = indice_del_ciclo("prueba", "00000", catalogo.items, version=huella(catalogo))
+    assert indice_del_ciclo("prueba", "00000", catalogo.items, version=huella(catalogo)) is indice
+    # Mismo tamaño, otro contenido
+    del catalogo["NÚÑEZ ÁLVAREZ INÉS"]
+    catalogo["NUEVO NOMBRE"] = "RFC9|NUEVO NOMBRE"
+    nuevo = indice_del_ciclo("prueba", "00000", catalogo.items, version=huella(catalogo))
+    assert nuevo is not indice
+    assert _etiquetas(nuevo, "nuevo") == ["NUEVO NOMBRE"]
+    assert huella({"A": 1}) != huella({"A": 2})
@@ -0,0 +1,37 @@
+import os
+
+from bench import sinteticos
+from horarios.ingesta import lote_a_df, parsear_en_paralelo
+from horarios.parser import parsear_html_generico
+
+
+class _PaginaQueMata(str):
+    """Al deserializarse en el proceso del pool lo termina de golpe."""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def _paginas(n):
+    return [(sinteticos.pagina_taller(40, seed=s), "ESTANDAR") for s in range(n)]
+
+
+def test_mismo_resultado_que_en_serie():
+    paginas = _paginas(9)
+    lotes = parsear_en_paralelo(paginas, procesos=3, por_envio=2)
+    assert [l.indice for l in lotes] == list(range(9))
+    for (html, tipo), lote in zip(paginas, lotes):
+        assert lote.error is None
+        assert lote_a_df(lote).equals(parsear_html_generico(html, tipo))
+
+
+def test_proceso_que_muere_solo_pierde_su_envio():
+    paginas = _paginas(10)
+    paginas[5] = (_PaginaQueMata("<html></html>"), "ESTANDAR")
+    lotes = parsear_en_paralelo(paginas, procesos=2, por_envio=2)
+    assert [l.indice for l in lotes] == list(range(10))
+    perdidas = [l.indice for l in lotes if l.error]
+    # Solo el envío de la página 5 (páginas 4 y 5)
+    assert perdidas == [4, 5]
+    assert all("BrokenProcessPool" in l.error for l in lotes if l.error)
+    assert all(len(l.filas) == 40 for l in lotes if not l.error)
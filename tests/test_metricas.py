@@ -0,0 +1,113 @@
+import pytest
+
+from horarios import metricas
+from horarios.metricas import CUBETAS
+
+
+@pytest.fixture(autouse=True)
+def limpias(monkeypatch):
+    monkeypatch.setattr(metricas, "_activas", True)
+    monkeypatch.setattr(metricas, "_histogramas", {})
+    monkeypatch.setattr(metricas, "_contadores", {})
+    monkeypatch.setattr(metricas, "_colectores", {})
+
+
+def _cuentas(nombre, **etiquetas):
+    return metricas._histogramas[(nombre, metricas._etiquetas(etiquetas))][0]
+
+
+@pytest.mark.parametrize("segundos,cubeta", [
+    (0.0, 0),
+    (0.001, 0),               # el límite cae en su cubeta (le = "menor o igual")
+    (0.0010001, 1),
+    (0.1, CUBETAS.index(0.1)),
+    (0.10001, CUBETAS.index(0.25)),
+    (10.0, len(CUBETAS) - 1),
+    (10.5, len(CUBETAS)),     # +Inf
+])
+def test_cubeta_de_cada_medicion(segundos, cubeta):
+    metricas.observar("descarga", segundos)
+    cuentas = _cuentas("descarga")
+    assert len(cuentas) == len(CUBETAS) + 1
+    assert cuentas[cubeta] == 1 and sum(cuentas) == 1
+
+
+def test_apagadas_no_registran(monkeypatch):
+    monkeypatch.setattr(metricas, "_activas", False)
+    metricas.observar("descarga", 0.2)
+    metricas.contar("filas", 5)
+    with metricas.fase("parseo"):
+        pass
+    assert not metricas._histogramas and not metricas._contadores
+
+
+def test_percentiles_son_el_limite_de_la_cubeta():
+    for s in [0.002] * 90 + [0.3] * 9 + [20.0]:
+        metricas.observar("parseo", s, tipo="ESTANDAR")
+    resumen = metricas.como_json()["histogramas"]["parseo{tipo=ESTANDAR}"]
+    assert resumen["n"] == 100
+    assert (resumen["p50_ms"], resumen["p95_ms"]) == (2.5, 500.0)
+    assert resumen["p99_ms"] == 500.0
+
+
+def test_formato_prometheus():
+    metricas.observar("descarga", 0.004, endpoint="taller.php")
+    metricas.observar("descarga", 0.3, endpoint="taller.php")
+    metricas.observar("descarga", 30.0, endpoint="taller.php")
+    metricas.contar("filas", 7, tipo='con "comillas"')
+    metricas.registrar_colector("cache", lambda: {"aciertos": 3, "nombre": "no numérico"})
+    lineas = metricas.como_prometheus().splitlines()
+
+    assert lineas[0] == "# TYPE horarios_descarga histogram"
+    cubetas = [l for l in lineas if l.startswith("horarios_descarga_bucket")]
+    assert len(cubetas) == len(CUBETAS) + 1
+    assert cubetas[0] == 'horarios_descarga_bucket{endpoint="taller.php",le="0.001"} 0'
+    assert 'horarios_descarga_bucket{endpoint="taller.php",le="0.005"} 1' in cubetas
+    assert 'horarios_descarga_bucket{endpoint="taller.php",le="0.5"} 2' in cubetas
+    assert cubetas[-2] == 'horarios_descarga_bucket{endpoint="taller.php",le="10.0"} 2'
+    assert cubetas[-1] == 'horarios_descarga_bucket{endpoint="taller.php",le="+Inf"} 3'
+    # Acumuladas: nunca bajan
+    valores = [int(l.rsplit(" ", 1)[1]) for l in cubetas]
+    assert valores == sorted(valores)
+    assert 'horarios_descarga_sum{endpoint="taller.php"} 30.304000' in lineas
+    assert 'horarios_descarga_count{endpoint="taller.php"} 3' in lineas
+
+    assert "# TYPE horarios_filas_total counter" in lineas
+    assert 'horarios_filas_total{tipo="con \\"comillas\\""} 7' in lineas
+    assert "# TYPE horarios_cache gauge" in lineas
+    assert 'horarios_cache{dato="aciertos"} 3' in lineas
+    assert not any("no numérico" in l for l in lineas)
+
+
+def test_un_solo_type_por_metrica():
+    for endpoint in ("taller.php", "area.php"):
+        metricas.observar("descarga", 0.01, endpoint=endpoint)
+        metricas.contar("errores", endpoint=endpoint)
+    texto = metricas.como_prometheus()
+    assert texto.count("# TYPE horarios_descarga histogram") == 1
+    assert texto.count("# TYPE horarios_errores_total counter") == 1
+    assert texto.endswith("\n")
+
+
+def test_reiniciar_conserva_colectores():
+    metricas.observar("descarga", 0.01)
+    metricas.contar("filas")
+    metricas.registrar_colector("cache", lambda: {"aciertos": 1})
+    metricas.reiniciar()
+    datos = metricas.como_json()
+    assert not datos["histogramas"] and not datos["contadores"]
+    assert datos["colectores"] == {"cache": {"aciertos": 1}}
+
+
+@pytest.mark.parametrize("por_entorno,token,dado,permitido", [
+    (True, None, None, True),
+    (False, None, None, False),
+    (False, None, "", False),
+    (False, "s3creto", None, False),
+    (False, "s3creto", "otro", False),
+    (False, "s3creto", "s3creto", True),
+])
+def test_puede_controlar(monkeypatch, por_entorno, token, dado, permitido):
+    monkeypatch.setattr(metricas, "_por_entorno", por_entorno)
+    monkeypatch.setattr(metricas, "_token", token)
+    assert metricas.puede_controlar(dado) is permitido
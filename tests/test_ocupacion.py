@@ -0,0 +1,125 @@
+import random
+
+import pandas as pd
+import pytest
+
+from bench import sinteticos
+from horarios.horario import SLOT_FIN_GRID, SLOT_INICIO_GRID, SLOTS_POR_HORA, Bloque, interpretar_slots
+from horarios.ocupacion import Ocupacion, SIN_PROFESOR
+
+
+def _tabla(*filas):
+    return pd.DataFrame([dict(zip(["Clave", "Grupo", "Materia", "Profesor", "Horario", "Agrupación", "Turno"], f))
+                         for f in filas])
+
+
+def _ocupados(horarios):
+    """{(dia, slot)} con clase según los textos de horario (referencia sin NumPy)."""
+    return {(b.dia, s) for h in horarios for b in interpretar_slots(h) for s in range(b.inicio, b.fin)}
+
+
+def _ventanas_a_mano(horarios, minimo, desde=SLOT_INICIO_GRID, hasta=SLOT_FIN_GRID):
+    ocupados = _ocupados(horarios)
+    ventanas = []
+    for dia in range(6):
+        inicio = None
+        for slot in range(desde, hasta + 1):
+            libre = slot < hasta and (dia, slot) not in ocupados
+            if libre and inicio is None:
+                inicio = slot
+            elif not libre and inicio is not None:
+                if slot - inicio >= minimo:
+                    ventanas.append(Bloque(dia, inicio, slot))
+                inicio = None
+    return ventanas
+
+
+def test_ventanas_en_los_bordes_y_por_dia():
+    oc = Ocupacion(_tabla(
+        ("1", "1", "A", "X", "LU 7:00-9:00 / LU 10:00-21:30", "", ""),
+        ("2", "1", "B", "Y", "MA 8:00-9:00 / MA 12:00-13:00 / MA 20:00-22:00", "", ""),
+        ("3", "1", "C", "Z", "MI 7:00-22:00", "", ""),
+    ))
+    ventanas = oc.ventanas_libres(minimo_slots=1)
+    h = SLOTS_POR_HORA
+    # Cada inicio con el final de su mismo hueco, aunque otro día tenga más huecos
+    assert [v for v in ventanas if v.dia == 0] == [Bloque(0, 9 * h, 10 * h), Bloque(0, 21 * h + 1, 22 * h)]
+    assert [v for v in ventanas if v.dia == 1] == [Bloque(1, 7 * h, 8 * h), Bloque(1, 9 * h, 12 * h),
+                                                   Bloque(1, 13 * h, 20 * h)]
+    assert not [v for v in ventanas if v.dia == 2]
+    # Jueves a sábado: libres de punta a punta
+    assert [v for v in ventanas if v.dia >= 3] == [Bloque(d, SLOT_INICIO_GRID, SLOT_FIN_GRID) for d in (3, 4, 5)]
+    # La media hora libre del lunes en la noche ya no cuenta con mínimo de 2
+    assert Bloque(0, 21 * h + 1, 22 * h) not in oc.ventanas_libres(minimo_slots=2)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_ventanas_igual_que_a_mano(seed):
+    tabla = pd.DataFrame(sinteticos.ofertas(4, 3, seed=seed))
+    oc = Ocupacion(tabla)
+    r = random.Random(seed)
+    elegidas = [r.random() < 0.4 for _ in range(len(tabla))]
+    minimo = r.choice([1, 2, 4])
+    horarios = tabla["Horario"][elegidas]
+    assert oc.ventanas_libres(pd.Series(elegidas).to_numpy(), minimo) == _ventanas_a_mano(horarios, minimo)
+    desde, hasta = 9 * SLOTS_POR_HORA, 15 * SLOTS_POR_HORA
+    assert (oc.ventanas_libres(pd.Series(elegidas).to_numpy(), minimo, desde, hasta)
+            == _ventanas_a_mano(horarios, minimo, desde, hasta))
+
+
+def _carga_a_mano(tabla):
+    """Una fila por (Clave, Grupo), prefiriendo la que trae profesor; luego por profesor."""
+    grupos = {}
+    for fila in tabla.itertuples(index=False):
+        llave = (str(fila.Clave), str(fila.Grupo))
+        if llave not in grupos or (grupos[llave].Profesor in SIN_PROFESOR and fila.Profesor not in SIN_PROFESOR):
+            grupos[llave] = fila
+    por_profesor = {}
+    for fila in grupos.values():
+        if fila.Profesor not in SIN_PROFESOR:
+            por_profesor.setdefault(fila.Profesor, []).append(fila.Horario)
+    resultado = {}
+    for profesor, horarios in por_profesor.items():
+        conteo = {}
+        for h in horarios:
+            for celda in _ocupados([h]):
+                conteo[celda] = conteo.get(celda, 0) + 1
+        resultado[profesor] = (len(horarios), sum(conteo.values()) / SLOTS_POR_HORA, len({d for d, _ in conteo}),
+                               sum(1 for n in conteo.values() if n > 1) / SLOTS_POR_HORA)
+    return resultado
+
+
+def test_carga_profesores_agrupa_cada_profesor():
+    tabla = _tabla(
+        ("1555", "0101", "PROYECTO", "PÉREZ", "LU 7-9", "MAX CETTO", "Matutino"),
+        ("1620", "0003", "TEORÍA", "GÓMEZ", "LU 8-10", "MAX CETTO", "Matutino"),
+        ("1555", "0102", "PROYECTO", "PÉREZ", "LU 8-10 / MA 7-8", "MAX CETTO", "Matutino"),
+        # El mismo grupo desde profe.php (sin profesor) no cuenta dos veces
+        ("1555", "0101", "PROYECTO", "BUSQUEDA PROFESOR", "LU 7-9", "", ""),
+        ("1731", "0201", "TALLER", "", "SA 9-13", "", ""),
+        ("1999", "0001", "SEMINARIO", "GÓMEZ", "MI 16-18", "", ""),
+    )
+    carga = Ocupacion(tabla).carga_profesores()
+    assert list(carga["Profesor"]) == ["PÉREZ", "GÓMEZ"]
+    assert carga.set_index("Profesor").loc["PÉREZ"].tolist() == [2, 5.0, 2, 1.0]
+    assert carga.set_index("Profesor").loc["GÓMEZ"].tolist() == [2, 4.0, 2, 0.0]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_carga_profesores_igual_que_a_mano(seed):
+    tabla = pd.DataFrame(sinteticos.ofertas(30, 6, seed=seed))
+    # Pocos profesores para que cada uno tenga varios grupos (y choques)
+    tabla["Profesor"] = [f"PROFESOR {i % 7}" for i in range(len(tabla))]
+    tabla.loc[::11, "Profesor"] = ""
+    carga = Ocupacion(tabla).carga_profesores()
+    esperado = _carga_a_mano(tabla)
+    assert set(carga["Profesor"]) == set(esperado)
+    for fila in carga.itertuples(index=False):
+        assert (fila.grupos, fila.horas, fila.dias, fila.horas_en_choque) == esperado[fila.Profesor]
+    assert list(carga["horas"]) == sorted(carga["horas"], reverse=True)
+
+
+def test_carga_profesores_sin_profesores():
+    carga = Ocupacion(_tabla(("1731", "0201", "TALLER", "", "SA 9-13", "", ""))).carga_profesores()
+    assert carga.empty
+    assert list(carga.columns) == ["Profesor", "grupos", "horas", "dias", "horas_en_choque"]
@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+from bench import sinteticos
+from horarios import enlace
+from horarios.conflictos import COLUMNAS_MASCARA, mascaras_de_bloques
+from horarios.horario import interpretar_slots
+from horarios.oferta import CATEGORICAS, compactar, es_compacta, unir
+
+
+def _plana(*filas):
+    return pd.DataFrame([dict(zip(["Clave", "Materia", "Grupo", "Profesor", "Horario", "Agrupación", "Turno"], f))
+                         for f in filas])
+
+
+FILAS = [
+    ("1555", "PROYECTO", "0101", "PÉREZ", "LU,MI 7:00-9:00", "MAX CETTO", "Matutino"),
+    ("1555", "PROYECTO", "0102", "GÓMEZ", "MA 14-16 / JU 14-16", "MAX CETTO", "Vespertino"),
+    ("1620", "TEORÍA", "3", "NÚÑEZ", "SA 9:00-13:00", "MAX CETTO", "Matutino"),
+]
+
+
+@pytest.mark.parametrize("valores,entero", [
+    (["1555", "1620", "3"], True),
+    (["1555", "0402"], False),        # el cero a la izquierda se perdería
+    (["1555", "0"], False),
+    (["1555", "1234567890"], False),  # no cabe en int32 sin riesgo
+    (["1555", "15a"], False),
+    (["1555", "+7"], False),
+])
+def test_enteros_solo_si_van_y_vienen_sin_cambio(valores, entero):
+    compacta = compactar(pd.DataFrame({"Clave": valores, "Grupo": valores, "Horario": [""] * len(valores)}))
+    for nombre in ("Clave", "Grupo"):
+        columna = compacta[nombre]
+        assert (columna.dtype == "int32") == entero
+        if not entero:
+            assert isinstance(columna.dtype, pd.CategoricalDtype)
+        assert [str(v) for v in columna] == valores
+
+
+def test_grupo_con_cero_se_queda_como_texto():
+    compacta = compactar(_plana(*FILAS))
+    assert compacta["Clave"].dtype == "int32"
+    assert isinstance(compacta["Grupo"].dtype, pd.CategoricalDtype)
+    assert [str(g) for g in compacta["Grupo"]] == ["0101", "0102", "3"]
+
+
+def test_grupo_compacto_ida_y_vuelta_por_el_enlace():
+    # enlace.py y el feed de cambios comparan str(Clave), str(Grupo)
+    compacta = compactar(_plana(*FILAS))
+    filas = compacta[["Clave", "Grupo"]].to_dict("records")
+    _, grupos = enlace.decodificar(enlace.codificar(filas, "20262"))
+    assert grupos == [(f[0], f[2]) for f in FILAS]
+
+
+def test_mascaras_por_dia_iguales_a_las_del_texto():
+    plana = pd.DataFrame(sinteticos.ofertas(20, 10, seed=4))
+    compacta = compactar(plana)
+    assert es_compacta(compacta) and not es_compacta(plana)
+    for nombre in CATEGORICAS:
+        if nombre in compacta.columns:
+            assert isinstance(compacta[nombre].dtype, pd.CategoricalDtype)
+    for dia, nombre in enumerate(COLUMNAS_MASCARA):
+        assert compacta[nombre].dtype == "int64"
+        esperado = [mascaras_de_bloques(interpretar_slots(h))[dia] for h in plana["Horario"]]
+        assert compacta[nombre].tolist() == esperado
+    # Mismo contenido que la tabla plana
+    pd.testing.assert_frame_equal(compacta[plana.columns].astype(str), plana.astype(str))
+
+
+def test_compactar_es_idempotente_y_respeta_vacias():
+    compacta = compactar(_plana(*FILAS))
+    assert compactar(compacta) is compacta
+    vacia = pd.DataFrame()
+    assert compactar(vacia) is vacia
+
+
+def test_unir_sin_repetidos_por_clave_y_grupo():
+    a = compactar(_plana(FILAS[0], FILAS[2]))
+    b = compactar(_plana(FILAS[1], ("1555", "PROYECTO", "0101", "OTRO", "VI 7-9", "LIP", "Matutino")))
+    unida = unir([a, b])
+    assert [(str(c), str(g)) for c, g in zip(unida["Clave"], unida["Grupo"])] == [
+        ("1555", "0101"), ("1620", "3"), ("1555", "0102")]
+    # Se queda la primera aparición
+    assert unida["Profesor"][0] == "PÉREZ"
+    assert es_compacta(unida)
+
+
+def test_unir_tablas_con_tipos_distintos_conserva_el_texto():
+    # Una tabla con Grupo entero y otra con Grupo de texto ("0101")
+    enteros = compactar(_plana(("1620", "TEORÍA", "3", "NÚÑEZ", "SA 9-13", "", "")))
+    texto = compactar(_plana(FILAS[0]))
+    assert enteros["Grupo"].dtype == "int32"
+    unida = unir([enteros, texto])
+    assert [str(g) for g in unida["Grupo"]] == ["3", "0101"]
+    assert unida["Clave"].dtype == "int32"
+    assert isinstance(unida["Materia"].dtype, pd.CategoricalDtype)
+
+
+def test_unir_una_o_ninguna():
+    a = compactar(_plana(FILAS[0]))
+    assert unir([a, pd.DataFrame()]) is a
+    assert unir([]).empty
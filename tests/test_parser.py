@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from bench import sinteticos
+from horarios.parser import parsear_html_bs4, parsear_html_generico
+
+TIPOS = ["ESTANDAR", "ASIGNATURA_CONTEXTO", "PROFESOR", "GENERO"]
+
+ENCABEZADO = ('<table><tr><th>Clave</th><th>Asignatura</th><th>Grupo</th>'
+              '<th>Cupo</th><th>Profesor</th><th>Horario</th></tr>')
+
+CASOS = {
+    "br_y_comentarios": ENCABEZADO + (
+        '<tr><td colspan="6" style="background-color:#64c2fd">Taller: <!-- oculto -->MAX CETTO</td></tr>'
+        '<tr class="sombreado"><td>1555</td><td>+ PROYECTO<br>ARQUITECTÓNICO <!-- x --> LIP: LÍNEA 2</td>'
+        '<td>0101</td><td>20</td><td>PÉREZ<br/>JUAN</td><td><b>LU 07:00-09:00</b><br><b>MI 07:00-09:00</b></td></tr>'
+        '</table>'),
+    "entidades": ENCABEZADO + (
+        '<tr><td colspan="6">Cursos Optativos Área Tecnolog&iacute;a</td></tr>'
+        '<tr class="sombreado"><td>1620</td><td>DISE&Ntilde;O &amp; CONSTRUCCI&Oacute;N&nbsp;</td>'
+        '<td>0003</td><td>15</td><td>N&Uacute;&Ntilde;EZ &quot;PEPE&quot;</td><td>JU&nbsp;15:00-17:00</td></tr>'
+        '</table>'),
+    "sombreado_con_otras_clases": ENCABEZADO + (
+        '<tr><td colspan="6" style="background-color:#FFA97C">LIP: VIVIENDA</td></tr>'
+        '<tr class="par sombreado destacado"><td>1731</td><td>TEORÍA</td><td>0201</td><td>30</td>'
+        '<td>GÓMEZ ANA</td><td><b>VI 16:00-18:00</b></td></tr>'
+        '<tr class="sombreadoX"><td>9</td><td>NO</td><td>0</td><td>0</td><td>NO</td><td>NO</td></tr>'
+        '<tr class="sombreado"><td>1</td><td>CORTA</td><td>2</td></tr>'
+        '</table>'),
+    "pagina_vacia": "",
+    "sin_tabla": "<html><body><p>No hay grupos para esta búsqueda.</p></body></html>",
+    "tabla_sin_grupos": ENCABEZADO + "</table>",
+}
+
+
+def _iguales(html, tipo):
+    rapido = parsear_html_generico(html, tipo)
+    referencia = parsear_html_bs4(html, tipo)
+    if referencia.empty:
+        assert rapido.empty
+    else:
+        pd.testing.assert_frame_equal(rapido, referencia)
+    return rapido
+
+
+@pytest.mark.parametrize("tipo", TIPOS)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_paginas_sinteticas(tipo, seed):
+    modo = "PROFESOR" if tipo == "PROFESOR" else "ESTANDAR"
+    df = _iguales(sinteticos.pagina_taller(300, seed=seed, modo=modo), tipo)
+    assert len(df) == 300
+
+
+@pytest.mark.parametrize("tipo", TIPOS)
+@pytest.mark.parametrize("caso", sorted(CASOS))
+def test_casos_limite(caso, tipo):
+    _iguales(CASOS[caso], tipo)
+
+
+def test_casos_limite_tienen_datos():
+    df = parsear_html_generico(CASOS["br_y_comentarios"])
+    assert df.loc[0, "Agrupación"] == "MAX CETTO"
+    assert df.loc[0, "Turno"] == "Matutino"
+    assert df.loc[0, "Horario"] == "LU 07:00-09:00 / MI 07:00-09:00"
+    assert len(parsear_html_generico(CASOS["sombreado_con_otras_clases"])) == 1
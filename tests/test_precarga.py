@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from horarios import busqueda, conexion, precarga
+from horarios.precarga import Precargador, siguientes
+
+
+def _taller(tal, talsem, endpoint="taller.php"):
+    return {"endpoint": endpoint, "payload_extra": {"tal": tal, "talsem": talsem}, "tipo_parseo": "ESTANDAR"}
+
+
+def _pares(consultas):
+    return [(c["endpoint"], c["payload_extra"]["tal"], c["payload_extra"]["talsem"]) for c in consultas]
+
+
+def test_siguientes_de_un_taller():
+    assert _pares(siguientes([_taller(6, 3)])) == [
+        ("taller.php", 6, 4), ("taller.php", 6, 2), ("taller.php", 18, 3), ("taller.php", 19, 0)]
+    # Primer y último semestre: solo el vecino que existe
+    assert _pares(siguientes([_taller(6, 1)], limite=10))[:2] == [("taller.php", 6, 2), ("taller.php", 18, 1)]
+    assert ("taller.php", 6, 11) not in _pares(siguientes([_taller(6, 10)], limite=10))
+
+
+def test_siguientes_intercala_sin_repetir_ni_incluir_las_actuales():
+    actuales = [_taller(6, 3), _taller(6, 4)]
+    # Ronda por ronda: primero la más probable de cada una; el 4 y el 3 ya se están viendo
+    assert _pares(siguientes(actuales, limite=10)) == [
+        ("taller.php", 6, 5), ("taller.php", 6, 2), ("taller.php", 18, 3), ("taller.php", 18, 4), ("taller.php", 19, 0)]
+    assert len(siguientes(actuales)) == precarga.MAX_POR_BUSQUEDA
+
+
+def test_siguientes_de_optativas_y_lips():
+    esperado = [("taller.php", 19, 0), ("LipHorarios.php", 19, 0)]
+    assert _pares(siguientes([_taller(19, 0)])) == esperado[1:]
+    assert _pares(siguientes([_taller(19, 0, "LipHorarios.php")])) == esperado[:1]
+    assert siguientes([{"endpoint": "profe.php", "payload_extra": {"idprof": "X"}}]) == []
+    assert siguientes([]) == []
+
+
+@pytest.fixture
+def sitio(monkeypatch):
+    """buscar_ofertas se queda esperando hasta `liberar`; `empezo` avisa la primera llamada."""
+    pedidas, empezo, liberar = [], threading.Event(), threading.Event()
+
+    def buscar(endpoint, payload_extra, tipo_parseo="ESTANDAR", ciclo=None):
+        pedidas.append((endpoint, payload_extra["tal"], payload_extra["talsem"]))
+        empezo.set()
+        assert liberar.wait(5)
+
+    monkeypatch.setattr(busqueda, "buscar_ofertas", buscar)
+    monkeypatch.setattr(busqueda, "en_cache", lambda **kwargs: False)
+    monkeypatch.setattr(conexion, "origen_disponible", lambda url: True)
+    monkeypatch.setattr(conexion, "peticiones_en_curso", lambda: 0)
+    return pedidas, empezo, liberar
+
+
+def _terminar(p, liberar):
+    liberar.set()
+    p._pool.shutdown(wait=True)
+    return p.estadisticas()
+
+
+def test_nueva_busqueda_cancela_lo_pendiente(sitio):
+    pedidas, empezo, liberar = sitio
+    p = Precargador(hilos=1, por_segundo=0)
+    assert p.precargar("s1", [_taller(6, 3)]) == 4
+    assert empezo.wait(5)
+    assert p.estadisticas()["pendientes"] == 4
+
+    # La primera ya está pidiendo; las otras tres no arrancaron y se cancelan
+    assert p.precargar("s1", [_taller(19, 0)]) == 1
+    assert p.estadisticas()["pendientes"] == 2
+    estadisticas = _terminar(p, liberar)
+    assert pedidas == [("taller.php", 6, 4), ("LipHorarios.php", 19, 0)]
+    assert (estadisticas["canceladas"], estadisticas["hechas"], estadisticas["pendientes"]) == (3, 2, 0)
+
+
+def test_lo_que_espera_turno_se_descarta_antes_de_pedirlo(sitio):
+    pedidas, empezo, liberar = sitio
+    # Dos hilos; el segundo espera medio segundo su turno del ritmo propio
+    p = Precargador(hilos=2, por_segundo=2)
+    p.precargar("s1", [_taller(6, 3)])
+    assert empezo.wait(5)
+    p.precargar("s1", [])
+    estadisticas = _terminar(p, liberar)
+    # Cualquiera de los dos hilos pudo tomar el primer turno; el otro ya no pide
+    assert len(pedidas) == 1 and pedidas[0] in {("taller.php", 6, 4), ("taller.php", 6, 2)}
+    assert (estadisticas["canceladas"], estadisticas["hechas"], estadisticas["pendientes"]) == (3, 1, 0)
+
+
+def test_otra_sesion_no_cancela(sitio):
+    pedidas, empezo, liberar = sitio
+    p = Precargador(hilos=1, por_segundo=0)
+    p.precargar("s1", [_taller(6, 3)])
+    p.precargar("s2", [_taller(19, 0)])
+    estadisticas = _terminar(p, liberar)
+    assert len(pedidas) == 5
+    assert (estadisticas["canceladas"], estadisticas["sesiones"], estadisticas["pendientes"]) == (0, 2, 0)
+
+
+def test_tope_de_pendientes_en_el_proceso(sitio):
+    pedidas, empezo, liberar = sitio
+    p = Precargador(hilos=1, por_segundo=0, max_pendientes=3)
+    assert p.precargar("s1", [_taller(6, 3)]) == 3
+    assert p.precargar("s2", [_taller(19, 0)]) == 0
+    assert p.estadisticas()["descartadas"] == 2
+    estadisticas = _terminar(p, liberar)
+    assert (estadisticas["hechas"], estadisticas["pendientes"]) == (3, 0)
+
+
+def test_sitio_ocupado_o_ya_en_cache(sitio, monkeypatch):
+    pedidas, _, liberar = sitio
+    monkeypatch.setattr(conexion, "peticiones_en_curso", lambda: conexion.MAX_CONCURRENTES)
+    p = Precargador(hilos=1, por_segundo=0, reserva=2)
+    p.precargar("s1", [_taller(6, 3)])
+    en_cache = {("taller.php", 19, 0)}
+    monkeypatch.setattr(busqueda, "en_cache", lambda endpoint, payload_extra, tipo_parseo, ciclo:
+                        (endpoint, payload_extra["tal"], payload_extra["talsem"]) in en_cache)
+    assert p.precargar("s2", [_taller(19, 0, "LipHorarios.php")]) == 0
+    estadisticas = _terminar(p, liberar)
+    assert pedidas == []
+    assert (estadisticas["sitio_ocupado"], estadisticas["ya_en_cache"], estadisticas["pendientes"]) == (4, 1, 0)
+
+
+def test_un_error_no_deja_pendientes(sitio, monkeypatch):
+    def falla(**kwargs):
+        raise ConnectionError("sin respuesta")
+
+    monkeypatch.setattr(busqueda, "buscar_ofertas", falla)
+    p = Precargador(hilos=2, por_segundo=0)
+    p.precargar("s1", [_taller(6, 3)])
+    p._pool.shutdown(wait=True)
+    assert (p.estadisticas()["errores"], p.estadisticas()["pendientes"]) == (4, 0)
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+from horarios import sesion
+from horarios.sesion import paginas, rango_pagina, tamano
+
+
+@pytest.mark.parametrize("total,esperadas", [(0, 1), (1, 1), (200, 1), (201, 2), (450, 3)])
+def test_paginas(total, esperadas):
+    assert paginas(total) == esperadas
+
+
+@pytest.mark.parametrize("numero,total,rango", [
+    (1, 450, (0, 200)),
+    (3, 450, (400, 450)),
+    (9, 450, (400, 450)),   # pasada la última se queda en la última
+    (0, 450, (0, 200)),
+    (-2, 450, (0, 200)),
+    (1, 0, (0, 0)),
+    (2, 400, (200, 400)),
+])
+def test_rango_pagina_recortado(numero, total, rango):
+    assert rango_pagina(numero, total) == rango
+
+
+def test_rango_pagina_cubre_todo_sin_traslapes():
+    total, por_pagina = 1003, 50
+    filas = []
+    for numero in range(1, paginas(total, por_pagina) + 1):
+        inicio, fin = rango_pagina(numero, total, por_pagina)
+        filas.extend(range(inicio, fin))
+    assert filas == list(range(total))
+
+
+def test_tamano_no_cuenta_lo_compartido():
+    df = pd.DataFrame({"Materia": ["PROYECTO " * 20] * 500})
+    propio = {"pagina": 3, "consultas": [("taller.php", {"tal": 6}, "ESTANDAR")]}
+    con_df = {**propio, "resultados": df}
+    assert tamano(con_df) >= tamano(propio) + int(df.memory_usage(deep=True).sum())
+    # El mismo df en la caché compartida no se le cobra a la sesión
+    assert df.memory_usage(deep=True).sum() > 50_000
+    assert tamano(con_df, compartidos={id(df)}) < tamano(propio) + 1024
+
+
+def test_tamano_cuenta_una_vez_lo_repetido():
+    lista = list(range(1000))
+    uno = tamano([lista])
+    assert tamano([lista, lista]) - uno < 100
+    # Con ciclos no se cuelga
+    ciclo = []
+    ciclo.append(ciclo)
+    assert tamano(ciclo) > 0
+
+
+def test_memoria_sesion_de_mayor_a_menor():
+    df = pd.DataFrame({"x": range(10_000)})
+    medidas = sesion.memoria_sesion({"pagina": 1, "df": df, "lista": [1, 2]}, compartidos=frozenset())
+    assert list(medidas) == ["df", "lista", "pagina"]
+    assert sesion.memoria_sesion({"df": df}, compartidos={id(df)})["df"] == 0
+
+
+def _evento(tipo, clave, grupo, materia, horario, campos=None):
+    fila = {"Clave": clave, "Materia": materia, "Grupo": grupo, "Profesor": "PÉREZ",
+            "Horario": horario, "Agrupación": "MAX CETTO", "Turno": "Matutino"}
+    return {"tipo": tipo, "clave": clave, "grupo": grupo, "materia": materia,
+            "campos": campos or {}, "fila": fila}
+
+
+def _en_horario(clave, grupo, materia, horario):
+    return sesion.materia_para_horario({"Clave": clave, "Materia": materia, "Grupo": grupo, "Horario": horario,
+                                        "Profesor": "PÉREZ"})
+
+
+def test_aplicar_cambios_con_materia_renombrada():
+    mi_horario = [_en_horario("1555", "0101", "PROYECTO", "LU 7-9")]
+    id_original = mi_horario[0]["id"]
+    evento = _evento("cambio", "1555", "0101", "PROYECTO ARQUITECTÓNICO II", "JU 14-16",
+                     {"Materia": ["PROYECTO", "PROYECTO ARQUITECTÓNICO II"], "Horario": ["LU 7-9", "JU 14-16"]})
+    avisos = sesion.aplicar_cambios(mi_horario, [{"eventos": [evento]}])
+    assert mi_horario[0]["Horario"] == "JU 14-16"
+    assert mi_horario[0]["Materia"] == "PROYECTO ARQUITECTÓNICO II"
+    assert mi_horario[0]["Bloques"] == sesion.interpretar_slots("JU 14-16")
+    assert mi_horario[0]["id"] == id_original
+    assert len(avisos) == 1 and "1555-0101" in avisos[0]
+
+
+def test_aplicar_cambios_no_confunde_claves_con_la_misma_materia():
+    # Dos optativas con el mismo nombre y grupo, distinta clave
+    mi_horario = [_en_horario("1555", "0101", "OPTATIVA", "LU 7-9"),
+                  _en_horario(2101, 101, "OPTATIVA", "MA 7-9")]
+    evento = _evento("cambio", "2101", "101", "OPTATIVA", "VI 7-9", {"Horario": ["MA 7-9", "VI 7-9"]})
+    sesion.aplicar_cambios(mi_horario, [{"eventos": [evento]}])
+    assert [m["Horario"] for m in mi_horario] == ["LU 7-9", "VI 7-9"]
+
+
+def test_aplicar_cambios_baja_solo_avisa():
+    mi_horario = [_en_horario("1620", "0003", "TEORÍA", "VI 16-18")]
+    antes = dict(mi_horario[0])
+    avisos = sesion.aplicar_cambios(mi_horario, [{"eventos": [_evento("baja", "1620", "0003", "TEORÍA", "VI 16-18")]}])
+    assert mi_horario[0] == antes
+    assert avisos == ["Ya no aparece 1620-0003 TEORÍA"]
+    # Sin Clave (sesiones viejas) no se toca nada
+    sin_clave = [{**antes, "Clave": ""}]
+    assert sesion.aplicar_cambios(sin_clave, [{"eventos": [_evento("baja", "1620", "0003", "TEORÍA", "")]}]) == []